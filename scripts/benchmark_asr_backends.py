@@ -0,0 +1,87 @@
+"""
+Benchmark: ASR backends on the same audio
+
+Each backend runs in a fresh process so its model load and peak memory are
+measured in isolation. Reports load time, real-time factor (transcription
+seconds per audio second) and peak RSS, plus word agreement with the first
+backend.
+
+Usage: python scripts/benchmark_asr_backends.py fixture.wav [--backends whisper,faster-whisper]
+           [--model base]
+"""
+import argparse
+import difflib
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+
+def run_backend(args) -> dict:
+    """Child process: load one backend's model and transcribe the fixture"""
+    from src.core.model_registry import get_model_registry, whisper_model_name
+    from src.services.clip_detection.asr import backend_for_model
+
+    model_name = whisper_model_name(args.model, backend=args.backend)
+    registry = get_model_registry()
+    load_seconds = registry.warm([model_name])
+
+    started = time.perf_counter()
+    with registry.borrow(model_name) as model:
+        result = backend_for_model(model_name).transcribe(model, args.audio, word_timestamps=True)
+    return {
+        'load_seconds': load_seconds,
+        'transcribe_seconds': time.perf_counter() - started,
+        # ru_maxrss is in kilobytes on Linux
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'segments': len(result['segments']),
+        'words': sum(len(segment['words']) for segment in result['segments']),
+        'text': result['text']
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('audio')
+    parser.add_argument('--backends', default='whisper,faster-whisper')
+    parser.add_argument('--model', default=os.getenv('WHISPER_MODEL_SIZE', 'base'))
+    parser.add_argument('--backend', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.backend:
+        print(json.dumps(run_backend(args)))
+        return
+
+    from src.services.clip_detection.chunked_transcription import audio_duration
+    duration = audio_duration(args.audio)
+    print(f"🎙️ {args.audio}: {duration:.1f}s of audio, model size {args.model}")
+
+    reports = {}
+    for backend in [name.strip() for name in args.backends.split(',') if name.strip()]:
+        cmd = [sys.executable, __file__, args.audio, '--backend', backend, '--model', args.model]
+        completed = subprocess.run(cmd, capture_output=True, text=True)
+        if completed.returncode != 0:
+            print(f"❌ {backend} failed:\n{completed.stderr.strip()[-2000:]}")
+            continue
+        reports[backend] = json.loads(completed.stdout.strip().splitlines()[-1])
+
+    if not reports:
+        return
+    reference_words = next(iter(reports.values()))['text'].lower().split()
+    for backend, report in reports.items():
+        agreement = difflib.SequenceMatcher(
+            None, reference_words, report['text'].lower().split(), autojunk=False
+        ).ratio()
+        print(f"{backend:>15}: load {report['load_seconds']:6.1f}s  "
+              f"RTF {report['transcribe_seconds'] / duration:.3f}  "
+              f"peak RSS {report['peak_rss_mb']:7.0f} MB  "
+              f"{report['segments']} segments / {report['words']} words  "
+              f"agreement {agreement:.3f}")
+
+
+if __name__ == '__main__':
+    main()
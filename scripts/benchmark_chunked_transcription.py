@@ -0,0 +1,136 @@
+"""
+Benchmark: single-pass Whisper vs chunked parallel transcription
+
+Each mode runs in a fresh process; wall time and the peak resident memory of
+that process and all its workers are reported, plus how closely the chunked
+transcript matches the single-pass one.
+
+Usage: python scripts/benchmark_chunked_transcription.py episode.mp3 [--model base] [--workers 4]
+           [--chunk-seconds 600] [--overlap-seconds 5]
+"""
+import argparse
+import difflib
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+
+def tree_rss_bytes(root_pid: int) -> int:
+    """Resident memory of a process and all of its descendants (Linux /proc)"""
+    children = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+
+    total, pending = 0, [root_pid]
+    while pending:
+        pid = pending.pop()
+        pending += children.get(pid, [])
+        try:
+            with open(f'/proc/{pid}/status') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        total += int(line.split()[1]) * 1024
+                        break
+        except OSError:
+            pass
+    return total
+
+
+def run_mode(args) -> dict:
+    """Child process: transcribe with one mode and report the result"""
+    from src.core.model_registry import get_model_registry, whisper_model_name
+    from src.services.clip_detection.chunked_transcription import ChunkedTranscriber
+    from src.services.clip_detection.asr import backend_for_model
+
+    model_name = whisper_model_name(args.model)
+    started = time.perf_counter()
+    if args.mode == 'single':
+        with get_model_registry().borrow(model_name) as model:
+            result = backend_for_model(model_name).transcribe(model, args.audio, word_timestamps=True)
+    else:
+        transcriber = ChunkedTranscriber(args.workers, args.chunk_seconds, args.overlap_seconds)
+        result = transcriber.transcribe(args.audio, model_name, word_timestamps=True)
+        transcriber.close()
+    return {
+        'wall_seconds': time.perf_counter() - started,
+        'segments': len(result['segments']),
+        'text': result['text']
+    }
+
+
+def measure(args, mode: str) -> dict:
+    cmd = [
+        sys.executable, __file__, args.audio, '--mode', mode, '--model', args.model,
+        '--workers', str(args.workers), '--chunk-seconds', str(args.chunk_seconds),
+        '--overlap-seconds', str(args.overlap_seconds)
+    ]
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, text=True)
+    peak = 0
+    done = threading.Event()
+
+    def sample():
+        nonlocal peak
+        while not done.is_set():
+            peak = max(peak, tree_rss_bytes(process.pid))
+            time.sleep(0.2)
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    stdout, _ = process.communicate()
+    done.set()
+    sampler.join()
+    if process.returncode != 0:
+        raise SystemExit(f"{mode} run failed")
+
+    report = json.loads(stdout.strip().splitlines()[-1])
+    report['peak_rss_mb'] = peak / 1024 / 1024
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('audio')
+    parser.add_argument('--model', default=os.getenv('WHISPER_MODEL_SIZE', 'base'))
+    parser.add_argument('--workers', type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument('--chunk-seconds', type=float, default=600.0)
+    parser.add_argument('--overlap-seconds', type=float, default=5.0)
+    parser.add_argument('--mode', choices=['single', 'chunked'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_mode(args)))
+        return
+
+    from src.services.clip_detection.chunked_transcription import audio_duration
+    duration = audio_duration(args.audio)
+    print(f"🎙️ {args.audio}: {duration / 60:.1f} min, model {args.model}, "
+          f"{args.workers} workers, {args.chunk_seconds:.0f}s chunks")
+
+    single = measure(args, 'single')
+    chunked = measure(args, 'chunked')
+
+    single_words, chunked_words = single['text'].split(), chunked['text'].split()
+    similarity = difflib.SequenceMatcher(None, single_words, chunked_words, autojunk=False).ratio()
+
+    for name, report in (('single pass', single), ('chunked', chunked)):
+        print(f"{name:>12}: {report['wall_seconds']:8.1f}s wall  "
+              f"RTF {report['wall_seconds'] / duration:.3f}  "
+              f"peak RSS {report['peak_rss_mb']:7.0f} MB  {report['segments']} segments")
+    print(f"⚡ Speedup: {single['wall_seconds'] / chunked['wall_seconds']:.2f}x")
+    print(f"📝 Words: {len(single_words)} vs {len(chunked_words)}, transcript similarity {similarity:.3f}")
+
+
+if __name__ == '__main__':
+    main()
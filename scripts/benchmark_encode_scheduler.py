@@ -0,0 +1,76 @@
+"""
+Benchmark: unbounded concurrent ffmpeg encodes vs the encode scheduler
+
+Usage: python scripts/benchmark_encode_scheduler.py [--jobs 10] [--seconds 5]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.services.video_processing.encode_scheduler import EncodeScheduler, available_cores
+
+
+def encode_command(seconds: float, output_path: str):
+    # Same shape as a platform render: 1080x1920 libx264
+    return [
+        'ffmpeg', '-y', '-v', 'error',
+        '-f', 'lavfi', '-i', f'testsrc2=size=1080x1920:rate=30:duration={seconds}',
+        '-c:v', 'libx264', '-preset', 'veryfast',
+        output_path
+    ]
+
+
+async def run_unbounded(commands):
+    async def one(cmd):
+        started = time.perf_counter()
+        process = await asyncio.create_subprocess_exec(*cmd)
+        await process.wait()
+        return time.perf_counter() - started
+    return await asyncio.gather(*(one(cmd) for cmd in commands))
+
+
+async def run_scheduled(commands, scheduler):
+    async def one(cmd):
+        started = time.perf_counter()
+        await scheduler.run(cmd)
+        return time.perf_counter() - started
+    return await asyncio.gather(*(one(cmd) for cmd in commands))
+
+
+def report(name, wall, latencies):
+    latencies = sorted(latencies)
+    print(f"{name:>10}: wall {wall:6.2f}s | mean latency {sum(latencies) / len(latencies):6.2f}s | "
+          f"first done {latencies[0]:6.2f}s | last done {latencies[-1]:6.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--jobs', type=int, default=10)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    args = parser.parse_args()
+
+    scheduler = EncodeScheduler()
+    print(f"{available_cores()} cores, scheduler: {scheduler.max_concurrent} slots x "
+          f"{scheduler.threads_per_job} threads, {args.jobs} jobs of {args.seconds}s 1080x1920\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        commands = [encode_command(args.seconds, os.path.join(tmp, f"{i}.mp4")) for i in range(args.jobs)]
+
+        started = time.perf_counter()
+        latencies = asyncio.run(run_unbounded(commands))
+        report('unbounded', time.perf_counter() - started, latencies)
+
+        started = time.perf_counter()
+        latencies = asyncio.run(run_scheduled(commands, scheduler))
+        report('scheduled', time.perf_counter() - started, latencies)
+
+    print(f"\n{scheduler.describe()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark: per-text viral scoring vs the batch window scorer
+
+Usage: python scripts/benchmark_scoring.py [--minutes 180] [--windows 2000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+
+from src.services.clip_detection.scoring import VIRAL_PATTERNS, BatchTextScorer, score_text
+
+VOCABULARY = (
+    "the brain is incredible and you should never try this secret method to fix your focus "
+    "it's CRAZY how wrong we were about dopamine! really? yes. so here's how to improve sleep "
+    "most people avoid the truth because it's controversial. we need to talk about money."
+).split()
+
+
+def synthetic_transcript(minutes: float, words_per_second: float = 2.5, seed: int = 7):
+    rnd = random.Random(seed)
+    return [rnd.choice(VOCABULARY) for _ in range(int(minutes * 60 * words_per_second))]
+
+
+def random_windows(n_tokens: int, count: int, min_words: int = 40, max_words: int = 225, seed: int = 11):
+    rnd = random.Random(seed)
+    starts = np.array([rnd.randint(0, n_tokens - max_words) for _ in range(count)], dtype=np.int64)
+    ends = starts + np.array([rnd.randint(min_words, max_words) for _ in range(count)], dtype=np.int64)
+    return starts, ends
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--minutes', type=float, default=180.0)
+    parser.add_argument('--windows', type=int, default=2000)
+    args = parser.parse_args()
+
+    tokens = synthetic_transcript(args.minutes)
+    starts, ends = random_windows(len(tokens), args.windows)
+    print(f"📝 {len(tokens)} tokens, {args.windows} windows")
+
+    # Per-text path (what score_viral_potential does for each window)
+    started = time.perf_counter()
+    reference = [score_text(' '.join(tokens[a:b]), VIRAL_PATTERNS) for a, b in zip(starts, ends)]
+    per_text_seconds = time.perf_counter() - started
+
+    # Batch path: tokenize and pattern-scan once, then prefix sums per window
+    scorer = BatchTextScorer(VIRAL_PATTERNS)
+    started = time.perf_counter()
+    features = scorer.prepare(tokens)
+    prepare_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    components = features.score_windows(starts, ends)
+    batch_seconds = time.perf_counter() - started
+
+    mismatches = sum(
+        1 for i, expected in enumerate(reference)
+        if expected != {name: float(values[i]) for name, values in components.items()}
+    )
+
+    print(f"🐢 per-text: {args.windows / per_text_seconds:,.0f} windows/sec")
+    print(f"⚡ batch:    {args.windows / batch_seconds:,.0f} windows/sec "
+          f"(+ {prepare_seconds * 1000:.0f} ms one-off prepare)")
+    print(f"{'✅' if mismatches == 0 else '❌'} {mismatches} mismatching windows")
+
+
+if __name__ == "__main__":
+    main()
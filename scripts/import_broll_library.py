@@ -0,0 +1,35 @@
+"""
+Bulk-import footage into the local B-roll library
+
+Usage: python scripts/import_broll_library.py SOURCE_DIR [--library data/broll_library] [--workers 4]
+
+Video files are found recursively. A sidecar JSON next to a clip
+(clip.mp4 + clip.json with "title" and "tags") supplies its metadata;
+otherwise the title is derived from the file name.
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.services.broll_matching.library import FootageLibrary
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('source_dir')
+    parser.add_argument('--library', default=None, help='library directory (default: BROLL_LIBRARY_DIR)')
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    library = FootageLibrary(library_dir=args.library)
+    added = library.import_directory(args.source_dir, workers=args.workers)
+
+    for entry in added:
+        print(f"  + {entry.title} [{entry.resolution} {entry.codec}, {entry.duration:.1f}s] {', '.join(entry.tags)}")
+    print(f"Library now holds {len(library)} clips in {library.library_dir}")
+
+
+if __name__ == '__main__':
+    main()
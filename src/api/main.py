@@ -1,3 +1,4 @@
+import asyncio
 import sys
 import os
 from fastapi import FastAPI
@@ -8,6 +9,17 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
 
 # Import route modules
 from src.api.routes.upload import router as upload_router
+from src.api.routes.pipeline import router as pipeline_router
+from src.api.middleware.upload_limit import UploadSizeLimitMiddleware
+from src.core.model_registry import get_model_registry, startup_models
+from src.services.broll_matching.matcher import get_pexels_client
+from src.services.broll_matching.search_cache import get_search_cache
+from src.services.clip_detection.chunked_transcription import close_chunked_transcriber
+from src.services.clip_detection.detection_pool import get_detection_pool
+from src.services.video_processing.download_cache import get_download_cache
+from src.services.video_processing.encode_scheduler import get_encode_scheduler
+from src.services.video_processing.workspace import sweep_stale_workspaces
+from src.workers.queue import get_job_queue, shutdown_job_queue
 
 app = FastAPI(
     title="Viral Content Automation API",
@@ -24,8 +36,69 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Reject oversized uploads while they stream in, not after they are spooled
+app.add_middleware(UploadSizeLimitMiddleware)
+
 # Include routers
 app.include_router(upload_router)
+app.include_router(pipeline_router)
+
+@app.on_event("startup")
+async def warm_models():
+    """Load shared models once so requests borrow them instead of reloading"""
+    registry = get_model_registry()
+    pool = get_detection_pool()
+    names = startup_models()
+    if not pool.in_process:
+        # Whisper lives in the detection workers, not in the API process
+        names = [name for name in names if name not in pool.warm_models]
+    try:
+        warm_seconds = registry.warm(names)
+        app.state.model_warm_seconds = warm_seconds
+        print(f"🔥 Models warmed in {warm_seconds:.2f}s: {', '.join(names)}")
+    except Exception as e:
+        # Models will load lazily on first use instead
+        app.state.model_warm_seconds = None
+        print(f"⚠️  Model warm-up failed: {e}")
+    
+    try:
+        worker_warm = await pool.start()
+        if worker_warm:
+            print(f"🧵 {len(worker_warm)} detection workers ready")
+    except Exception as e:
+        print(f"⚠️  Detection pool start-up failed: {e}")
+
+@app.on_event("startup")
+async def sweep_workspaces():
+    """Remove scratch workspaces left behind by runs that crashed"""
+    removed = sweep_stale_workspaces()
+    if removed:
+        print(f"🧹 Removed {removed} stale job workspaces")
+
+@app.on_event("startup")
+async def recover_jobs():
+    """Re-dispatch jobs the local broker's workers were holding when the API stopped"""
+    try:
+        counts = await asyncio.to_thread(get_job_queue().recover_orphaned_jobs)
+    except Exception as e:
+        print(f"⚠️  Could not recover orphaned jobs: {e}")
+        return
+    if counts["requeued"] or counts["failed"]:
+        print(f"♻️  Orphaned jobs: {counts['requeued']} requeued, {counts['failed']} failed")
+
+@app.on_event("shutdown")
+async def stop_job_queue():
+    shutdown_job_queue()
+
+@app.on_event("shutdown")
+async def stop_detection_pool():
+    get_detection_pool().close()
+    close_chunked_transcriber()
+
+@app.on_event("shutdown")
+async def close_http_clients():
+    await get_pexels_client().close()
+    await get_search_cache().close()
 
 @app.get("/")
 async def root():
@@ -43,4 +116,12 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "timestamp": "2024-01-01"}
+    return {
+        "status": "healthy",
+        "timestamp": "2024-01-01",
+        "model_warm_seconds": getattr(app.state, "model_warm_seconds", None),
+        "models": get_model_registry().describe(),
+        "broll_download_cache": get_download_cache().describe(),
+        "encode_scheduler": get_encode_scheduler().describe(),
+        "detection_pool": get_detection_pool().describe()
+    }
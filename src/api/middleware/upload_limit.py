@@ -0,0 +1,102 @@
+"""
+Upload size limit - rejects oversized request bodies before they are spooled
+"""
+import json
+import os
+from typing import Iterable, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Room for the multipart boundaries and form fields around the file itself
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+class RequestBodyTooLarge(Exception):
+    pass
+
+
+class UploadSizeLimitMiddleware:
+    """Pure ASGI middleware enforcing MAX_UPLOAD_SIZE on upload routes.
+
+    Starlette spools a multipart body to disk before the endpoint runs, so a
+    limit checked by the endpoint only applies after the whole upload has been
+    received. This middleware rejects a declared ``Content-Length`` over the
+    limit at once, and counts body chunks as they arrive for chunked uploads,
+    answering 413 as soon as the limit is passed.
+    """
+
+    def __init__(self, app, max_upload_mb: Optional[float] = None,
+                 path_prefixes: Iterable[str] = ("/upload", "/pipeline")):
+        self.app = app
+        if max_upload_mb is None:
+            max_upload_mb = float(os.getenv('MAX_UPLOAD_SIZE', '500'))
+        self.max_bytes = int(max_upload_mb * 1024 * 1024) + MULTIPART_OVERHEAD_BYTES
+        self.path_prefixes = tuple(path_prefixes)
+
+    def _applies(self, scope) -> bool:
+        return (
+            scope["type"] == "http"
+            and scope["method"] in ("POST", "PUT")
+            and scope["path"].startswith(self.path_prefixes)
+        )
+
+    async def _reject(self, send):
+        body = json.dumps({
+            "detail": f"Upload exceeds maximum size of {self.max_bytes // (1024 * 1024)} MB"
+        }).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("ascii")),
+                (b"connection", b"close")
+            ]
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    async def __call__(self, scope, receive, send):
+        if not self._applies(scope):
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        declared = headers.get(b"content-length")
+        if declared is not None and declared.isdigit() and int(declared) > self.max_bytes:
+            await self._reject(send)
+            return
+
+        received = 0
+        exceeded = False
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    exceeded = True
+                    raise RequestBodyTooLarge()
+            return message
+
+        async def guarded_send(message):
+            nonlocal response_started
+            # The app's own error for the aborted body is replaced by our 413
+            if exceeded:
+                return
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except RequestBodyTooLarge:
+            pass
+        except Exception:
+            if not exceeded:
+                raise
+        if exceeded and not response_started:
+            await self._reject(send)
@@ -4,62 +4,152 @@ Complete pipeline API endpoint
 import sys
 sys.path.insert(0, 'src')
 
-from fastapi import APIRouter, UploadFile, File, HTTPException, Form
+from fastapi import APIRouter, UploadFile, File, HTTPException, Form, Request
+from fastapi.responses import JSONResponse
 from typing import List
 import os
-import uuid
 import asyncio
-from pathlib import Path
 
 from src.services.orchestration.pipeline import ViralContentPipeline
+from src.services.upload.ingest import get_upload_ingestor, UploadTooLargeError
+from src.services.video_processing.encode_scheduler import EncodePriority, EncodeQueueFull
+from src.workers.jobs import JobNotFound, JobStatus
+from src.workers.queue import get_job_queue
 
 router = APIRouter(prefix="/pipeline", tags=["pipeline"])
 
+async def _cancel_on_disconnect(request: Request, coro, poll_interval: float = 1.0):
+    """Await ``coro``, cancelling it (and any ffmpeg it started) if the client goes away"""
+    task = asyncio.create_task(coro)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_interval)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                print("🔌 Client disconnected, cancelling pipeline")
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+                raise HTTPException(status_code=499, detail="Client disconnected")
+    finally:
+        if not task.done():
+            task.cancel()
+
 @router.post("/process")
 async def process_complete_pipeline(
+    request: Request,
     file: UploadFile = File(...),
     podcaster: str = Form("unknown"),
     platforms: str = Form("tiktok,instagram")
 ):
     """Process complete viral content pipeline"""
     
+    # Stream upload to disk (deduplicated by content hash)
+    try:
+        ingested = await get_upload_ingestor().ingest(file)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    
+    file_id = ingested.file_id
+    file_path = ingested.path
+    
     try:
-        # Save uploaded file
-        file_id = str(uuid.uuid4())
-        file_extension = Path(file.filename).suffix
-        upload_path = Path("data/uploads")
-        upload_path.mkdir(exist_ok=True)
-        
-        file_path = upload_path / f"{file_id}{file_extension}"
-        
-        # Save file
-        with open(file_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
-        
         # Process platforms
         platform_list = [p.strip() for p in platforms.split(',')]
         
         # Run complete pipeline
         pipeline = ViralContentPipeline()
-        results = await pipeline.process_audio_file(
+        results = await _cancel_on_disconnect(request, pipeline.process_audio_file(
             str(file_path), 
             podcaster, 
-            platform_list
-        )
+            platform_list,
+            priority=EncodePriority.INTERACTIVE
+        ))
         
         return {
             "success": results["success"],
             "file_id": file_id,
             "original_filename": file.filename,
+            "duplicate_upload": ingested.duplicate,
             "clips_detected": results["clips_detected"],
             "videos_created": results["videos_created"],
             "output_files": results["output_files"]
         }
         
+    except EncodeQueueFull as e:
+        raise HTTPException(status_code=503, detail=f"Render queue is full, retry later: {e}",
+                            headers={"Retry-After": "30"})
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Pipeline failed: {str(e)}")
 
+@router.post("/jobs", status_code=202)
+async def submit_pipeline_job(
+    file: UploadFile = File(...),
+    podcaster: str = Form("unknown"),
+    platforms: str = Form("tiktok,instagram")
+):
+    """Queue the complete pipeline for a background worker and return at once"""
+    
+    try:
+        ingested = await get_upload_ingestor().ingest(file)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    
+    platform_list = [p.strip() for p in platforms.split(',')]
+    job = await asyncio.to_thread(
+        get_job_queue().submit,
+        str(ingested.path),
+        podcaster,
+        platform_list,
+        {"file_id": ingested.file_id, "original_filename": file.filename}
+    )
+    if job.status == JobStatus.FAILED:
+        raise HTTPException(status_code=503, detail=job.error, headers={"Retry-After": "30"})
+    
+    return {
+        "job_id": job.job_id,
+        "status": job.status,
+        "file_id": ingested.file_id,
+        "duplicate_upload": ingested.duplicate,
+        "status_url": f"/pipeline/jobs/{job.job_id}",
+        "result_url": f"/pipeline/jobs/{job.job_id}/result"
+    }
+
+@router.get("/jobs/{job_id}")
+async def get_pipeline_job(job_id: str):
+    """Current state of a queued pipeline job"""
+    try:
+        job = await asyncio.to_thread(get_job_queue().get, job_id)
+    except JobNotFound:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job.describe()
+
+@router.get("/jobs/{job_id}/result")
+async def get_pipeline_job_result(job_id: str):
+    """Pipeline results once the job has finished (202 while it is still pending)"""
+    try:
+        job = await asyncio.to_thread(get_job_queue().get, job_id)
+    except JobNotFound:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    
+    if not job.finished:
+        return JSONResponse(status_code=202, content={"job_id": job_id, "status": job.status},
+                            headers={"Retry-After": "10"})
+    if job.status == JobStatus.FAILED:
+        raise HTTPException(status_code=500, detail=f"Pipeline failed: {job.error}")
+    
+    results = job.result or {}
+    return {
+        "job_id": job_id,
+        "status": job.status,
+        "success": results.get("success", False),
+        "clips_detected": results.get("clips_detected", 0),
+        "videos_created": results.get("videos_created", 0),
+        "output_files": results.get("output_files", [])
+    }
+
 @router.get("/health")
 async def pipeline_health():
     return {"status": "healthy", "service": "pipeline"}
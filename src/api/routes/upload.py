@@ -3,15 +3,9 @@ Upload endpoints for viral content automation
 """
 from fastapi import APIRouter, UploadFile, File, HTTPException, Form
 from typing import List
-import os
-import sys
-import uuid
-from pathlib import Path
 
-# Add src to path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..', 'src'))
-
-from services.clip_detection.detector import EnhancedClipDetector
+from src.services.clip_detection.detector import EnhancedClipDetector
+from src.services.upload.ingest import get_upload_ingestor, UploadTooLargeError
 
 router = APIRouter(prefix="/upload", tags=["upload"])
 
@@ -29,23 +23,20 @@ async def analyze_audio(
             detail="Invalid file type. Please upload an audio file (.wav, .mp3, .m4a, .mp4)"
         )
     
+    # Stream upload to disk (deduplicated by content hash)
+    ingestor = get_upload_ingestor()
+    try:
+        ingested = await ingestor.ingest(file)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    
+    file_id = ingested.file_id
+    file_path = ingested.path
+    
     try:
-        # Save uploaded file
-        file_id = str(uuid.uuid4())
-        file_extension = Path(file.filename).suffix
-        upload_path = Path("data/uploads")
-        upload_path.mkdir(exist_ok=True)
-        
-        file_path = upload_path / f"{file_id}{file_extension}"
-        
-        # Save file
-        with open(file_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
-        
         # Initialize detector and analyze
         detector = EnhancedClipDetector()
-        clips = detector.detect_clips(str(file_path))
+        clips = await detector.detect_clips_async(str(file_path))
         
         # Prepare response
         results = []
@@ -65,6 +56,7 @@ async def analyze_audio(
             "success": True,
             "file_id": file_id,
             "original_filename": file.filename,
+            "duplicate_upload": ingested.duplicate,
             "podcaster": podcaster,
             "clips_found": len(clips),
             "clips": results
@@ -72,8 +64,7 @@ async def analyze_audio(
         
     except Exception as e:
         # Clean up file if error
-        if 'file_path' in locals() and file_path.exists():
-            file_path.unlink()
+        await ingestor.discard(ingested)
             
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
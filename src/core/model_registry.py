@@ -0,0 +1,292 @@
+"""
+Process-wide model registry - loads heavy models once and lends them out
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+@dataclass
+class ModelEntry:
+    name: str
+    model: Any
+    size_bytes: int
+    load_seconds: float
+    ref_count: int = 0
+    last_used: float = field(default_factory=time.monotonic)
+
+
+def directory_size_bytes(path: str) -> int:
+    """Total size of the files under ``path``"""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def estimate_model_size(model: Any) -> int:
+    """Estimate the resident size of a model in bytes"""
+    # Set by loaders whose weights live outside Python (e.g. CTranslate2)
+    known = getattr(model, "estimated_size_bytes", None)
+    if known:
+        return int(known)
+
+    parameters = getattr(model, "parameters", None)
+    if callable(parameters):
+        try:
+            total = 0
+            for param in parameters():
+                total += param.numel() * param.element_size()
+            return total
+        except Exception:
+            pass
+    return 0
+
+
+def _load_whisper(size: str):
+    import whisper
+    return whisper.load_model(size)
+
+
+def _load_faster_whisper(size: str):
+    # CTranslate2 Whisper; int8 weights keep CPU inference fast and small
+    from faster_whisper import WhisperModel
+    from faster_whisper.utils import download_model
+    model_path = size if os.path.isdir(size) else download_model(size)
+    model = WhisperModel(
+        model_path,
+        device='cpu',
+        compute_type=os.getenv('ASR_COMPUTE_TYPE', 'int8'),
+        cpu_threads=int(os.getenv('ASR_CPU_THREADS', '0'))
+    )
+    # CTranslate2 exposes no tensors to measure; the converted weights on disk
+    # are an upper bound for int8 and close for float16/float32
+    model.estimated_size_bytes = directory_size_bytes(model_path)
+    return model
+
+
+def _load_sentence_transformer(name: str):
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(name, device='cpu')
+
+
+class ModelRegistry:
+    """Shared, lazily-loaded models with reference counting and a memory cap.
+
+    Models are addressed by name (``"whisper:base"``). A name is resolved either
+    through an exact loader registered with :meth:`register` or through a
+    family loader registered with :meth:`register_family`, which receives the
+    part after the colon. Callers borrow a model for the duration of their work;
+    models nobody is borrowing may be evicted (least recently used first) when
+    the combined size exceeds ``memory_limit_mb``.
+    """
+
+    def __init__(self, memory_limit_mb: Optional[float] = None):
+        if memory_limit_mb is None:
+            memory_limit_mb = float(os.getenv('MODEL_MEMORY_LIMIT_MB', '4096'))
+        self.memory_limit_bytes = int(memory_limit_mb * 1024 * 1024)
+
+        self._loaders: Dict[str, Callable[[], Any]] = {}
+        self._family_loaders: Dict[str, Callable[[str], Any]] = {}
+        self._entries: "OrderedDict[str, ModelEntry]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._load_locks: Dict[str, threading.Lock] = {}
+
+        self.stats = {"loads": 0, "hits": 0, "evictions": 0}
+
+    def register(self, name: str, loader: Callable[[], Any]):
+        """Register a loader for a single named model"""
+        with self._lock:
+            self._loaders[name] = loader
+
+    def register_family(self, prefix: str, loader: Callable[[str], Any]):
+        """Register a loader for every ``prefix:<variant>`` name"""
+        with self._lock:
+            self._family_loaders[prefix] = loader
+
+    def _resolve_loader(self, name: str) -> Callable[[], Any]:
+        if name in self._loaders:
+            return self._loaders[name]
+
+        prefix, _, variant = name.partition(':')
+        if variant and prefix in self._family_loaders:
+            family_loader = self._family_loaders[prefix]
+            return lambda: family_loader(variant)
+
+        raise KeyError(f"No loader registered for model '{name}'")
+
+    def acquire(self, name: str) -> Any:
+        """Return the named model, loading it if needed, and take a reference"""
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None:
+                entry.ref_count += 1
+                entry.last_used = time.monotonic()
+                self._entries.move_to_end(name)
+                self.stats["hits"] += 1
+                return entry.model
+            load_lock = self._load_locks.setdefault(name, threading.Lock())
+
+        # Load outside the registry lock so other models stay available,
+        # but only once per name even when several threads race for it
+        with load_lock:
+            with self._lock:
+                entry = self._entries.get(name)
+                if entry is not None:
+                    entry.ref_count += 1
+                    entry.last_used = time.monotonic()
+                    self._entries.move_to_end(name)
+                    self.stats["hits"] += 1
+                    return entry.model
+                loader = self._resolve_loader(name)
+
+            print(f"🤖 Loading model '{name}'...")
+            started = time.perf_counter()
+            model = loader()
+            load_seconds = time.perf_counter() - started
+
+            with self._lock:
+                entry = ModelEntry(
+                    name=name,
+                    model=model,
+                    size_bytes=estimate_model_size(model),
+                    load_seconds=load_seconds,
+                    ref_count=1
+                )
+                self._entries[name] = entry
+                self.stats["loads"] += 1
+                self._evict_if_needed(keep=name)
+
+            print(f"✅ Model '{name}' loaded in {load_seconds:.2f}s")
+            return model
+
+    def release(self, name: str):
+        """Drop a reference taken with :meth:`acquire`"""
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                return
+            entry.ref_count = max(0, entry.ref_count - 1)
+            entry.last_used = time.monotonic()
+            self._evict_if_needed()
+
+    @contextmanager
+    def borrow(self, name: str):
+        """Context manager that acquires a model and releases it afterwards"""
+        model = self.acquire(name)
+        try:
+            yield model
+        finally:
+            self.release(name)
+
+    def _evict_if_needed(self, keep: Optional[str] = None):
+        total = sum(entry.size_bytes for entry in self._entries.values())
+        if total <= self.memory_limit_bytes:
+            return
+
+        # Oldest first; models currently borrowed are never evicted
+        for name in list(self._entries.keys()):
+            if total <= self.memory_limit_bytes:
+                break
+            entry = self._entries[name]
+            if name == keep or entry.ref_count > 0:
+                continue
+            del self._entries[name]
+            total -= entry.size_bytes
+            self.stats["evictions"] += 1
+            print(f"♻️  Evicted model '{name}' ({entry.size_bytes / 1e6:.0f} MB)")
+
+        if total > self.memory_limit_bytes:
+            print(f"⚠️  Models in use exceed memory cap "
+                  f"({total / 1e6:.0f} MB > {self.memory_limit_bytes / 1e6:.0f} MB)")
+
+    def evict(self, name: str) -> bool:
+        """Evict a model if nobody is borrowing it"""
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None or entry.ref_count > 0:
+                return False
+            del self._entries[name]
+            self.stats["evictions"] += 1
+            return True
+
+    def warm(self, names: Iterable[str]) -> float:
+        """Load the given models up front and return the time to warm in seconds"""
+        started = time.perf_counter()
+        for name in names:
+            self.acquire(name)
+            self.release(name)
+        return time.perf_counter() - started
+
+    def loaded_models(self) -> List[str]:
+        with self._lock:
+            return list(self._entries.keys())
+
+    def describe(self) -> Dict:
+        """Registry state for health/metrics endpoints"""
+        with self._lock:
+            return {
+                "memory_limit_mb": round(self.memory_limit_bytes / 1024 / 1024, 1),
+                "memory_used_mb": round(
+                    sum(e.size_bytes for e in self._entries.values()) / 1024 / 1024, 1
+                ),
+                "models": {
+                    name: {
+                        "size_mb": round(entry.size_bytes / 1024 / 1024, 1),
+                        "load_seconds": round(entry.load_seconds, 3),
+                        "ref_count": entry.ref_count
+                    }
+                    for name, entry in self._entries.items()
+                },
+                **self.stats
+            }
+
+
+def whisper_model_name(size: Optional[str] = None, backend: Optional[str] = None) -> str:
+    """Registry name for a speech model: ASR backend family (ASR_BACKEND) and
+    Whisper size (WHISPER_MODEL_SIZE), e.g. ``"faster-whisper:base"``"""
+    backend = backend or os.getenv('ASR_BACKEND', 'whisper')
+    return f"{backend}:{size or os.getenv('WHISPER_MODEL_SIZE', 'base')}"
+
+
+def embedding_model_name(model: Optional[str] = None) -> str:
+    """Registry name for a sentence-transformers model (defaults to EMBEDDING_MODEL)"""
+    return f"sentence-transformers:{model or os.getenv('EMBEDDING_MODEL', 'all-MiniLM-L6-v2')}"
+
+
+_registry: Optional[ModelRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_model_registry() -> ModelRegistry:
+    """Return the process-wide registry, creating it with the default loaders"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                registry = ModelRegistry()
+                registry.register_family('whisper', _load_whisper)
+                registry.register_family('faster-whisper', _load_faster_whisper)
+                registry.register_family('sentence-transformers', _load_sentence_transformer)
+                _registry = registry
+    return _registry
+
+
+def startup_models() -> List[str]:
+    """Models to warm at startup, from WARM_MODELS (comma separated)"""
+    configured = os.getenv('WARM_MODELS')
+    if configured is not None:
+        return [name.strip() for name in configured.split(',') if name.strip()]
+    return [whisper_model_name()]
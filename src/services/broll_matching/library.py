@@ -0,0 +1,302 @@
+"""
+Local B-roll library - vetted footage on disk with a metadata and embedding index
+"""
+import asyncio
+import json
+import os
+import re
+import shutil
+import subprocess
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+from src.utils.hashing import sha256_file
+from src.services.broll_matching.relevance import (
+    RelevanceEngine, VectorIndex, get_relevance_engine, lexical_scores
+)
+
+load_dotenv()
+
+VIDEO_EXTENSIONS = {'.mp4', '.mov', '.m4v', '.mkv', '.webm'}
+
+
+@dataclass
+class LibraryEntry:
+    id: str
+    filename: str
+    sha256: str
+    title: str
+    tags: List[str]
+    duration: float
+    width: int
+    height: int
+    codec: str
+    size_bytes: int
+    imported_at: float = field(default_factory=time.time)
+
+    @property
+    def resolution(self) -> str:
+        return f"{self.width}x{self.height}"
+
+    @property
+    def description(self) -> str:
+        return '. '.join(part for part in (self.title, ', '.join(self.tags)) if part)
+
+
+def probe_footage(path: str) -> Dict:
+    """Duration, resolution and codec of a video file via ffprobe"""
+    cmd = [
+        'ffprobe', '-v', 'error',
+        '-select_streams', 'v:0',
+        '-show_entries', 'stream=codec_name,width,height:format=duration',
+        '-of', 'json', str(path)
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
+    if result.returncode != 0:
+        raise ValueError(f"ffprobe failed for {path}: {result.stderr.strip()}")
+
+    info = json.loads(result.stdout or '{}')
+    streams = info.get('streams') or []
+    if not streams:
+        raise ValueError(f"No video stream in {path}")
+
+    stream = streams[0]
+    return {
+        'duration': float(info.get('format', {}).get('duration') or 0.0),
+        'width': int(stream.get('width') or 0),
+        'height': int(stream.get('height') or 0),
+        'codec': stream.get('codec_name', 'unknown')
+    }
+
+
+def title_from_filename(path: Path) -> str:
+    """'woman-meditating_on_beach-3327.mp4' -> 'woman meditating on beach'"""
+    stem = re.sub(r'[-_ ]?\d+$', '', path.stem)
+    return re.sub(r'[-_]+', ' ', stem).strip()
+
+
+class FootageLibrary:
+    """A directory of vetted B-roll that can be searched without the network.
+
+    Imported files are copied in under a content-addressed name, probed for
+    duration/resolution/codec and recorded in ``library.json``. Each entry's
+    title and tags are embedded with the relevance engine's model into a
+    :class:`VectorIndex` kept next to the footage, so a search is a single
+    matrix-vector product over the whole library.
+    """
+
+    def __init__(self, library_dir: Optional[str] = None, relevance: Optional[RelevanceEngine] = None):
+        self.library_dir = Path(library_dir or os.getenv('BROLL_LIBRARY_DIR', 'data/broll_library'))
+        self.library_dir.mkdir(parents=True, exist_ok=True)
+        self.relevance = relevance or get_relevance_engine()
+
+        self.metadata_path = self.library_dir / 'library.json'
+        safe_name = re.sub(r'[^A-Za-z0-9_.-]+', '_', self.relevance.embedding_model_name)
+        self.index = VectorIndex(self.library_dir / f".index_{safe_name}.npz")
+
+        self._lock = threading.Lock()
+        self.entries: Dict[str, LibraryEntry] = {}
+        self._by_sha: Dict[str, str] = {}
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def _load(self):
+        if not self.metadata_path.exists():
+            return
+        try:
+            with open(self.metadata_path) as f:
+                records = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"⚠️  Could not read B-roll library metadata, starting empty: {e}")
+            return
+        for record in records:
+            entry = LibraryEntry(**record)
+            self.entries[entry.id] = entry
+            self._by_sha[entry.sha256] = entry.id
+
+    def _save(self):
+        with self._lock:
+            records = [asdict(entry) for entry in self.entries.values()]
+        tmp_path = self.library_dir / f".{uuid.uuid4().hex}.json"
+        with open(tmp_path, 'w') as f:
+            json.dump(records, f, indent=2)
+        os.replace(tmp_path, self.metadata_path)
+
+    def path_for(self, entry: LibraryEntry) -> Path:
+        return self.library_dir / entry.filename
+
+    def _prepare(self, source: Path, title: Optional[str], tags: Optional[List[str]]) -> Optional[LibraryEntry]:
+        """Hash, probe and copy one file into the library (no index update)"""
+        sha = sha256_file(str(source))
+        with self._lock:
+            existing = self._by_sha.get(sha)
+        if existing:
+            return None
+
+        stats = probe_footage(str(source))
+        if stats['duration'] <= 0 or not stats['width'] or not stats['height']:
+            raise ValueError(f"Unusable footage: {source}")
+
+        # Sidecar metadata (clip.mp4 + clip.json) fills in whatever wasn't passed
+        sidecar = source.with_suffix('.json')
+        if sidecar.exists() and (title is None or tags is None):
+            with open(sidecar) as f:
+                meta = json.load(f)
+            title = title if title is not None else meta.get('title')
+            tags = tags if tags is not None else meta.get('tags')
+
+        entry_id = f"library_{sha[:16]}"
+        filename = f"{sha[:16]}{source.suffix.lower()}"
+        destination = self.library_dir / filename
+        if not destination.exists():
+            tmp_path = self.library_dir / f".{uuid.uuid4().hex}{source.suffix.lower()}"
+            shutil.copyfile(source, tmp_path)
+            os.replace(tmp_path, destination)
+
+        return LibraryEntry(
+            id=entry_id,
+            filename=filename,
+            sha256=sha,
+            title=title or title_from_filename(source),
+            tags=[str(tag) for tag in (tags or [])],
+            duration=stats['duration'],
+            width=stats['width'],
+            height=stats['height'],
+            codec=stats['codec'],
+            size_bytes=destination.stat().st_size
+        )
+
+    def _index_entries(self, entries: List[LibraryEntry]):
+        if not entries or not self.relevance.embeddings_available:
+            return
+        try:
+            vectors = self.relevance.embed([entry.description for entry in entries])
+        except ImportError as e:
+            self.relevance.embeddings_available = False
+            print(f"⚠️  Embedding model unavailable, library will be searched lexically: {e}")
+            return
+        except Exception as e:
+            # e.g. an OSError from a model download while offline; retried on a later search
+            print(f"⚠️  Could not embed library footage, searching lexically for now: {e}")
+            return
+        self.index.add([entry.id for entry in entries], vectors)
+        self.index.save()
+
+    def import_files(self, items: Iterable[Tuple[str, Optional[str], Optional[List[str]]]],
+                     workers: int = 4) -> List[LibraryEntry]:
+        """Bulk import ``(path, title, tags)`` items.
+
+        Files are hashed, probed and copied in parallel; already-imported
+        content is skipped. All new entries are embedded in one batch and the
+        metadata is written once.
+        """
+        items = list(items)
+
+        def prepare(item):
+            path, title, tags = item
+            try:
+                return self._prepare(Path(path), title, tags)
+            except Exception as e:
+                print(f"⚠️  Skipping {path}: {e}")
+                return None
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            prepared = [entry for entry in pool.map(prepare, items) if entry is not None]
+
+        added = []
+        with self._lock:
+            for entry in prepared:
+                # The same content may appear twice in one import
+                if entry.sha256 in self._by_sha:
+                    continue
+                self.entries[entry.id] = entry
+                self._by_sha[entry.sha256] = entry.id
+                added.append(entry)
+
+        if added:
+            try:
+                self._index_entries(added)
+            finally:
+                # The files are already copied in; never leave them without metadata
+                self._save()
+        print(f"📚 Imported {len(added)} clips into the B-roll library ({len(self)} total)")
+        return added
+
+    def import_directory(self, source_dir: str, workers: int = 4) -> List[LibraryEntry]:
+        """Import every video file under ``source_dir`` (with optional .json sidecars)"""
+        paths = sorted(
+            path for path in Path(source_dir).rglob('*')
+            if path.is_file() and path.suffix.lower() in VIDEO_EXTENSIONS
+        )
+        return self.import_files(((str(path), None, None) for path in paths), workers=workers)
+
+    def to_footage(self, entry: LibraryEntry, relevance_score: float = 0.5):
+        # Imported here to avoid a circular import with the matcher
+        from src.services.broll_matching.matcher import FootageClip
+
+        uri = self.path_for(entry).resolve().as_uri()
+        return FootageClip(
+            id=entry.id,
+            url=uri,
+            download_url=uri,
+            title=entry.title,
+            duration=entry.duration,
+            resolution=entry.resolution,
+            source='library',
+            tags=list(entry.tags),
+            relevance_score=relevance_score
+        )
+
+    def search(self, query: str, k: int = 10, min_score: float = 0.0) -> List:
+        """Best ``k`` library clips for ``query`` as FootageClips, best first"""
+        if not self.entries:
+            return []
+
+        missing = [entry for entry in self.entries.values() if entry.id not in self.index]
+        if missing:
+            self._index_entries(missing)
+
+        ranked: List[Tuple[str, float]] = []
+        if self.relevance.embeddings_available and len(self.index):
+            try:
+                ranked = self.index.search(self.relevance.embed([query])[0], k=k)
+            except ImportError:
+                self.relevance.embeddings_available = False
+            except Exception as e:
+                print(f"⚠️  Library embedding search failed, searching lexically: {e}")
+
+        if not ranked:
+            ids = list(self.entries.keys())
+            scores = lexical_scores(query, [self.entries[i].description for i in ids])
+            top = np.argsort(-scores, kind='stable')[:k]
+            ranked = [(ids[i], float(scores[i])) for i in top]
+
+        return [
+            self.to_footage(self.entries[entry_id], round(float(np.clip(score, 0.0, 1.0)), 4))
+            for entry_id, score in ranked
+            if entry_id in self.entries and score >= min_score
+        ]
+
+    async def search_async(self, query: str, k: int = 10, min_score: float = 0.0) -> List:
+        return await asyncio.to_thread(self.search, query, k, min_score)
+
+
+_library: Optional[FootageLibrary] = None
+
+
+def get_footage_library() -> FootageLibrary:
+    """Return the process-wide footage library"""
+    global _library
+    if _library is None:
+        _library = FootageLibrary()
+    return _library
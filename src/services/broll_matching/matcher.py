@@ -3,12 +3,21 @@ B-Roll matching service - finds relevant stock footage
 """
 import asyncio
 import aiohttp
+import functools
 import json
 import os
 from typing import List, Dict, Optional
 from dataclasses import dataclass
 from dotenv import load_dotenv
 
+from src.utils.http import LoopBoundSession
+from src.utils.rate_limit import TokenBucket
+from src.services.broll_matching.search_cache import (
+    SearchResultCache, get_search_cache, search_cache_key
+)
+from src.services.broll_matching.relevance import RelevanceEngine, get_relevance_engine
+from src.services.broll_matching.library import FootageLibrary, get_footage_library
+
 load_dotenv()
 
 @dataclass
@@ -23,39 +32,60 @@ class FootageClip:
     tags: List[str]
     relevance_score: float
 
-class BRollMatcher:
-    def __init__(self):
-        self.pexels_api_key = os.getenv('PEXELS_API_KEY')
-        self.pixabay_api_key = os.getenv('PIXABAY_API_KEY')
+class PexelsClient:
+    """Pexels video search with one rate limiter and one pooled session.
+
+    The hourly quota belongs to the API key, not to a pipeline run, so every
+    matcher in the process shares this client through ``get_pexels_client()``.
+    """
+
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None):
+        self.api_key = api_key or os.getenv('PEXELS_API_KEY')
+        self.base_url = (base_url or os.getenv('PEXELS_BASE_URL', 'https://api.pexels.com')).rstrip('/')
         
-        if not self.pexels_api_key:
-            print("⚠️  Pexels API key not found")
+        # Pexels allows 200 requests/hour by default; burst a little, then pace
+        pexels_per_hour = float(os.getenv('PEXELS_REQUESTS_PER_HOUR', '200'))
+        self.rate_limiter = TokenBucket(
+            rate=pexels_per_hour / 3600.0,
+            capacity=float(os.getenv('PEXELS_BURST', '20'))
+        )
+        self._session = LoopBoundSession(lambda: aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=20,
+                limit_per_host=10,
+                ttl_dns_cache=300,
+                keepalive_timeout=60
+            ),
+            timeout=aiohttp.ClientTimeout(total=15, connect=5)
+        ))
 
-    async def search_pexels(self, query: str, per_page: int = 10) -> List[FootageClip]:
-        """Search Pexels for video footage"""
-        if not self.pexels_api_key:
-            return []
-            
-        url = "https://api.pexels.com/videos/search"
-        headers = {"Authorization": self.pexels_api_key}
+    async def close(self):
+        """Close the pooled HTTP session (on app shutdown)"""
+        await self._session.close()
+
+    async def search(self, query: str, per_page: int, orientation: str) -> List[FootageClip]:
+        """Query the Pexels API; raises on failure so errors are never cached"""
+        url = f"{self.base_url}/videos/search"
+        headers = {"Authorization": self.api_key}
         params = {
             "query": query,
             "per_page": per_page,
-            "orientation": "all"
+            "orientation": orientation
         }
         
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, headers=headers, params=params) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return self._parse_pexels_response(data.get('videos', []))
-        except Exception as e:
-            print(f"Pexels API error for '{query}': {e}")
-        
-        return []
+        session = await self._session.get()
+        await self.rate_limiter.acquire()
+        async with session.get(url, headers=headers, params=params) as response:
+            if response.status == 200:
+                data = await response.json()
+                return self._parse_response(data.get('videos', []))
+            if response.status == 429:
+                retry_after = float(response.headers.get('Retry-After', 60))
+                self.rate_limiter.pause(retry_after)
+                print(f"⚠️  Pexels rate limit hit, pausing searches for {retry_after:.0f}s")
+            raise RuntimeError(f"HTTP {response.status}")
 
-    def _parse_pexels_response(self, videos: List[Dict]) -> List[FootageClip]:
+    def _parse_response(self, videos: List[Dict]) -> List[FootageClip]:
         """Parse Pexels API response"""
         clips = []
         for video in videos:
@@ -74,8 +104,8 @@ class BRollMatcher:
                     duration=video.get('duration', 10.0),
                     resolution=f"{best_file.get('width')}x{best_file.get('height')}",
                     source='pexels',
-                    tags=[],  # Pexels doesn't provide tags
-                    relevance_score=0.5  # Default score
+                    tags=[tag for tag in video.get('tags', []) if isinstance(tag, str)],
+                    relevance_score=0.5  # Replaced by the relevance engine
                 )
                 clips.append(clip)
             except Exception as e:
@@ -83,20 +113,80 @@ class BRollMatcher:
                 
         return clips
 
-    async def find_broll_for_keywords(self, keywords: List[str]) -> List[FootageClip]:
-        """Find B-roll footage for given keywords"""
+
+_pexels_client: Optional[PexelsClient] = None
+
+
+def get_pexels_client() -> PexelsClient:
+    """Return the process-wide Pexels client so all runs share its quota"""
+    global _pexels_client
+    if _pexels_client is None:
+        _pexels_client = PexelsClient()
+    return _pexels_client
+
+
+class BRollMatcher:
+    def __init__(self, pexels: Optional[PexelsClient] = None,
+                 search_cache: Optional[SearchResultCache] = None,
+                 relevance: Optional[RelevanceEngine] = None,
+                 library: Optional[FootageLibrary] = None):
+        self.pexels = pexels or get_pexels_client()
+        self.pixabay_api_key = os.getenv('PIXABAY_API_KEY')
+        
+        if not self.pexels.api_key:
+            print("⚠️  Pexels API key not found")
+        
+        self.search_cache = search_cache or get_search_cache()
+        self.relevance = relevance or get_relevance_engine()
+        
+        # The local library is searched first; remote providers only fill gaps
+        self.library = library or get_footage_library()
+        self.library_min_score = float(os.getenv('BROLL_LIBRARY_MIN_SCORE', '0.35'))
+        self.library_min_hits = int(os.getenv('BROLL_LIBRARY_MIN_HITS', '3'))
+
+    async def search_pexels(self, query: str, per_page: int = 10,
+                            orientation: str = "all") -> List[FootageClip]:
+        """Search Pexels for video footage (served from the search cache when possible)"""
+        if not self.pexels.api_key:
+            return []
+        
+        key = search_cache_key('pexels', query, per_page, orientation)
+        try:
+            # Bound to the shared client, so a background refresh outlives this matcher
+            return await self.search_cache.get_or_fetch(
+                key,
+                functools.partial(self.pexels.search, query, per_page, orientation),
+                FootageClip
+            )
+        except Exception as e:
+            print(f"Pexels API error for '{query}': {e}")
+        
+        return []
+
+    async def find_broll_for_keywords(self, keywords: List[str],
+                                      context: Optional[str] = None) -> List[FootageClip]:
+        """Find B-roll footage for given keywords, ranked against the keywords
+        and, when given, the clip transcript in ``context``"""
         print(f"🎬 Searching for B-roll: {keywords}")
         
-        all_footage = []
+        query = ' '.join(keywords)
+        if context:
+            query = f"{context}\n{query}"
+        
+        # Local library first: enough good matches means no network at all
+        library_footage = await self.library.search_async(query, k=10, min_score=self.library_min_score)
+        if len(library_footage) >= self.library_min_hits:
+            print(f"📚 Found {len(library_footage)} B-roll clips in the local library")
+            return library_footage
         
-        # Search for each keyword
-        for keyword in keywords[:3]:  # Limit to avoid API limits
-            footage = await self.search_pexels(keyword)
-            all_footage.extend(footage)
+        # Search every keyword concurrently; the rate limiter paces requests
+        results = await asyncio.gather(*(self.search_pexels(keyword) for keyword in keywords))
+        all_footage = [clip for footage in results for clip in footage]
         
         # Remove duplicates and sort by relevance
         unique_footage = {clip.id: clip for clip in all_footage}
-        sorted_footage = sorted(unique_footage.values(), key=lambda x: x.relevance_score, reverse=True)
+        remote_footage = await self.relevance.rank_async(query, list(unique_footage.values()))
+        sorted_footage = sorted(library_footage + remote_footage, key=lambda x: x.relevance_score, reverse=True)
         
         print(f"✅ Found {len(sorted_footage)} B-roll clips")
         return sorted_footage[:10]  # Return top 10
@@ -106,6 +196,7 @@ async def test_broll_matcher():
     matcher = BRollMatcher()
     keywords = ["neuroscience", "brain", "meditation"]
     footage = await matcher.find_broll_for_keywords(keywords)
+    await get_pexels_client().close()
     
     print(f"Found {len(footage)} clips:")
     for clip in footage[:3]:
@@ -0,0 +1,239 @@
+"""
+B-roll relevance engine - ranks footage against a clip by embedding similarity
+"""
+import asyncio
+import math
+import os
+import re
+import threading
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlparse
+
+import numpy as np
+from dotenv import load_dotenv
+
+from src.core.model_registry import ModelRegistry, get_model_registry, embedding_model_name
+from src.services.clip_detection.keywords import STOPWORDS, TOKEN_PATTERN
+
+load_dotenv()
+
+GENERIC_TITLE = re.compile(r'^\w+ video \d+$', re.IGNORECASE)
+
+
+def footage_text(clip) -> str:
+    """Describe a footage clip from its title, tags and URL slug"""
+    parts = []
+    if clip.title and not GENERIC_TITLE.match(clip.title):
+        parts.append(clip.title)
+    if clip.tags:
+        parts.append(', '.join(clip.tags))
+
+    # Stock sites put the description in the slug: /video/woman-meditating-on-a-beach-3327/
+    slug = os.path.splitext(urlparse(clip.url or '').path.rstrip('/').rsplit('/', 1)[-1])[0]
+    slug = re.sub(r'-?\d+$', '', slug).replace('-', ' ').replace('_', ' ').strip()
+    if slug and not slug.isdigit():
+        parts.append(slug)
+
+    return '. '.join(parts)
+
+
+def _content_words(text: str) -> set:
+    return {
+        word for word in TOKEN_PATTERN.findall(text.lower())
+        if word not in STOPWORDS and len(word) >= 3
+    }
+
+
+def lexical_scores(query: str, texts: Sequence[str]) -> np.ndarray:
+    """Cosine similarity between content-word sets, used when embeddings are unavailable"""
+    query_words = _content_words(query)
+    scores = np.zeros(len(texts))
+    if not query_words:
+        return scores
+    for i, text in enumerate(texts):
+        words = _content_words(text)
+        if words:
+            scores[i] = len(query_words & words) / math.sqrt(len(query_words) * len(words))
+    return scores
+
+
+class VectorIndex:
+    """Unit-normalized vectors keyed by id, searched with one matrix product.
+
+    The index is persisted as an ``.npz`` file so vectors computed once are
+    reused by later runs and other workers.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path else None
+        self.ids: List[str] = []
+        self._positions: Dict[str, int] = {}
+        self._vectors = np.zeros((0, 0), dtype=np.float32)
+        self._lock = threading.Lock()
+
+        if self.path is not None and self.path.exists():
+            self._load()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self._positions
+
+    def _load(self):
+        try:
+            with np.load(self.path) as data:
+                ids = [str(item_id) for item_id in data['ids']]
+                vectors = data['vectors'].astype(np.float32)
+        except Exception as e:
+            print(f"⚠️  Could not load vector index {self.path}, starting empty: {e}")
+            return
+        self.ids = ids
+        self._positions = {item_id: i for i, item_id in enumerate(ids)}
+        self._vectors = vectors
+
+    def add(self, ids: Sequence[str], vectors: np.ndarray):
+        """Insert or replace vectors; they are normalized on the way in"""
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(len(ids), -1)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.maximum(norms, 1e-12)
+
+        with self._lock:
+            if len(self.ids) and self._vectors.shape[1] != vectors.shape[1]:
+                raise ValueError(
+                    f"Vector dimension {vectors.shape[1]} does not match index ({self._vectors.shape[1]})"
+                )
+
+            new_ids, new_rows = [], []
+            for item_id, vector in zip(ids, vectors):
+                position = self._positions.get(item_id)
+                if position is not None:
+                    self._vectors[position] = vector
+                elif item_id not in new_ids:
+                    new_ids.append(item_id)
+                    new_rows.append(vector)
+
+            if new_rows:
+                start = len(self.ids)
+                rows = np.stack(new_rows)
+                self._vectors = np.vstack([self._vectors, rows]) if start else rows
+                self.ids.extend(new_ids)
+                for offset, item_id in enumerate(new_ids):
+                    self._positions[item_id] = start + offset
+
+    def vectors_for(self, ids: Sequence[str]) -> np.ndarray:
+        with self._lock:
+            return self._vectors[[self._positions[item_id] for item_id in ids]]
+
+    def search(self, query: np.ndarray, k: int = 10,
+               ids: Optional[Sequence[str]] = None) -> List[Tuple[str, float]]:
+        """Top ``k`` ``(id, cosine)`` pairs, optionally restricted to ``ids``"""
+        query = np.asarray(query, dtype=np.float32).ravel()
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+
+        with self._lock:
+            if ids is None:
+                candidate_ids, matrix = self.ids, self._vectors
+            else:
+                candidate_ids = [item_id for item_id in ids if item_id in self._positions]
+                matrix = self._vectors[[self._positions[item_id] for item_id in candidate_ids]]
+            if not candidate_ids:
+                return []
+            scores = matrix @ query
+
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [(candidate_ids[i], float(scores[i])) for i in top]
+
+    def save(self):
+        """Atomically write the index to disk"""
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            ids = np.array(self.ids, dtype=str)
+            vectors = self._vectors.copy()
+        tmp_path = self.path.parent / f".{uuid.uuid4().hex}.npz"
+        np.savez(tmp_path, ids=ids, vectors=vectors)
+        os.replace(tmp_path, self.path)
+
+
+class RelevanceEngine:
+    """Scores footage against a clip's transcript and keywords.
+
+    Footage descriptions are embedded in batches with the shared
+    sentence-transformer and kept in a persistent :class:`VectorIndex`, so a
+    clip seen in an earlier search is never embedded again. Ranking a set of
+    footage is then a single matrix-vector product. Without an embedding
+    model the engine falls back to lexical overlap.
+    """
+
+    def __init__(self, registry: Optional[ModelRegistry] = None, index_path: Optional[str] = None,
+                 embedding_model: Optional[str] = None):
+        self.registry = registry or get_model_registry()
+        self.embedding_model_name = embedding_model_name(embedding_model)
+
+        if index_path is None:
+            index_dir = Path(os.getenv('BROLL_INDEX_DIR', 'data/cache/broll_index'))
+            safe_name = re.sub(r'[^A-Za-z0-9_.-]+', '_', self.embedding_model_name)
+            index_path = index_dir / f"footage_{safe_name}.npz"
+        self.index = VectorIndex(index_path)
+        self.embeddings_available = True
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        with self.registry.borrow(self.embedding_model_name) as model:
+            vectors = model.encode(texts, batch_size=64, normalize_embeddings=True)
+        return np.asarray(vectors, dtype=np.float32)
+
+    def index_footage(self, clips: Sequence) -> int:
+        """Embed and persist any clips not yet in the index; returns how many were added"""
+        missing = {}
+        for clip in clips:
+            if clip.id not in self.index and clip.id not in missing:
+                missing[clip.id] = footage_text(clip) or clip.id
+        if not missing:
+            return 0
+
+        self.index.add(list(missing.keys()), self.embed(list(missing.values())))
+        self.index.save()
+        return len(missing)
+
+    def score(self, query: str, clips: Sequence) -> np.ndarray:
+        """0-1 relevance of each clip to ``query``"""
+        if self.embeddings_available:
+            try:
+                self.index_footage(clips)
+                query_vector = self.embed([query])[0]
+                return np.clip(self.index.vectors_for([clip.id for clip in clips]) @ query_vector, 0.0, 1.0)
+            except ImportError as e:
+                self.embeddings_available = False
+                print(f"⚠️  Embedding model unavailable, ranking B-roll lexically: {e}")
+            except Exception as e:
+                print(f"⚠️  Embedding ranking failed, ranking B-roll lexically: {e}")
+
+        return lexical_scores(query, [footage_text(clip) for clip in clips])
+
+    def rank(self, query: str, clips: List) -> List:
+        """Set ``relevance_score`` on each clip and return them best first"""
+        if not clips:
+            return []
+        for clip, score in zip(clips, self.score(query, clips)):
+            clip.relevance_score = round(float(score), 4)
+        return sorted(clips, key=lambda clip: clip.relevance_score, reverse=True)
+
+    async def rank_async(self, query: str, clips: List) -> List:
+        return await asyncio.to_thread(self.rank, query, clips)
+
+
+_engine: Optional[RelevanceEngine] = None
+
+
+def get_relevance_engine() -> RelevanceEngine:
+    """Return the process-wide relevance engine"""
+    global _engine
+    if _engine is None:
+        _engine = RelevanceEngine()
+    return _engine
@@ -0,0 +1,270 @@
+"""
+B-roll search cache - two-tier TTL/LRU cache for parsed provider search results
+"""
+import asyncio
+import json
+import os
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, replace
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class SearchAborted(Exception):
+    """Handed to coalesced waiters when the caller that owned a fetch was cancelled"""
+
+
+@dataclass
+class CachedSearch:
+    clips: list          # List[FootageClip]
+    stored_at: float     # wall clock, so entries can be shared across processes
+
+
+class SharedCacheBackend(ABC):
+    """Interface for the shared tier that lets API workers see each other's hits"""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: str, ttl_seconds: int):
+        ...
+
+    async def close(self):
+        pass
+
+
+class InMemorySharedCache(SharedCacheBackend):
+    """Process-local stand-in for Redis, for tests and single-worker setups"""
+
+    def __init__(self):
+        self._values: Dict[str, Tuple[float, str]] = {}
+
+    async def get(self, key: str) -> Optional[str]:
+        entry = self._values.get(key)
+        if entry is None or entry[0] < time.time():
+            self._values.pop(key, None)
+            return None
+        return entry[1]
+
+    async def set(self, key: str, value: str, ttl_seconds: int):
+        self._values[key] = (time.time() + ttl_seconds, value)
+
+
+class RedisSharedCache(SharedCacheBackend):
+    """Redis shared tier; one client per event loop.
+
+    ``redis.asyncio`` connections belong to the loop that opened them, and job
+    workers start a new loop per ``asyncio.run``, so the client is rebuilt
+    (and the old one closed) whenever the running loop changes.
+    """
+
+    def __init__(self, url: Optional[str] = None, prefix: str = "broll:search:",
+                 client_factory: Optional[Callable[[], object]] = None):
+        self.url = url or os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+        self.prefix = prefix
+        self.client_factory = client_factory or self._connect
+        self._client = None
+        self._client_loop = None
+
+    def _connect(self):
+        import redis.asyncio as redis
+        return redis.Redis.from_url(self.url)
+
+    async def _get_client(self):
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            await self.close()
+            self._client = self.client_factory()
+            self._client_loop = loop
+        return self._client
+
+    async def get(self, key: str) -> Optional[str]:
+        client = await self._get_client()
+        value = await client.get(self.prefix + key)
+        return value.decode('utf-8') if value is not None else None
+
+    async def set(self, key: str, value: str, ttl_seconds: int):
+        client = await self._get_client()
+        await client.set(self.prefix + key, value, ex=ttl_seconds)
+
+    async def close(self):
+        client, self._client = self._client, None
+        if client is None:
+            return
+        try:
+            await client.close()
+        except Exception as e:
+            print(f"⚠️  Could not close Redis client from a finished event loop: {e!r}")
+
+
+def search_cache_key(provider: str, query: str, per_page: int, orientation: str) -> str:
+    normalized = ' '.join(query.lower().split())
+    return f"{provider}|{normalized}|{per_page}|{orientation}"
+
+
+class SearchResultCache:
+    """Caches parsed search results with TTL, LRU bounds and stale-while-revalidate.
+
+    An entry is fresh for ``ttl`` seconds. For a further ``stale_ttl`` seconds
+    it is still served immediately while one background refresh replaces it.
+    The in-process tier is an LRU of ``max_entries``; the optional shared tier
+    (Redis in production) is consulted on local misses and written on fetch.
+    Concurrent misses for the same key share a single fetch.
+    """
+
+    def __init__(self, ttl: Optional[float] = None, stale_ttl: Optional[float] = None,
+                 max_entries: Optional[int] = None, shared: Optional[SharedCacheBackend] = None):
+        self.ttl = ttl if ttl is not None else float(os.getenv('BROLL_CACHE_TTL', '86400'))
+        self.stale_ttl = stale_ttl if stale_ttl is not None else float(os.getenv('BROLL_CACHE_STALE_TTL', '604800'))
+        self.max_entries = max_entries or int(os.getenv('BROLL_CACHE_MAX_ENTRIES', '5000'))
+        self.shared = shared
+
+        self._local: "OrderedDict[str, CachedSearch]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        self.stats = {"hits": 0, "stale_hits": 0, "shared_hits": 0, "misses": 0, "refreshes": 0,
+                      "shared_errors": 0}
+        self._closed = False
+
+    def _store_local(self, key: str, entry: CachedSearch):
+        self._local[key] = entry
+        self._local.move_to_end(key)
+        while len(self._local) > self.max_entries:
+            self._local.popitem(last=False)
+
+    async def _lookup(self, key: str, clip_type) -> Optional[CachedSearch]:
+        entry = self._local.get(key)
+        if entry is not None:
+            self._local.move_to_end(key)
+            return entry
+
+        if self.shared is None:
+            return None
+        try:
+            raw = await self.shared.get(key)
+        except Exception as e:
+            self.stats["shared_errors"] += 1
+            print(f"⚠️  Shared B-roll cache read failed for '{key}': {e!r}")
+            return None
+        if raw is None:
+            return None
+
+        data = json.loads(raw)
+        entry = CachedSearch(
+            clips=[clip_type(**clip) for clip in data['clips']],
+            stored_at=data['stored_at']
+        )
+        self._store_local(key, entry)
+        self.stats["shared_hits"] += 1
+        return entry
+
+    async def _store(self, key: str, clips: list):
+        entry = CachedSearch(clips=list(clips), stored_at=time.time())
+        self._store_local(key, entry)
+        if self.shared is not None:
+            payload = json.dumps({
+                'stored_at': entry.stored_at,
+                'clips': [asdict(clip) for clip in clips]
+            })
+            try:
+                await self.shared.set(key, payload, int(self.ttl + self.stale_ttl))
+            except Exception as e:
+                self.stats["shared_errors"] += 1
+                print(f"⚠️  Shared B-roll cache write failed for '{key}': {e!r}")
+
+    async def _fetch_once(self, key: str, fetch: Callable[[], Awaitable[list]]) -> list:
+        """Run ``fetch`` for ``key`` unless another caller already is"""
+        while key in self._inflight:
+            try:
+                # Shielded: a cancelled waiter must not cancel the owner's fetch
+                return await asyncio.shield(self._inflight[key])
+            except SearchAborted:
+                # The owner was cancelled, not us: fetch it ourselves
+                continue
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            clips = await fetch()
+            await self._store(key, clips)
+            if not future.done():
+                future.set_result(clips)
+            return clips
+        except BaseException as e:
+            if not future.done():
+                if isinstance(e, asyncio.CancelledError):
+                    e = SearchAborted(f"Search '{key}' was cancelled by its owner")
+                future.set_exception(e)
+                # Nobody else may be awaiting; don't warn about an unretrieved exception
+                future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    def _refresh_in_background(self, key: str, fetch: Callable[[], Awaitable[list]]):
+        # After close() the fetchers' sessions may be gone; serve stale results only
+        if self._closed or key in self._refreshing:
+            return
+
+        async def refresh():
+            try:
+                await self._fetch_once(key, fetch)
+                self.stats["refreshes"] += 1
+            except Exception as e:
+                print(f"⚠️  Background B-roll refresh failed, keeping stale results: {e}")
+            finally:
+                self._refreshing.pop(key, None)
+
+        self._refreshing[key] = asyncio.create_task(refresh())
+
+    async def get_or_fetch(self, key: str, fetch: Callable[[], Awaitable[list]], clip_type) -> list:
+        """Cached clips for ``key``, fetching (at most once concurrently) on a miss"""
+        entry = await self._lookup(key, clip_type)
+        if entry is not None:
+            age = time.time() - entry.stored_at
+            if age <= self.ttl:
+                self.stats["hits"] += 1
+                return [replace(clip) for clip in entry.clips]
+            if age <= self.ttl + self.stale_ttl:
+                self.stats["stale_hits"] += 1
+                self._refresh_in_background(key, fetch)
+                return [replace(clip) for clip in entry.clips]
+
+        self.stats["misses"] += 1
+        clips = await self._fetch_once(key, fetch)
+        return [replace(clip) for clip in clips]
+
+    async def close(self):
+        self._closed = True
+        for task in list(self._refreshing.values()):
+            task.cancel()
+        if self.shared is not None:
+            await self.shared.close()
+
+
+def create_shared_backend() -> Optional[SharedCacheBackend]:
+    """Shared tier from BROLL_SHARED_CACHE (redis | memory | none)"""
+    kind = os.getenv('BROLL_SHARED_CACHE', 'none').lower()
+    if kind == 'redis':
+        return RedisSharedCache()
+    if kind == 'memory':
+        return InMemorySharedCache()
+    return None
+
+
+_cache: Optional[SearchResultCache] = None
+
+
+def get_search_cache() -> SearchResultCache:
+    """Return the process-wide search cache so every matcher shares hits"""
+    global _cache
+    if _cache is None:
+        _cache = SearchResultCache(shared=create_shared_backend())
+    return _cache
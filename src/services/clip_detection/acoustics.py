@@ -0,0 +1,291 @@
+"""
+Acoustic feature engine - per-episode energy, pitch, pace, silence and laughter
+"""
+import os
+import subprocess
+import tempfile
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+from dotenv import load_dotenv
+
+from src.utils.hashing import sha256_file
+
+try:
+    import librosa
+except ImportError:
+    librosa = None
+
+load_dotenv()
+
+SAMPLE_RATE = 16000
+FRAME_LENGTH = 400          # 25 ms analysis frames
+HOP_LENGTH = 160            # 10 ms hop
+FRAMES_PER_CELL = 10        # features are stored per 100 ms cell
+CELL_SECONDS = HOP_LENGTH * FRAMES_PER_CELL / SAMPLE_RATE
+PITCH_FRAME_LENGTH = 1024
+PITCHES_PER_CELL = 2        # pitch is tracked every 50 ms; finer adds cost, not signal
+PITCH_HOP_LENGTH = HOP_LENGTH * FRAMES_PER_CELL // PITCHES_PER_CELL
+PITCH_FMIN = 65.0
+PITCH_FMAX = 400.0
+SILENCE_DB = -40.0
+
+# Cumulative per-cell arrays kept for window queries
+FEATURES = (
+    'frames', 'rms_sum', 'voiced', 'pitch_sum', 'pitch_sq_sum',
+    'onsets', 'silent', 'laughter'
+)
+
+
+@dataclass
+class AcousticProfile:
+    """Prefix sums of per-cell acoustic features for one episode.
+
+    ``cumulative[name][i]`` holds the total of feature ``name`` over the first
+    ``i`` cells, so statistics for any time window are a couple of lookups.
+    """
+    cumulative: Dict[str, np.ndarray]
+    duration: float
+
+    @property
+    def n_cells(self) -> int:
+        return len(self.cumulative['frames']) - 1
+
+    def _range(self, name: str, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        values = self.cumulative[name]
+        return values[b] - values[a]
+
+    def _cells(self, start_times, end_times):
+        a = np.clip(np.floor(np.asarray(start_times) / CELL_SECONDS).astype(np.int64), 0, self.n_cells)
+        b = np.clip(np.ceil(np.asarray(end_times) / CELL_SECONDS).astype(np.int64), 0, self.n_cells)
+        return a, np.maximum(a, b)
+
+    def window_stats(self, start_times, end_times) -> Dict[str, np.ndarray]:
+        """Raw acoustic statistics for each ``[start, end]`` window, O(1) each"""
+        a, b = self._cells(start_times, end_times)
+        frames = np.maximum(self._range('frames', a, b), 1.0)
+        voiced = self._range('voiced', a, b)
+        safe_voiced = np.maximum(voiced, 1.0)
+
+        pitch_mean = self._range('pitch_sum', a, b) / safe_voiced
+        pitch_var = np.maximum(self._range('pitch_sq_sum', a, b) / safe_voiced - pitch_mean ** 2, 0.0)
+        seconds = np.maximum((b - a) * CELL_SECONDS, CELL_SECONDS)
+
+        return {
+            'rms_mean': self._range('rms_sum', a, b) / frames,
+            'pitch_std': np.where(voiced > 1, np.sqrt(pitch_var), 0.0),
+            'speech_rate': self._range('onsets', a, b) / seconds,
+            'silence_ratio': self._range('silent', a, b) / frames,
+            'laughter_ratio': self._range('laughter', a, b) / frames
+        }
+
+    def window_scores(self, start_times, end_times) -> Dict[str, np.ndarray]:
+        """0-1 scores for each window, relative to the episode as a whole.
+
+        A window exactly as energetic, varied and fast as the episode average
+        scores 0.5 on each axis.
+        """
+        window = self.window_stats(start_times, end_times)
+        episode = self.window_stats(np.array([0.0]), np.array([self.duration]))
+
+        def relative(name):
+            baseline = float(episode[name][0])
+            if baseline <= 0:
+                return np.full(len(window[name]), 0.5)
+            return np.clip(window[name] / (2.0 * baseline), 0.0, 1.0)
+
+        speaker_energy = relative('rms_mean')
+        vocal_variety = relative('pitch_std')
+        pace = relative('speech_rate')
+
+        arousal = (speaker_energy + vocal_variety + pace) / 3.0
+        intensity = np.clip(
+            arousal * (1.0 - window['silence_ratio']) + 0.5 * window['laughter_ratio'], 0.0, 1.0
+        )
+
+        return {
+            'speaker_energy': speaker_energy,
+            'acoustic_intensity': intensity
+        }
+
+
+def _frame(signal: np.ndarray, frame_length: int, hop_length: int) -> np.ndarray:
+    n_frames = 1 + (len(signal) - frame_length) // hop_length
+    if n_frames <= 0:
+        return np.empty((0, frame_length), dtype=signal.dtype)
+    return np.lib.stride_tricks.as_strided(
+        signal,
+        shape=(n_frames, frame_length),
+        strides=(signal.strides[0] * hop_length, signal.strides[0])
+    )
+
+
+class AcousticAnalyzer:
+    """Computes an :class:`AcousticProfile` by streaming decoded audio in blocks.
+
+    Audio is decoded by ffmpeg to 16 kHz mono and processed ``block_seconds``
+    at a time, so memory stays bounded no matter how long the episode is.
+    Profiles are cached on disk by audio content hash.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, block_seconds: float = 60.0):
+        if librosa is None:
+            raise ImportError("librosa is required for acoustic analysis")
+
+        self.cache_dir = Path(cache_dir or os.getenv('ACOUSTIC_CACHE_DIR', 'data/cache/acoustics'))
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        # Whole number of cells per block so cell boundaries never straddle blocks
+        cell_samples = HOP_LENGTH * FRAMES_PER_CELL
+        self.block_samples = max(1, int(block_seconds * SAMPLE_RATE) // cell_samples) * cell_samples
+
+    def analyze(self, audio_path: str) -> AcousticProfile:
+        cache_path = self.cache_dir / f"{sha256_file(audio_path)}.npz"
+        if cache_path.exists():
+            with np.load(cache_path) as data:
+                return AcousticProfile(
+                    cumulative={name: data[name] for name in FEATURES},
+                    duration=float(data['duration'])
+                )
+
+        print("🔊 Analyzing speaker energy...")
+        per_cell = {name: [] for name in FEATURES}
+        total_samples = 0
+        for block in self._stream_blocks(audio_path):
+            features = self._block_features(block)
+            for name in FEATURES:
+                per_cell[name].append(features[name])
+            total_samples += block[1]
+        if total_samples == 0:
+            raise RuntimeError(f"No audio decoded from {audio_path}")
+
+        cumulative = {}
+        for name in FEATURES:
+            values = np.concatenate(per_cell[name]) if per_cell[name] else np.zeros(0)
+            prefix = np.zeros(len(values) + 1, dtype=np.float64)
+            np.cumsum(values, out=prefix[1:])
+            cumulative[name] = prefix
+
+        profile = AcousticProfile(cumulative=cumulative, duration=total_samples / SAMPLE_RATE)
+
+        tmp_path = self.cache_dir / f".{uuid.uuid4().hex}.npz"
+        np.savez_compressed(tmp_path, duration=profile.duration, **cumulative)
+        os.replace(tmp_path, cache_path)
+        return profile
+
+    def _stream_blocks(self, audio_path: str):
+        """Yield ``(samples, body_length)`` blocks of 16 kHz mono float32 audio.
+
+        Each block carries a short lookahead from the next one so frames that
+        start near the end of the block are computed on real samples.
+        """
+        cmd = [
+            'ffmpeg', '-nostdin', '-v', 'error',
+            '-i', audio_path,
+            '-f', 'f32le', '-ac', '1', '-ar', str(SAMPLE_RATE),
+            '-'
+        ]
+        # stderr goes to a file: a pipe nobody reads could fill up and stall ffmpeg
+        stderr = tempfile.TemporaryFile()
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=stderr)
+        block_bytes = self.block_samples * 4
+
+        def read_block():
+            raw = b''
+            while len(raw) < block_bytes:
+                chunk = process.stdout.read(block_bytes - len(raw))
+                if not chunk:
+                    break
+                raw += chunk
+            return np.frombuffer(raw[:len(raw) - len(raw) % 4], dtype=np.float32)
+
+        try:
+            current = read_block()
+            while len(current):
+                upcoming = read_block()
+                yield np.concatenate([current, upcoming[:PITCH_FRAME_LENGTH]]), len(current)
+                current = upcoming
+            # A failed decode must not be cached as a short (or empty) profile
+            if process.wait() != 0:
+                stderr.seek(0)
+                raise RuntimeError(
+                    f"ffmpeg could not decode {audio_path}: {stderr.read().decode(errors='replace').strip()}"
+                )
+        finally:
+            process.stdout.close()
+            process.wait()
+            stderr.close()
+
+    def _block_features(self, block) -> Dict[str, np.ndarray]:
+        """Per-cell feature sums for one block"""
+        signal, body = block
+        n_cells = int(np.ceil(body / (HOP_LENGTH * FRAMES_PER_CELL)))
+        if n_cells == 0:
+            return {name: np.zeros(0) for name in FEATURES}
+
+        # Zero-pad to whole cells plus one pitch frame, so every frame and pitch
+        # window of the last (possibly partial) cell is complete
+        padded_length = max(len(signal), n_cells * HOP_LENGTH * FRAMES_PER_CELL + PITCH_FRAME_LENGTH)
+        body_signal = np.zeros(padded_length, dtype=np.float32)
+        body_signal[:len(signal)] = signal
+        n_frames = n_cells * FRAMES_PER_CELL
+
+        frames = _frame(body_signal, FRAME_LENGTH, HOP_LENGTH)[:n_frames]
+        valid = (np.arange(n_frames) * HOP_LENGTH) < body
+        rms = np.sqrt(np.mean(frames.astype(np.float64) ** 2, axis=1))
+        rms_db = 20.0 * np.log10(np.maximum(rms, 1e-10))
+        silent = rms_db < SILENCE_DB
+
+        signs = np.signbit(frames)
+        zcr = np.mean(signs[:, 1:] != signs[:, :-1], axis=1)
+
+        n_pitches = n_cells * PITCHES_PER_CELL
+        pitch = librosa.yin(
+            body_signal[:(n_pitches - 1) * PITCH_HOP_LENGTH + PITCH_FRAME_LENGTH],
+            fmin=PITCH_FMIN, fmax=PITCH_FMAX, sr=SAMPLE_RATE,
+            frame_length=PITCH_FRAME_LENGTH, hop_length=PITCH_HOP_LENGTH, center=False
+        )[:n_pitches]
+        # Spread each pitch estimate over the energy frames it covers
+        pitch = np.repeat(pitch, FRAMES_PER_CELL // PITCHES_PER_CELL)
+        voiced = (~silent) & (pitch > PITCH_FMIN * 1.05) & (pitch < PITCH_FMAX * 0.95)
+
+        # Syllable-like onsets as a speech-rate proxy
+        onset_frames = librosa.onset.onset_detect(
+            y=body_signal[:n_frames * HOP_LENGTH], sr=SAMPLE_RATE,
+            hop_length=HOP_LENGTH, units='frames'
+        )
+        onsets = np.bincount(onset_frames[onset_frames < n_frames], minlength=n_frames)
+
+        # Laughter heuristic: loud, noisy (high zero-crossing) and unvoiced
+        loud = rms_db > (np.median(rms_db[~silent]) if (~silent).any() else 0.0)
+        laughter = loud & (~voiced) & (zcr > 0.15)
+
+        def per_cell(values):
+            values = np.where(valid, values, 0).astype(np.float64)
+            return values.reshape(n_cells, FRAMES_PER_CELL).sum(axis=1)
+
+        voiced_pitch = np.where(voiced, pitch, 0.0)
+        return {
+            'frames': per_cell(np.ones(n_frames)),
+            'rms_sum': per_cell(rms),
+            'voiced': per_cell(voiced),
+            'pitch_sum': per_cell(voiced_pitch),
+            'pitch_sq_sum': per_cell(voiced_pitch ** 2),
+            'onsets': per_cell(onsets),
+            'silent': per_cell(silent),
+            'laughter': per_cell(laughter)
+        }
+
+
+_analyzer: Optional[AcousticAnalyzer] = None
+
+
+def get_acoustic_analyzer() -> AcousticAnalyzer:
+    """Return the process-wide acoustic analyzer"""
+    global _analyzer
+    if _analyzer is None:
+        _analyzer = AcousticAnalyzer()
+    return _analyzer
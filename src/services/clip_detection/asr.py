@@ -0,0 +1,144 @@
+"""
+Speech recognition backends - one transcript structure for every engine
+
+Every backend returns a Whisper-style result dict, which is what the
+transcript cache stores and the clip scoring reads::
+
+    {
+        "text": str,
+        "language": str | None,
+        "segments": [
+            {"id": int, "start": float, "end": float, "text": str,
+             "avg_logprob": float, "no_speech_prob": float,
+             "words": [{"start": float, "end": float, "word": str, "probability": float}]}
+        ]
+    }
+
+Times are in seconds from the start of the audio that was passed in.
+"""
+import os
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def _word(start: float, end: float, word: str, probability: float) -> Dict:
+    return {"start": float(start), "end": float(end), "word": word, "probability": float(probability)}
+
+
+class ASRBackend(ABC):
+    """Runs a loaded speech model (borrowed from the model registry)"""
+
+    family = "base"
+
+    @abstractmethod
+    def transcribe(self, model: Any, audio: Any, **options) -> Dict:
+        """Transcribe a file path or 16 kHz mono float32 samples"""
+
+    def cache_options(self, options: Dict) -> Dict:
+        """``options`` plus any configured settings that change the transcript,
+        so cached results are keyed on everything that produced them"""
+        return dict(options)
+
+
+class WhisperBackend(ASRBackend):
+    """openai-whisper with float PyTorch inference"""
+
+    family = "whisper"
+
+    def transcribe(self, model: Any, audio: Any, **options) -> Dict:
+        result = model.transcribe(audio, **options)
+        segments = [
+            {
+                "id": i,
+                "start": float(segment["start"]),
+                "end": float(segment["end"]),
+                "text": segment["text"],
+                "avg_logprob": float(segment.get("avg_logprob", 0.0)),
+                "no_speech_prob": float(segment.get("no_speech_prob", 0.0)),
+                "words": [
+                    _word(w["start"], w["end"], w["word"], w.get("probability", 1.0))
+                    for w in segment.get("words") or []
+                ]
+            }
+            for i, segment in enumerate(result.get("segments", []))
+        ]
+        return {"text": result.get("text", ""), "language": result.get("language"), "segments": segments}
+
+
+class FasterWhisperBackend(ASRBackend):
+    """CTranslate2 Whisper (faster-whisper) with int8-quantised CPU inference"""
+
+    family = "faster-whisper"
+
+    # Whisper decode options that faster-whisper understands under the same name
+    SUPPORTED_OPTIONS = (
+        "language", "task", "temperature", "initial_prompt", "condition_on_previous_text",
+        "word_timestamps", "beam_size", "best_of", "compression_ratio_threshold",
+        "no_speech_threshold", "vad_filter"
+    )
+
+    @staticmethod
+    def default_beam_size() -> int:
+        return int(os.getenv('ASR_BEAM_SIZE', '5'))
+
+    def cache_options(self, options: Dict) -> Dict:
+        return {
+            **options,
+            "beam_size": options.get("beam_size", self.default_beam_size()),
+            # Quantisation is fixed when the model loads (see the model registry)
+            "compute_type": os.getenv('ASR_COMPUTE_TYPE', 'int8')
+        }
+
+    def transcribe(self, model: Any, audio: Any, **options) -> Dict:
+        kwargs = {name: value for name, value in options.items() if name in self.SUPPORTED_OPTIONS}
+        kwargs.setdefault("beam_size", self.default_beam_size())
+        segments_iter, info = model.transcribe(audio, **kwargs)
+
+        segments: List[Dict] = []
+        for i, segment in enumerate(segments_iter):  # decoding happens lazily, here
+            segments.append({
+                "id": i,
+                "start": float(segment.start),
+                "end": float(segment.end),
+                "text": segment.text,
+                "avg_logprob": float(segment.avg_logprob),
+                "no_speech_prob": float(segment.no_speech_prob),
+                "words": [_word(w.start, w.end, w.word, w.probability) for w in segment.words or []]
+            })
+        return {
+            "text": "".join(segment["text"] for segment in segments),
+            "language": info.language,
+            "segments": segments
+        }
+
+
+def text_between(result: Dict, start: float, end: float) -> str:
+    """Transcript text between two times, by word midpoint (segment midpoint without word timings)"""
+    parts = []
+    for segment in result.get("segments", []):
+        units = segment.get("words") or [{"start": segment["start"], "end": segment["end"], "word": segment["text"]}]
+        parts += [unit["word"] for unit in units if start <= (unit["start"] + unit["end"]) / 2.0 <= end]
+    return "".join(parts).strip()
+
+
+ASR_BACKENDS = {
+    WhisperBackend.family: WhisperBackend,
+    FasterWhisperBackend.family: FasterWhisperBackend
+}
+
+
+def get_asr_backend(name: Optional[str] = None) -> ASRBackend:
+    """Backend named by ``name`` or ASR_BACKEND (whisper | faster-whisper)"""
+    name = (name or os.getenv('ASR_BACKEND', 'whisper')).lower()
+    if name not in ASR_BACKENDS:
+        raise ValueError(f"Unknown ASR backend '{name}'. Choose from: {', '.join(ASR_BACKENDS)}")
+    return ASR_BACKENDS[name]()
+
+
+def backend_for_model(model_name: str) -> ASRBackend:
+    """Backend for a registry model name such as ``"faster-whisper:base"``"""
+    return get_asr_backend(model_name.partition(':')[0])
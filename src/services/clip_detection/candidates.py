@@ -0,0 +1,136 @@
+"""
+Clip candidate generation - sentence-snapped sliding windows over a transcript
+"""
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+SENTENCE_END = re.compile(r'[.!?]["\')\]]*$')
+
+
+@dataclass
+class TranscriptSentence:
+    start: float
+    end: float
+    text: str
+
+
+def split_into_sentences(segments: List[Dict], max_sentence_duration: float = 15.0) -> List[TranscriptSentence]:
+    """Group Whisper segments (or their words, when present) into sentences.
+
+    A sentence closes on terminal punctuation. Whisper does not always
+    punctuate, so a sentence is also closed once it runs longer than
+    ``max_sentence_duration`` to keep window boundaries reasonably fine.
+    """
+    # Flatten to the finest timed units available
+    units = []
+    for segment in segments:
+        words = segment.get('words')
+        if words:
+            units.extend((float(w['start']), float(w['end']), w['word']) for w in words)
+        else:
+            units.append((float(segment['start']), float(segment['end']), segment['text']))
+
+    sentences = []
+    current_start = None
+    current_end = 0.0
+    parts = []
+
+    for start, end, text in units:
+        if current_start is None:
+            current_start = start
+        current_end = max(current_end, end)
+        parts.append(text)
+
+        stripped = text.strip()
+        if SENTENCE_END.search(stripped) or current_end - current_start >= max_sentence_duration:
+            sentences.append(TranscriptSentence(current_start, current_end, ''.join(parts).strip()))
+            current_start = None
+            parts = []
+
+    if parts:
+        sentences.append(TranscriptSentence(current_start, current_end, ''.join(parts).strip()))
+
+    return [s for s in sentences if s.text]
+
+
+def sentence_times(sentences: List[TranscriptSentence]) -> Tuple[np.ndarray, np.ndarray]:
+    """Start and end time arrays for a sentence list"""
+    starts = np.array([s.start for s in sentences], dtype=np.float64)
+    # Guard against tiny timestamp regressions so ends stay sorted
+    ends = np.maximum.accumulate(np.array([s.end for s in sentences], dtype=np.float64))
+    return starts, ends
+
+
+def enumerate_windows(sentences: List[TranscriptSentence], min_duration: float,
+                      max_duration: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Every run of whole sentences lasting between min and max duration.
+
+    Returns ``(first, last)`` arrays of inclusive sentence indices, one entry
+    per window. Window ends are found with a binary search per start sentence,
+    so the cost is proportional to the number of windows produced.
+    """
+    n = len(sentences)
+    if n == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+    starts, ends = sentence_times(sentences)
+    lo = np.searchsorted(ends, starts + min_duration, side='left')
+    hi = np.searchsorted(ends, starts + max_duration, side='right')
+    lo = np.maximum(lo, np.arange(n))
+    counts = np.clip(hi - lo, 0, None)
+
+    total = int(counts.sum())
+    first = np.repeat(np.arange(n, dtype=np.int64), counts)
+    offsets = np.arange(total, dtype=np.int64) - np.repeat(np.cumsum(counts) - counts, counts)
+    last = np.repeat(lo, counts).astype(np.int64) + offsets
+    return first, last
+
+
+def prefix_sums(values) -> np.ndarray:
+    """Prefix array where ``p[j + 1] - p[i]`` is the sum of ``values[i..j]``"""
+    values = np.asarray(values, dtype=np.float64)
+    out = np.zeros(len(values) + 1, dtype=np.float64)
+    np.cumsum(values, out=out[1:])
+    return out
+
+
+def window_sums(prefix: np.ndarray, first: np.ndarray, last: np.ndarray) -> np.ndarray:
+    """Sum over each inclusive ``[first, last]`` range in O(1) per window"""
+    return prefix[last + 1] - prefix[first]
+
+
+def select_top_k(start_times: np.ndarray, end_times: np.ndarray, scores: np.ndarray,
+                 k: int, max_overlap: float = 0.0) -> List[int]:
+    """Greedy top-k with overlap suppression.
+
+    Windows are taken in score order; once a window is chosen, every window
+    whose overlap with it exceeds ``max_overlap`` (a fraction of the shorter
+    of the two) is suppressed. ``max_overlap=0`` gives non-overlapping clips.
+    """
+    if k <= 0 or len(scores) == 0:
+        return []
+
+    order = np.argsort(-scores, kind='stable')
+    starts = start_times[order]
+    ends = end_times[order]
+    durations = ends - starts
+    alive = np.ones(len(order), dtype=bool)
+
+    chosen = []
+    position = 0
+    while len(chosen) < k:
+        remaining = np.flatnonzero(alive[position:])
+        if len(remaining) == 0:
+            break
+        position += int(remaining[0])
+        chosen.append(int(order[position]))
+        alive[position] = False
+
+        overlap = np.minimum(ends, ends[position]) - np.maximum(starts, starts[position])
+        shorter = np.minimum(durations, durations[position])
+        alive &= overlap <= max_overlap * shorter
+
+    return chosen
@@ -0,0 +1,290 @@
+"""
+Chunked transcription - long episodes split at silences and transcribed in parallel
+"""
+import multiprocessing
+import os
+import subprocess
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+SAMPLE_RATE = 16000            # what Whisper expects
+VAD_FRAME_SECONDS = 0.03
+VAD_SMOOTH_SECONDS = 0.5       # cut in the quietest half-second near each target
+
+
+@dataclass
+class AudioChunk:
+    """One slice of the episode.
+
+    ``start``/``end`` is the audio sent to the model (including the overlap
+    with its neighbours); ``core_start``/``core_end`` is the part this chunk
+    owns when results are stitched together.
+    """
+    index: int
+    start: float
+    end: float
+    core_start: float
+    core_end: float
+
+
+def audio_duration(audio_path: str) -> float:
+    """Duration in seconds via ffprobe"""
+    cmd = [
+        'ffprobe', '-v', 'error',
+        '-show_entries', 'format=duration',
+        '-of', 'default=noprint_wrappers=1:nokey=1', str(audio_path)
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
+    if result.returncode != 0:
+        raise ValueError(f"ffprobe failed for {audio_path}: {result.stderr.strip()}")
+    return float(result.stdout.strip() or 0.0)
+
+
+def load_audio_slice(audio_path: str, start: float = 0.0, duration: Optional[float] = None) -> np.ndarray:
+    """16 kHz mono float32 samples for part of a file (input-side seek)"""
+    cmd = ['ffmpeg', '-nostdin', '-v', 'error', '-ss', str(start)]
+    if duration is not None:
+        cmd += ['-t', str(duration)]
+    cmd += ['-i', str(audio_path), '-f', 's16le', '-ac', '1', '-ar', str(SAMPLE_RATE), '-']
+    result = subprocess.run(cmd, capture_output=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg could not decode {audio_path}: {result.stderr.decode(errors='replace')}")
+    return np.frombuffer(result.stdout, dtype=np.int16).astype(np.float32) / 32768.0
+
+
+def frame_energy_db(audio_path: str, block_seconds: float = 60.0) -> np.ndarray:
+    """Per-frame RMS level in dB for the whole file, decoded as a stream"""
+    frame = int(VAD_FRAME_SECONDS * SAMPLE_RATE)
+    block_bytes = int(block_seconds * SAMPLE_RATE) // frame * frame * 2
+    cmd = [
+        'ffmpeg', '-nostdin', '-v', 'error', '-i', str(audio_path),
+        '-f', 's16le', '-ac', '1', '-ar', str(SAMPLE_RATE), '-'
+    ]
+    # stderr goes to a file: a pipe nobody reads could fill up and stall ffmpeg
+    stderr = tempfile.TemporaryFile()
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=stderr)
+    levels = []
+    try:
+        while True:
+            raw = process.stdout.read(block_bytes)
+            if not raw:
+                break
+            samples = np.frombuffer(raw[:len(raw) - len(raw) % (frame * 2)], dtype=np.int16)
+            if not len(samples):
+                break
+            frames = samples.astype(np.float32).reshape(-1, frame) / 32768.0
+            rms = np.sqrt(np.mean(frames ** 2, axis=1))
+            levels.append(20 * np.log10(np.maximum(rms, 1e-5)))
+        # An empty plan would be transcribed (and cached) as an empty transcript
+        if process.wait() != 0 or not levels:
+            stderr.seek(0)
+            raise RuntimeError(
+                f"ffmpeg could not decode {audio_path}: {stderr.read().decode(errors='replace').strip()}"
+            )
+    finally:
+        process.stdout.close()
+        process.wait()
+        stderr.close()
+    return np.concatenate(levels)
+
+
+def plan_chunks(energy_db: np.ndarray, chunk_seconds: float, overlap_seconds: float,
+                search_seconds: float = 30.0) -> List[AudioChunk]:
+    """Split at the quietest moment near every ``chunk_seconds`` boundary.
+
+    Cutting inside a pause means no word is split, and the overlap gives the
+    model some context on both sides of each cut.
+    """
+    duration = len(energy_db) * VAD_FRAME_SECONDS
+    if duration <= chunk_seconds * 1.5:
+        return [AudioChunk(0, 0.0, duration, 0.0, duration)]
+
+    smooth = max(1, int(VAD_SMOOTH_SECONDS / VAD_FRAME_SECONDS))
+    smoothed = np.convolve(energy_db, np.ones(smooth) / smooth, mode='same')
+    search = int(min(search_seconds, chunk_seconds / 4) / VAD_FRAME_SECONDS)
+
+    cuts = [0.0]
+    target = chunk_seconds
+    while duration - target > chunk_seconds * 0.5:
+        centre = int(target / VAD_FRAME_SECONDS)
+        lo, hi = max(0, centre - search), min(len(smoothed), centre + search)
+        quietest = lo + int(np.argmin(smoothed[lo:hi]))
+        cuts.append(quietest * VAD_FRAME_SECONDS)
+        target = cuts[-1] + chunk_seconds
+    cuts.append(duration)
+
+    return [
+        AudioChunk(
+            index=i,
+            start=max(0.0, core_start - overlap_seconds),
+            end=min(duration, core_end + overlap_seconds),
+            core_start=core_start,
+            core_end=core_end
+        )
+        for i, (core_start, core_end) in enumerate(zip(cuts[:-1], cuts[1:]))
+    ]
+
+
+def _midpoint(item: Dict) -> float:
+    return (item['start'] + item['end']) / 2.0
+
+
+def stitch_segments(chunks: List[AudioChunk], chunk_results: List[Dict]) -> Dict:
+    """Merge per-chunk Whisper results into one result with global timestamps.
+
+    Times are shifted by each chunk's offset. In the overlap regions only the
+    chunk that owns the time keeps its words (by word midpoint, or segment
+    midpoint without word timings), so nothing is transcribed twice.
+    """
+    segments = []
+    for chunk, result in zip(chunks, chunk_results):
+        last = chunk.index == len(chunks) - 1
+        owns = lambda t: chunk.core_start <= t < chunk.core_end or (last and t >= chunk.core_end)
+
+        for segment in result.get('segments', []):
+            segment = dict(segment, start=segment['start'] + chunk.start, end=segment['end'] + chunk.start)
+            words = segment.get('words')
+            if words:
+                kept = [
+                    dict(word, start=word['start'] + chunk.start, end=word['end'] + chunk.start)
+                    for word in words
+                ]
+                kept = [word for word in kept if owns(_midpoint(word))]
+                if not kept:
+                    continue
+                if len(kept) < len(words):
+                    # Trimmed at a chunk edge: rebuild the segment from its kept words
+                    segment['text'] = ''.join(word['word'] for word in kept)
+                    segment['start'], segment['end'] = kept[0]['start'], kept[-1]['end']
+                segment['words'] = kept
+            elif not owns(_midpoint(segment)):
+                continue
+            segments.append(segment)
+
+    segments.sort(key=lambda segment: segment['start'])
+    for i, segment in enumerate(segments):
+        segment['id'] = i
+    return {
+        'text': ''.join(segment['text'] for segment in segments),
+        'segments': segments,
+        'language': next((r.get('language') for r in chunk_results if r.get('language')), None)
+    }
+
+
+def total_transcribe_workers() -> int:
+    """TRANSCRIBE_WORKERS: chunk worker processes (and so Whisper models) for the whole app"""
+    return int(os.getenv('TRANSCRIBE_WORKERS', str(max(1, (os.cpu_count() or 2) // 2))))
+
+
+def transcribe_worker_share(processes: int) -> int:
+    """Chunk workers each of ``processes`` parallel detectors may start, so that
+    together they stay within :func:`total_transcribe_workers`"""
+    return total_transcribe_workers() // max(1, processes)
+
+
+def _init_worker(model_name: str):
+    """Worker initializer: load the model once per process"""
+    from src.core.model_registry import get_model_registry
+    try:
+        get_model_registry().warm([model_name])
+    except Exception as e:
+        print(f"⚠️  Transcription worker {os.getpid()} warm-up failed: {e}")
+
+
+def _transcribe_chunk(audio_path: str, chunk: AudioChunk, model_name: str, decode_options: Dict) -> Dict:
+    """Runs inside a worker: decode one slice and transcribe it (chunk-relative times)"""
+    from src.core.model_registry import get_model_registry
+    from src.services.clip_detection.asr import backend_for_model
+    samples = load_audio_slice(audio_path, chunk.start, chunk.end - chunk.start)
+    with get_model_registry().borrow(model_name) as model:
+        return backend_for_model(model_name).transcribe(model, samples, **decode_options)
+
+
+class ChunkedTranscriber:
+    """Transcribes long audio as silence-aligned, overlapping chunks in
+    parallel worker processes, each holding its own warm Whisper model.
+
+    Trades memory (one model per worker) for wall time on multi-core boxes.
+    With fewer than two workers, or inside a daemonic process that may not
+    start children, callers should transcribe in a single pass instead.
+    """
+
+    def __init__(self, workers: Optional[int] = None, chunk_seconds: Optional[float] = None,
+                 overlap_seconds: Optional[float] = None):
+        self.workers = workers if workers is not None else total_transcribe_workers()
+        self.chunk_seconds = chunk_seconds or float(os.getenv('TRANSCRIBE_CHUNK_SECONDS', '600'))
+        self.overlap_seconds = overlap_seconds if overlap_seconds is not None else float(
+            os.getenv('TRANSCRIBE_CHUNK_OVERLAP_SECONDS', '5')
+        )
+        self._executors: Dict[str, ProcessPoolExecutor] = {}
+
+    @property
+    def enabled(self) -> bool:
+        # Daemonic processes (e.g. Celery prefork children) may not start worker processes
+        return self.workers >= 2 and not multiprocessing.current_process().daemon
+
+    def _executor_for(self, model_name: str) -> ProcessPoolExecutor:
+        executor = self._executors.get(model_name)
+        if executor is None:
+            executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(model_name,)
+            )
+            self._executors[model_name] = executor
+        return executor
+
+    def plan(self, audio_path: str) -> List[AudioChunk]:
+        return plan_chunks(frame_energy_db(audio_path), self.chunk_seconds, self.overlap_seconds)
+
+    def transcribe(self, audio_path: str, model_name: str, **decode_options) -> Dict:
+        """Whisper-style result for the whole file"""
+        chunks = self.plan(audio_path)
+        print(f"🧩 Transcribing {len(chunks)} chunks on {self.workers} workers")
+        executor = self._executor_for(model_name)
+        results = list(executor.map(
+            _transcribe_chunk,
+            [audio_path] * len(chunks), chunks,
+            [model_name] * len(chunks), [decode_options] * len(chunks)
+        ))
+        return stitch_segments(chunks, results)
+
+    def close(self):
+        for executor in self._executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
+        self._executors.clear()
+
+
+_transcriber: Optional[ChunkedTranscriber] = None
+
+
+def get_chunked_transcriber() -> ChunkedTranscriber:
+    """Return the process-wide chunked transcriber"""
+    global _transcriber
+    if _transcriber is None:
+        _transcriber = ChunkedTranscriber()
+    return _transcriber
+
+
+def configure_chunked_transcriber(workers: int) -> ChunkedTranscriber:
+    """Replace the process-wide transcriber, e.g. with a share of the budget in detection workers"""
+    global _transcriber
+    close_chunked_transcriber()
+    _transcriber = ChunkedTranscriber(workers=workers)
+    return _transcriber
+
+
+def close_chunked_transcriber():
+    """Shut down the process-wide transcriber's workers, if it started any"""
+    global _transcriber
+    if _transcriber is not None:
+        _transcriber.close()
+        _transcriber = None
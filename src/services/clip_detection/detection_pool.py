@@ -0,0 +1,200 @@
+"""
+Detection worker pool - runs transcription and scoring in warm worker processes
+"""
+import asyncio
+import functools
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from src.services.clip_detection.chunked_transcription import transcribe_worker_share
+
+load_dotenv()
+
+# Per-process state inside each worker
+_worker_detectors: Dict = {}  # (whisper size, refine size) -> EnhancedClipDetector
+_worker_warm_seconds = 0.0
+_worker_start_barrier = None
+
+
+def _init_worker(model_names: List[str], start_barrier, transcribe_workers: int):
+    """Worker initializer: load models once so every job finds them warm"""
+    global _worker_warm_seconds, _worker_start_barrier
+    _worker_start_barrier = start_barrier
+    from src.core.model_registry import get_model_registry
+    from src.services.clip_detection.chunked_transcription import configure_chunked_transcriber
+    # Chunked transcription starts its own workers; this worker gets only its share
+    configure_chunked_transcriber(transcribe_workers)
+    try:
+        _worker_warm_seconds = get_model_registry().warm(model_names)
+    except Exception as e:
+        # The first job will load lazily instead
+        print(f"⚠️  Detection worker {os.getpid()} warm-up failed: {e}")
+
+
+def _worker_ready(timeout: float) -> Tuple[int, float]:
+    """Start-up probe; holds the worker until every worker has taken one"""
+    try:
+        _worker_start_barrier.wait(timeout)
+    except threading.BrokenBarrierError:
+        pass
+    return os.getpid(), _worker_warm_seconds
+
+
+def _find_candidates(audio_path: str, min_duration: float, max_duration: float, top_k: int,
+                     max_overlap: float, whisper_model_size: Optional[str],
+                     refine_model_size: Optional[str] = None):
+    """Runs inside a worker: transcribe, score and select clips"""
+    from src.services.clip_detection.detector import EnhancedClipDetector
+    key = (whisper_model_size, refine_model_size)
+    detector = _worker_detectors.get(key)
+    if detector is None:
+        detector = EnhancedClipDetector(
+            whisper_model_size=whisper_model_size, refine_model_size=refine_model_size
+        )
+        _worker_detectors[key] = detector
+    return detector._find_clip_candidates(audio_path, min_duration, max_duration, top_k, max_overlap)
+
+
+def pool_models() -> List[str]:
+    """Models each detection worker preloads, from DETECTION_WARM_MODELS (comma separated)"""
+    from src.core.model_registry import whisper_model_name
+    configured = os.getenv('DETECTION_WARM_MODELS')
+    if configured is not None:
+        return [name.strip() for name in configured.split(',') if name.strip()]
+    models = [whisper_model_name()]
+    refine_model_size = os.getenv('TRANSCRIBE_REFINE_MODEL_SIZE')
+    if refine_model_size:
+        models.append(whisper_model_name(refine_model_size))
+    return models
+
+
+class DetectionPool:
+    """Long-lived worker processes for the CPU-bound detection stages.
+
+    Transcription, acoustic analysis and window scoring block for minutes, so
+    they run in ``workers`` separate processes that each hold their own warm
+    Whisper model, leaving the event loop free to serve other requests. Workers
+    pull jobs from one shared queue, so a job always goes to the next idle
+    worker. With ``workers=0`` jobs run in a thread of the current process.
+    """
+
+    def __init__(self, workers: Optional[int] = None, warm_models: Optional[List[str]] = None):
+        self.workers = workers if workers is not None else int(os.getenv('DETECTION_WORKERS', '1'))
+        self.warm_models = warm_models if warm_models is not None else pool_models()
+        # Split the chunked-transcription budget so N workers don't start N pools of models
+        self.transcribe_workers = transcribe_worker_share(self.workers)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.worker_warm_seconds: Dict[int, float] = {}
+        self._busy = 0
+        self.stats = {"submitted": 0, "completed": 0, "failed": 0, "restarts": 0, "total_run_seconds": 0.0}
+
+    @property
+    def in_process(self) -> bool:
+        # Daemonic processes (e.g. Celery prefork children) may not start their own pool
+        return self.workers <= 0 or multiprocessing.current_process().daemon
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: never fork a process that is running an event loop and threads
+            context = multiprocessing.get_context('spawn')
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=(self.warm_models, context.Barrier(self.workers), self.transcribe_workers)
+            )
+        return self._executor
+
+    async def start(self, timeout: float = 600.0) -> Dict[int, float]:
+        """Start every worker now and wait until their models are loaded"""
+        if self.in_process:
+            return {}
+        executor = self._get_executor()
+        loop = asyncio.get_running_loop()
+        # One blocking probe per worker: no worker goes idle early, so the whole pool spawns
+        ready = await asyncio.gather(*[
+            loop.run_in_executor(executor, _worker_ready, timeout) for _ in range(self.workers)
+        ])
+        self.worker_warm_seconds.update(dict(ready))
+        return self.worker_warm_seconds
+
+    async def _submit(self, fn: Callable, *args):
+        self.stats["submitted"] += 1
+        self._busy += 1
+        started = time.perf_counter()
+        try:
+            if self.in_process:
+                result = await asyncio.to_thread(fn, *args)
+            else:
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(self._get_executor(), functools.partial(fn, *args))
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory); start a fresh pool for later jobs
+            self.stats["restarts"] += 1
+            self._reset()
+            raise
+        except Exception:
+            self.stats["failed"] += 1
+            raise
+        finally:
+            self._busy -= 1
+            self.stats["total_run_seconds"] += time.perf_counter() - started
+        self.stats["completed"] += 1
+        return result
+
+    async def find_clip_candidates(self, audio_path: str, min_duration: float, max_duration: float,
+                                   top_k: int, max_overlap: float,
+                                   whisper_model_size: Optional[str] = None,
+                                   refine_model_size: Optional[str] = None):
+        """Selected clips plus the episode's sentence texts, computed in a worker"""
+        return await self._submit(
+            _find_candidates, audio_path, min_duration, max_duration, top_k, max_overlap,
+            whisper_model_size, refine_model_size
+        )
+
+    def _reset(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            self.worker_warm_seconds.clear()
+
+    def close(self):
+        self._reset()
+
+    def describe(self) -> Dict:
+        return {
+            "workers": 0 if self.in_process else self.workers,
+            "busy": self._busy,
+            "idle": max(0, self.workers - self._busy) if not self.in_process else 0,
+            "warm_models": self.warm_models,
+            "transcribe_workers_per_worker": self.transcribe_workers,
+            "worker_warm_seconds": {str(pid): round(s, 3) for pid, s in self.worker_warm_seconds.items()},
+            **{k: round(v, 3) if isinstance(v, float) else v for k, v in self.stats.items()}
+        }
+
+
+_pool: Optional[DetectionPool] = None
+
+
+def get_detection_pool() -> DetectionPool:
+    """Return the process-wide detection pool"""
+    global _pool
+    if _pool is None:
+        _pool = DetectionPool()
+    return _pool
+
+
+def configure_detection_pool(workers: int) -> DetectionPool:
+    """Replace the process-wide pool, e.g. ``workers=0`` in dedicated job workers"""
+    global _pool
+    if _pool is not None:
+        _pool.close()
+    _pool = DetectionPool(workers=workers)
+    return _pool
@@ -3,12 +3,29 @@ Enhanced clip detection service
 """
 import os
 import json
-import re
+import asyncio
+import copy
 from datetime import datetime
 from typing import List, Dict, Tuple, Optional
 from dataclasses import dataclass
 import numpy as np
 
+from src.core.model_registry import (
+    ModelRegistry, get_model_registry, whisper_model_name
+)
+from src.services.clip_detection.transcript_cache import TranscriptCache, get_transcript_cache
+from src.services.clip_detection.candidates import (
+    split_into_sentences, sentence_times, enumerate_windows, select_top_k
+)
+from src.services.clip_detection.scoring import VIRAL_PATTERNS, BatchTextScorer, score_text, token_ranges
+from src.services.clip_detection.acoustics import AcousticAnalyzer, get_acoustic_analyzer
+from src.services.clip_detection.keywords import KeywordExtractor, get_keyword_extractor
+from src.services.clip_detection.detection_pool import DetectionPool, get_detection_pool
+from src.services.clip_detection.chunked_transcription import (
+    audio_duration, get_chunked_transcriber, load_audio_slice
+)
+from src.services.clip_detection.asr import backend_for_model, text_between
+
 # Check if we have the required packages
 try:
     import whisper
@@ -33,8 +50,19 @@ class ClipCandidate:
     emotional_intensity: float
 
 class EnhancedClipDetector:
-    def __init__(self):
-        """Initialize the enhanced clip detection system"""
+    def __init__(self, registry: Optional[ModelRegistry] = None,
+                 whisper_model_size: Optional[str] = None,
+                 refine_model_size: Optional[str] = None,
+                 transcript_cache: Optional[TranscriptCache] = None,
+                 acoustic_analyzer: Optional[AcousticAnalyzer] = None,
+                 keyword_extractor: Optional[KeywordExtractor] = None,
+                 detection_pool: Optional[DetectionPool] = None):
+        """Initialize the enhanced clip detection system
+
+        Models are borrowed from the shared model registry rather than loaded
+        here, so constructing a detector per request is cheap. From async code
+        the CPU-bound stages run in the detection worker pool.
+        """
         if not DEPENDENCIES_AVAILABLE:
             raise ImportError("Missing required dependencies. Install with: pip install openai-whisper librosa torch openai textstat")
         
@@ -43,132 +71,229 @@ class EnhancedClipDetector:
         from dotenv import load_dotenv
         load_dotenv()
         
-        self.openai_api_key = os.getenv('OPENAI_API_KEY')
-        if not self.openai_api_key:
-            raise ValueError("OpenAI API key not found in environment variables")
-        
-        # Initialize models
-        print("🤖 Loading Whisper model...")
-        self.whisper_model = whisper.load_model("base")  # Use base model for faster testing
+        self.registry = registry or get_model_registry()
+        self.whisper_model_size = whisper_model_size
+        self.whisper_model_name = whisper_model_name(whisper_model_size)
+        self.asr_backend = backend_for_model(self.whisper_model_name)
         
-        print("🔗 Connecting to OpenAI...")
-        self.openai_client = openai.OpenAI(api_key=self.openai_api_key)
+        # Tiered mode: the model above scans the episode, this one re-transcribes the chosen clips
+        refine_model_size = refine_model_size or os.getenv('TRANSCRIBE_REFINE_MODEL_SIZE')
+        self.refine_model_size = refine_model_size
+        self.refine_model_name = whisper_model_name(refine_model_size) if refine_model_size else None
+        self.keyword_extractor = keyword_extractor or get_keyword_extractor()
+        self.transcript_cache = transcript_cache or get_transcript_cache()
+        self.acoustic_analyzer = acoustic_analyzer
+        self.detection_pool = detection_pool
         
         # Viral patterns from your original code
-        self.viral_patterns = {
-            'shocking_statements': [
-                r'\b(shocking|unbelievable|incredible|mind-blowing|crazy|insane)\b',
-                r'\b(never seen|first time|groundbreaking|revolutionary)\b',
-                r'\b(secret|hidden|revealed|exposed|truth)\b'
-            ],
-            'controversial_topics': [
-                r'\b(controversial|debate|disagree|argue|conflict)\b',
-                r'\b(wrong|mistake|lie|fake|scam)\b',
-                r'\b(banned|censored|forbidden|illegal)\b'
-            ],
-            'actionable_advice': [
-                r'\b(should|must|need to|have to|tip|trick|hack)\b',
-                r'\b(how to|steps|method|technique|strategy)\b',
-                r'\b(avoid|prevent|fix|solve|improve)\b'
-            ]
-        }
-
-    def detect_clips(self, audio_path: str, min_duration: float = 15.0, max_duration: float = 90.0) -> List[ClipCandidate]:
-        """Main function to detect viral clip candidates"""
+        self.viral_patterns = copy.deepcopy(VIRAL_PATTERNS)
+        self.batch_scorer = BatchTextScorer(self.viral_patterns)
+
+    def detect_clips(self, audio_path: str, min_duration: float = 15.0, max_duration: float = 90.0,
+                     top_k: int = 5, max_overlap: float = 0.0) -> List[ClipCandidate]:
+        """Main function to detect viral clip candidates
+
+        Synchronous entry point; from async code use :meth:`detect_clips_async`.
+        """
+        # No event loop to protect here, so detect in this process
+        clips, sentences = self._find_clip_candidates(
+            audio_path, min_duration, max_duration, top_k, max_overlap
+        )
+        # The keyword extractor is shared process-wide, so it is left open
+        return asyncio.run(self._add_keywords(clips, sentences))
+
+    async def detect_clips_async(self, audio_path: str, min_duration: float = 15.0,
+                                 max_duration: float = 90.0, top_k: int = 5,
+                                 max_overlap: float = 0.0) -> List[ClipCandidate]:
+        """Detect viral clip candidates, extracting keywords for all clips in one batch
+
+        Transcription and scoring run in a detection worker, so the event loop
+        keeps serving other requests meanwhile. The worker uses this detector's
+        model sizes but its own process-wide registry, transcript cache and
+        acoustic analyzer; pass custom ones only to the synchronous methods.
+        """
+        pool = self.detection_pool or get_detection_pool()
+        clips, sentences = await pool.find_clip_candidates(
+            audio_path, min_duration, max_duration, top_k, max_overlap,
+            self.whisper_model_size, self.refine_model_size
+        )
+        return await self._add_keywords(clips, sentences)
+
+    async def _add_keywords(self, clips: List[ClipCandidate], sentences: List[str]) -> List[ClipCandidate]:
+        if not clips:
+            return clips
+        
+        keywords = await self.keyword_extractor.extract_many(
+            [clip.transcript for clip in clips], context=sentences
+        )
+        for clip, clip_keywords in zip(clips, keywords):
+            clip.topic_keywords = clip_keywords
+        return clips
+
+    def find_clip_candidates(self, audio_path: str, min_duration: float = 15.0,
+                             max_duration: float = 90.0, top_k: int = 5,
+                             max_overlap: float = 0.0) -> List[ClipCandidate]:
+        """Transcribe, score and select clips (keywords are left empty)"""
+        return self._find_clip_candidates(audio_path, min_duration, max_duration, top_k, max_overlap)[0]
+
+    def _find_clip_candidates(self, audio_path: str, min_duration: float, max_duration: float,
+                              top_k: int, max_overlap: float) -> Tuple[List[ClipCandidate], List[str]]:
+        """Selected clips plus the episode's sentence texts"""
         print("🎙️ Transcribing audio...")
         
         try:
             # Transcribe audio
-            result = self.whisper_model.transcribe(audio_path)
+            result = self.transcribe(audio_path, word_timestamps=True)
             
-            # Simple clip detection for testing
-            full_text = result['text']
-            duration = len(full_text.split()) / 3  # Rough estimate: 3 words per second
+            # Enumerate sentence-snapped windows and score them all at once
+            sentences = split_into_sentences(result.get('segments', []))
+            first, last = enumerate_windows(sentences, min_duration, max_duration)
             
-            if duration < min_duration:
+            if len(first) == 0:
                 print("⚠️  Audio too short for clip detection")
-                return []
+                return [], []
             
-            # Create a simple test clip
-            viral_scores = self.score_viral_potential(full_text)
-            keywords = self.extract_topic_keywords(full_text)
+            sentence_starts, sentence_ends = sentence_times(sentences)
+            window_starts = sentence_starts[first]
+            window_ends = sentence_ends[last]
             
-            confidence = sum(viral_scores.values()) / len(viral_scores)
+            # Tokenize once and score every window from prefix sums
+            tokens, token_starts, token_ends = token_ranges([s.text for s in sentences])
+            features = self.batch_scorer.prepare(tokens)
+            window_token_starts = token_starts[first]
+            window_token_ends = token_ends[last]
+            components = features.score_windows(window_token_starts, window_token_ends)
+            components.update(self._acoustic_scores(audio_path, window_starts, window_ends))
+            window_scores = sum(components.values()) / len(components)
             
-            clip = ClipCandidate(
-                start_time=0.0,
-                end_time=min(duration, max_duration),
-                transcript=full_text[:200] + "..." if len(full_text) > 200 else full_text,
-                confidence_score=confidence,
-                viral_indicators=viral_scores,
-                topic_keywords=keywords,
-                speaker_energy=0.5,
-                emotional_intensity=viral_scores.get('emotional_intensity', 0.0)
-            )
+            # Drop low-confidence windows first so they can't take top-k slots
+            eligible = np.flatnonzero(window_scores > 0.3)
+            chosen = eligible[select_top_k(
+                window_starts[eligible], window_ends[eligible], window_scores[eligible], top_k, max_overlap
+            )]
+            print(f"🔎 Scored {len(first)} candidate windows, selected {len(chosen)}")
+            
+            clips = []
+            for idx in chosen:
+                viral_scores = {name: float(values[idx]) for name, values in components.items()}
+                confidence = float(window_scores[idx])
+                
+                transcript = features.text(window_token_starts[idx], window_token_ends[idx])
+                clips.append(ClipCandidate(
+                    start_time=float(window_starts[idx]),
+                    end_time=float(window_ends[idx]),
+                    transcript=transcript,
+                    confidence_score=confidence,
+                    viral_indicators=viral_scores,
+                    topic_keywords=[],
+                    speaker_energy=viral_scores.get('speaker_energy', 0.5),
+                    emotional_intensity=self._emotional_intensity(viral_scores)
+                ))
             
-            return [clip] if confidence > 0.3 else []
+            clips.sort(key=lambda c: c.confidence_score, reverse=True)
+            self._refine_clip_transcripts(audio_path, clips)
+            return clips, [s.text for s in sentences]
             
         except Exception as e:
             print(f"❌ Error during clip detection: {str(e)}")
-            return []
+            return [], []
 
-    def score_viral_potential(self, text: str) -> Dict[str, float]:
-        """Score the viral potential of a text segment"""
-        scores = {
-            'pattern_matches': 0.0,
-            'emotional_intensity': 0.0,
-            'length_score': 0.0,
-            'readability': 0.0
-        }
+    def _acoustic_scores(self, audio_path: str, window_starts: np.ndarray,
+                         window_ends: np.ndarray) -> Dict[str, np.ndarray]:
+        """Speaker energy and acoustic intensity per window (empty if unavailable)"""
+        try:
+            if self.acoustic_analyzer is None:
+                self.acoustic_analyzer = get_acoustic_analyzer()
+            profile = self.acoustic_analyzer.analyze(audio_path)
+            return profile.window_scores(window_starts, window_ends)
+        except Exception as e:
+            print(f"⚠️  Acoustic analysis failed, scoring on text only: {e}")
+            return {}
+
+    def _emotional_intensity(self, viral_scores: Dict[str, float]) -> float:
+        """Blend textual and acoustic emotional intensity"""
+        text_intensity = viral_scores.get('emotional_intensity', 0.0)
+        if 'acoustic_intensity' not in viral_scores:
+            return text_intensity
+        return (text_intensity + viral_scores['acoustic_intensity']) / 2.0
+
+    def transcribe(self, audio_path: str, **decode_options) -> Dict:
+        """Transcribe audio with the configured ASR backend, reusing cached results for identical audio"""
+        cache_key = self.transcript_cache.key_for_file(
+            audio_path, self.whisper_model_name, self.asr_backend.cache_options(decode_options)
+        )
         
-        text_lower = text.lower()
+        result = self.transcript_cache.get(cache_key)
+        if result is not None:
+            print("⚡ Using cached transcript")
+            return result
         
-        # Pattern matching
-        total_matches = 0
-        for category, patterns in self.viral_patterns.items():
-            for pattern in patterns:
-                matches = len(re.findall(pattern, text_lower))
-                total_matches += matches
-        scores['pattern_matches'] = min(total_matches / 10.0, 1.0)
+        if self._use_chunked_transcription(audio_path):
+            result = get_chunked_transcriber().transcribe(audio_path, self.whisper_model_name, **decode_options)
+        else:
+            with self.registry.borrow(self.whisper_model_name) as whisper_model:
+                result = self.asr_backend.transcribe(whisper_model, audio_path, **decode_options)
         
-        # Emotional intensity
-        emotional_indicators = text.count('!') + len(re.findall(r'[A-Z]{2,}', text))
-        scores['emotional_intensity'] = min(emotional_indicators / 5.0, 1.0)
+        self.transcript_cache.put(cache_key, result)
+        return result
+
+    def _refine_clip_transcripts(self, audio_path: str, clips: List[ClipCandidate]):
+        """Re-transcribe only the selected clips with the larger refine model.
+
+        Each clip's audio (plus a little padding for context) is decoded and
+        transcribed on its own, so the accurate model costs a few minutes of
+        audio rather than the whole episode. Scores stay those of the fast pass.
+        """
+        if not self.refine_model_name or not clips:
+            return
         
-        # Length score
-        word_count = len(text.split())
-        if 20 <= word_count <= 100:
-            scores['length_score'] = 1.0
-        else:
-            scores['length_score'] = 0.5
+        padding = float(os.getenv('TRANSCRIBE_REFINE_PADDING_SECONDS', '1.0'))
+        backend = backend_for_model(self.refine_model_name)
+        clip_seconds = sum(clip.end_time - clip.start_time for clip in clips)
+        print(f"🔬 Refining {len(clips)} clip transcripts ({clip_seconds:.0f}s of audio) with {self.refine_model_name}")
         
-        # Readability
+        for clip in clips:
+            start = max(0.0, clip.start_time - padding)
+            end = clip.end_time + padding
+            options = {'word_timestamps': True}
+            cache_key = self.transcript_cache.key_for_file(
+                audio_path, self.refine_model_name,
+                backend.cache_options({**options, 'start': round(start, 3), 'end': round(end, 3)})
+            )
+            try:
+                result = self.transcript_cache.get(cache_key)
+                if result is None:
+                    samples = load_audio_slice(audio_path, start, end - start)
+                    with self.registry.borrow(self.refine_model_name) as refine_model:
+                        result = backend.transcribe(refine_model, samples, **options)
+                    self.transcript_cache.put(cache_key, result)
+            except Exception as e:
+                print(f"⚠️  Transcript refinement failed, keeping the fast transcript: {e}")
+                continue
+            
+            # Slice-relative times: keep only what falls inside the clip itself
+            refined = text_between(result, clip.start_time - start, clip.end_time - start)
+            if refined:
+                clip.transcript = refined
+
+    def _use_chunked_transcription(self, audio_path: str) -> bool:
+        """Long episodes on multi-worker setups are split and transcribed in parallel"""
+        threshold = float(os.getenv('TRANSCRIBE_LONG_AUDIO_SECONDS', '1800'))
+        if threshold <= 0 or not get_chunked_transcriber().enabled:
+            return False
         try:
-            flesch_score = flesch_reading_ease(text)
-            scores['readability'] = min(flesch_score / 100.0, 1.0)
-        except:
-            scores['readability'] = 0.5
-        
-        return scores
+            return audio_duration(audio_path) >= threshold
+        except Exception as e:
+            print(f"⚠️  Could not read audio duration, transcribing in one pass: {e}")
+            return False
+
+    def score_viral_potential(self, text: str) -> Dict[str, float]:
+        """Score the viral potential of a text segment"""
+        return score_text(text, self.viral_patterns)
 
     def extract_topic_keywords(self, text: str) -> List[str]:
         """Extract key topics for B-roll matching"""
-        try:
-            prompt = f"Extract 3-5 key visual topics from this text for B-roll footage. Return only keywords separated by commas:\n\n{text[:500]}"
-            
-            response = self.openai_client.chat.completions.create(
-                model="gpt-3.5-turbo",  # Use cheaper model for testing
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=50,
-                temperature=0.3
-            )
-            
-            keywords = [k.strip() for k in response.choices[0].message.content.split(',')]
-            return keywords[:5]
-            
-        except Exception as e:
-            print(f"⚠️  Keyword extraction failed: {e}")
-            return ['conversation', 'podcast', 'discussion']
+        return asyncio.run(self.keyword_extractor.extract(text))
 
     def export_clips_metadata(self, candidates: List[ClipCandidate], output_path: str):
         """Export clip metadata to JSON"""
@@ -0,0 +1,406 @@
+"""
+Keyword extraction service - async, batched and cached topic keywords for B-roll
+"""
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import time
+from abc import ABC, abstractmethod
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import aiohttp
+import numpy as np
+from dotenv import load_dotenv
+
+from src.core.model_registry import ModelRegistry, get_model_registry, embedding_model_name
+from src.utils.http import LoopBoundSession
+
+load_dotenv()
+
+FALLBACK_KEYWORDS = ['conversation', 'podcast', 'discussion']
+RETRYABLE_STATUSES = {408, 409, 429, 500, 502, 503, 504}
+
+
+class KeywordExtractionError(Exception):
+    """Raised when a keyword batch cannot be extracted after retries"""
+
+
+def normalize_text(text: str) -> str:
+    """Collapse case and whitespace so trivially different transcripts share a cache entry"""
+    return re.sub(r'\s+', ' ', text).strip().lower()
+
+
+def text_key(text: str) -> str:
+    return hashlib.sha256(normalize_text(text).encode('utf-8')).hexdigest()
+
+
+class TTLCache:
+    """Small in-memory LRU cache whose entries expire after ``ttl`` seconds"""
+
+    def __init__(self, ttl: float, max_entries: int = 10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, object]]" = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def get(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.stats["misses"] += 1
+            return None
+        self._entries.move_to_end(key)
+        self.stats["hits"] += 1
+        return entry[1]
+
+    def put(self, key: str, value):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class KeywordExtractor(ABC):
+    """Interface for keyword backends; all of them batch across an episode's clips"""
+
+    name = "base"
+
+    @abstractmethod
+    async def extract_many(self, texts: List[str], context: Optional[List[str]] = None) -> List[List[str]]:
+        """Keywords for each text, in order. ``context`` is optional episode text
+        (e.g. every transcript sentence) that backends may use for statistics."""
+
+    async def extract(self, text: str) -> List[str]:
+        return (await self.extract_many([text]))[0]
+
+    async def close(self):
+        pass
+
+
+class LLMKeywordExtractor(KeywordExtractor):
+    """Extracts B-roll keywords with an OpenAI-compatible chat completions API.
+
+    Many transcripts are packed into one request that returns structured JSON.
+    Requests run with bounded concurrency and exponential backoff, results are
+    cached by normalized-text hash, and identical texts requested while a call
+    is already in flight wait for that call instead of issuing another.
+    ``base_url`` can point at any compatible server, e.g. a local stub in tests.
+    """
+
+    name = "openai"
+
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None,
+                 model: Optional[str] = None, batch_size: Optional[int] = None,
+                 max_concurrency: Optional[int] = None, max_retries: int = 3,
+                 cache_ttl: Optional[float] = None, timeout: float = 30.0):
+        self.api_key = api_key or os.getenv('OPENAI_API_KEY')
+        if not self.api_key:
+            raise ValueError("OpenAI API key not found in environment variables")
+        self.base_url = (base_url or os.getenv('OPENAI_BASE_URL', 'https://api.openai.com/v1')).rstrip('/')
+        self.model = model or os.getenv('KEYWORD_MODEL', 'gpt-3.5-turbo-1106')
+        self.batch_size = batch_size or int(os.getenv('KEYWORD_BATCH_SIZE', '8'))
+        self.max_concurrency = max_concurrency or int(os.getenv('KEYWORD_MAX_CONCURRENCY', '4'))
+        self.max_retries = max_retries
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+
+        if cache_ttl is None:
+            cache_ttl = float(os.getenv('KEYWORD_CACHE_TTL', '86400'))
+        self.cache = TTLCache(cache_ttl)
+
+        # The previous loop's session is closed when a new loop first uses it
+        self._session = LoopBoundSession(lambda: aiohttp.ClientSession(
+            timeout=self.timeout,
+            headers={"Authorization": f"Bearer {self.api_key}"}
+        ))
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        if self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphore_loop = loop
+        return await self._session.get()
+
+    async def close(self):
+        await self._session.close()
+
+    async def extract_many(self, texts: List[str], context: Optional[List[str]] = None) -> List[List[str]]:
+        """Keywords for each text, in order"""
+        keys = [text_key(text) for text in texts]
+        results: Dict[str, List[str]] = {}
+        waiting: Dict[str, asyncio.Future] = {}
+        to_fetch: Dict[str, str] = {}
+
+        for key, text in zip(keys, texts):
+            if key in results or key in waiting or key in to_fetch:
+                continue
+            cached = self.cache.get(key)
+            if cached is not None:
+                results[key] = cached
+            elif key in self._inflight:
+                waiting[key] = self._inflight[key]
+            else:
+                to_fetch[key] = text
+
+        # Register our own requests before awaiting so concurrent callers coalesce
+        loop = asyncio.get_running_loop()
+        owned = {key: loop.create_future() for key in to_fetch}
+        self._inflight.update(owned)
+
+        try:
+            items = list(to_fetch.items())
+            batches = [items[i:i + self.batch_size] for i in range(0, len(items), self.batch_size)]
+            batch_results = await asyncio.gather(
+                *(self._fetch_batch(batch) for batch in batches), return_exceptions=True
+            )
+
+            for batch, outcome in zip(batches, batch_results):
+                for index, (key, _) in enumerate(batch):
+                    if isinstance(outcome, BaseException):
+                        print(f"⚠️  Keyword extraction failed: {outcome}")
+                        keywords = list(FALLBACK_KEYWORDS)
+                    elif outcome[index] is None:
+                        keywords = list(FALLBACK_KEYWORDS)
+                    else:
+                        keywords = outcome[index]
+                        self.cache.put(key, keywords)
+                    results[key] = keywords
+                    if not owned[key].done():
+                        owned[key].set_result(keywords)
+        finally:
+            for key, future in owned.items():
+                if not future.done():
+                    future.set_result(list(FALLBACK_KEYWORDS))
+                self._inflight.pop(key, None)
+
+        for key, future in waiting.items():
+            # Shielded: cancelling this call must not cancel the owner's future
+            results[key] = await asyncio.shield(future)
+
+        return [list(results[key]) for key in keys]
+
+    def _build_messages(self, texts: List[str]) -> List[Dict]:
+        numbered = "\n\n".join(f"[{i}] {text[:500]}" for i, text in enumerate(texts))
+        return [
+            {
+                "role": "system",
+                "content": (
+                    "You extract 3-5 short visual topics per transcript for B-roll stock "
+                    "footage search. Respond with JSON: "
+                    '{"results": [{"id": <number>, "keywords": ["...", ...]}, ...]} '
+                    "with one entry per transcript id."
+                )
+            },
+            {"role": "user", "content": numbered}
+        ]
+
+    async def _fetch_batch(self, batch: List[Tuple[str, str]]) -> List[Optional[List[str]]]:
+        texts = [text for _, text in batch]
+        payload = {
+            "model": self.model,
+            "messages": self._build_messages(texts),
+            "response_format": {"type": "json_object"},
+            "temperature": 0.3,
+            "max_tokens": 60 * len(texts)
+        }
+
+        session = await self._get_session()
+        last_error: Optional[Exception] = None
+
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                # Exponential backoff with jitter
+                await asyncio.sleep(min(0.5 * 2 ** (attempt - 1), 8.0) * (0.5 + random.random()))
+            try:
+                async with self._semaphore:
+                    async with session.post(f"{self.base_url}/chat/completions", json=payload) as response:
+                        if response.status in RETRYABLE_STATUSES:
+                            last_error = KeywordExtractionError(f"HTTP {response.status}")
+                            continue
+                        if response.status != 200:
+                            raise KeywordExtractionError(f"HTTP {response.status}: {await response.text()}")
+                        data = await response.json()
+                return self._parse_batch_response(data, len(texts))
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                last_error = e
+            except (ValueError, KeyError, IndexError, TypeError) as e:
+                # Malformed or truncated JSON from the model; a fresh sample usually parses
+                last_error = KeywordExtractionError(f"Unparseable keyword response: {e!r}")
+
+        raise KeywordExtractionError(f"Keyword batch failed after {self.max_retries + 1} attempts: {last_error}")
+
+    def _parse_batch_response(self, data: Dict, count: int) -> List[Optional[List[str]]]:
+        content = data['choices'][0]['message']['content']
+        parsed = json.loads(content)
+
+        keywords_by_id = {}
+        for entry in parsed.get('results', []):
+            keywords = [str(k).strip() for k in entry.get('keywords', []) if str(k).strip()]
+            keywords_by_id[int(entry.get('id', -1))] = keywords[:5]
+
+        # Transcripts the model skipped come back as None and are not cached
+        return [keywords_by_id.get(i) or None for i in range(count)]
+
+
+STOPWORDS = frozenset("""
+a about above after again against all also am an and any are aren't as at be because been before
+being below between both but by can can't could couldn't did didn't do does doesn't doing don't
+down during each even ever every few for from further get gets getting go goes going gonna got had
+hadn't has hasn't have haven't having he he'd he'll he's her here here's hers herself him himself
+his how how's i i'd i'll i'm i've if in into is isn't it it's its itself just kind know let let's
+like lot really me might more most much must mustn't my myself need no nor not now of off oh okay
+on once one only or other ought our ours ourselves out over own people right said same say says
+see shan't she she'd she'll she's should shouldn't so some something such than that that's the
+their theirs them themselves then there there's these they they'd they'll they're they've thing
+things think this those though through to too under until up us very want was wasn't way we we'd
+we'll we're we've well were weren't what what's when when's where where's which while who who's
+whom why why's will with won't would wouldn't yeah yes you you'd you'll you're you've your yours
+yourself yourselves actually basically maybe pretty stuff sort gonna wanna guess mean means
+""".split())
+
+TOKEN_PATTERN = re.compile(r"[a-z][a-z'-]*[a-z]")
+CLAUSE_BREAK = re.compile(r'[.!?,;:()"]+')
+
+
+def candidate_phrases(text: str) -> List[str]:
+    """Unigrams and bigrams of content words, in order of appearance"""
+    phrases = []
+    # Bigrams never span punctuation
+    for clause in CLAUSE_BREAK.split(text.lower()):
+        previous = None
+        for word in TOKEN_PATTERN.findall(clause):
+            if word in STOPWORDS or len(word) < 3:
+                previous = None
+                continue
+            phrases.append(word)
+            if previous:
+                phrases.append(f"{previous} {word}")
+            previous = word
+    return phrases
+
+
+class LocalKeywordExtractor(KeywordExtractor):
+    """In-process keyword extraction with no network calls.
+
+    Candidate phrases are ranked by TF-IDF, with document frequencies taken
+    from the episode itself (every clip plus any ``context`` sentences). With
+    ``method="embedding"`` the strongest TF-IDF candidates are re-ranked by
+    cosine similarity to the clip's sentence-transformer embedding; all clips
+    and candidates are embedded in one batch each.
+    """
+
+    name = "local"
+
+    def __init__(self, method: Optional[str] = None, max_keywords: int = 5,
+                 shortlist_size: int = 15, registry: Optional[ModelRegistry] = None,
+                 embedding_model: Optional[str] = None):
+        self.method = method or os.getenv('KEYWORD_LOCAL_METHOD', 'embedding')
+        self.max_keywords = max_keywords
+        self.shortlist_size = shortlist_size
+        self.registry = registry or get_model_registry()
+        self.embedding_model_name = embedding_model_name(embedding_model)
+
+    async def extract_many(self, texts: List[str], context: Optional[List[str]] = None) -> List[List[str]]:
+        if not texts:
+            return []
+        # CPU-bound; keep the event loop responsive
+        return await asyncio.to_thread(self._extract_sync, texts, context or [])
+
+    def _tfidf_shortlists(self, texts: List[str], context: List[str]) -> List[List[Tuple[str, float]]]:
+        documents = [candidate_phrases(text) for text in texts]
+        corpus = documents + [candidate_phrases(sentence) for sentence in context]
+
+        document_frequency = Counter()
+        for phrases in corpus:
+            document_frequency.update(set(phrases))
+        n_docs = len(corpus)
+
+        shortlists = []
+        for phrases in documents:
+            counts = Counter(phrases)
+            scored = []
+            for phrase, count in counts.items():
+                idf = math.log((1 + n_docs) / (1 + document_frequency[phrase])) + 1.0
+                # Bigrams are more specific search queries than single words
+                weight = 1.5 if ' ' in phrase else 1.0
+                scored.append((phrase, count * idf * weight))
+            scored.sort(key=lambda item: item[1], reverse=True)
+            shortlists.append(scored[:self.shortlist_size])
+        return shortlists
+
+    def _extract_sync(self, texts: List[str], context: List[str]) -> List[List[str]]:
+        shortlists = self._tfidf_shortlists(texts, context)
+
+        if self.method == 'embedding':
+            try:
+                return self._rerank_with_embeddings(texts, shortlists)
+            except Exception as e:
+                print(f"⚠️  Embedding keyword ranking unavailable, using TF-IDF: {e}")
+
+        return [self._pick([phrase for phrase, _ in shortlist]) for shortlist in shortlists]
+
+    def _rerank_with_embeddings(self, texts: List[str], shortlists: List[List[Tuple[str, float]]]) -> List[List[str]]:
+        candidates = sorted({phrase for shortlist in shortlists for phrase, _ in shortlist})
+        if not candidates:
+            return [list(FALLBACK_KEYWORDS) for _ in texts]
+        index = {phrase: i for i, phrase in enumerate(candidates)}
+
+        with self.registry.borrow(self.embedding_model_name) as model:
+            text_vectors = model.encode(texts, batch_size=32, normalize_embeddings=True)
+            candidate_vectors = model.encode(candidates, batch_size=64, normalize_embeddings=True)
+
+        similarities = np.asarray(text_vectors) @ np.asarray(candidate_vectors).T
+
+        results = []
+        for row, shortlist in enumerate(shortlists):
+            ranked = sorted(
+                (phrase for phrase, _ in shortlist),
+                key=lambda phrase: similarities[row, index[phrase]],
+                reverse=True
+            )
+            results.append(self._pick(ranked))
+        return results
+
+    def _pick(self, ranked: List[str]) -> List[str]:
+        """Top phrases, skipping words already covered by a chosen phrase"""
+        chosen: List[str] = []
+        for phrase in ranked:
+            words = set(phrase.split())
+            if any(words & set(existing.split()) for existing in chosen):
+                continue
+            chosen.append(phrase)
+            if len(chosen) == self.max_keywords:
+                break
+        return chosen or list(FALLBACK_KEYWORDS)
+
+
+KEYWORD_BACKENDS = {
+    LLMKeywordExtractor.name: LLMKeywordExtractor,
+    LocalKeywordExtractor.name: LocalKeywordExtractor
+}
+
+_extractor: Optional[KeywordExtractor] = None
+
+
+def create_keyword_extractor(backend: Optional[str] = None) -> KeywordExtractor:
+    """Build the keyword backend named by ``backend`` or KEYWORD_BACKEND"""
+    backend = backend or os.getenv('KEYWORD_BACKEND', 'openai')
+    if backend not in KEYWORD_BACKENDS:
+        raise ValueError(f"Unknown keyword backend '{backend}'. Choose from: {', '.join(KEYWORD_BACKENDS)}")
+    return KEYWORD_BACKENDS[backend]()
+
+
+def get_keyword_extractor() -> KeywordExtractor:
+    """Return the process-wide keyword extractor"""
+    global _extractor
+    if _extractor is None:
+        _extractor = create_keyword_extractor()
+    return _extractor
@@ -0,0 +1,325 @@
+"""
+Viral text scoring - per-text scoring and a vectorized batch engine for windows
+"""
+import re
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from textstat import textstat
+except ImportError:
+    textstat = None
+
+VIRAL_PATTERNS = {
+    'shocking_statements': [
+        r'\b(shocking|unbelievable|incredible|mind-blowing|crazy|insane)\b',
+        r'\b(never seen|first time|groundbreaking|revolutionary)\b',
+        r'\b(secret|hidden|revealed|exposed|truth)\b'
+    ],
+    'controversial_topics': [
+        r'\b(controversial|debate|disagree|argue|conflict)\b',
+        r'\b(wrong|mistake|lie|fake|scam)\b',
+        r'\b(banned|censored|forbidden|illegal)\b'
+    ],
+    'actionable_advice': [
+        r'\b(should|must|need to|have to|tip|trick|hack)\b',
+        r'\b(how to|steps|method|technique|strategy)\b',
+        r'\b(avoid|prevent|fix|solve|improve)\b'
+    ]
+}
+
+CAPS_PATTERN = re.compile(r'[A-Z]{2,}')
+WORD_CHAR = re.compile(r'\w')
+SENTENCE_TERMINATORS = '.!?'
+
+# Flesch reading ease constants (textstat, English)
+FRE_BASE = 206.835
+FRE_SENTENCE_LENGTH = 1.015
+FRE_SYLL_PER_WORD = 84.6
+
+
+def score_text(text: str, viral_patterns: Dict[str, List[str]]) -> Dict[str, float]:
+    """Score the viral potential of a single text segment"""
+    scores = {
+        'pattern_matches': 0.0,
+        'emotional_intensity': 0.0,
+        'length_score': 0.0,
+        'readability': 0.0
+    }
+
+    text_lower = text.lower()
+
+    # Pattern matching
+    total_matches = 0
+    for category, patterns in viral_patterns.items():
+        for pattern in patterns:
+            matches = len(re.findall(pattern, text_lower))
+            total_matches += matches
+    scores['pattern_matches'] = min(total_matches / 10.0, 1.0)
+
+    # Emotional intensity
+    emotional_indicators = text.count('!') + len(re.findall(r'[A-Z]{2,}', text))
+    scores['emotional_intensity'] = min(emotional_indicators / 5.0, 1.0)
+
+    # Length score
+    word_count = len(text.split())
+    if 20 <= word_count <= 100:
+        scores['length_score'] = 1.0
+    else:
+        scores['length_score'] = 0.5
+
+    # Readability
+    try:
+        flesch_score = textstat.flesch_reading_ease(text)
+        scores['readability'] = min(flesch_score / 100.0, 1.0)
+    except:
+        scores['readability'] = 0.5
+
+    return scores
+
+
+def _legacy_round(values: np.ndarray, points: int) -> np.ndarray:
+    """Vectorized copy of textstat's half-away-from-zero rounding"""
+    p = 10 ** points
+    return np.floor(values * p + np.copysign(0.5, values)) / p
+
+
+def _prefix(values) -> np.ndarray:
+    out = np.zeros(len(values) + 1, dtype=np.float64)
+    np.cumsum(np.asarray(values, dtype=np.float64), out=out[1:])
+    return out
+
+
+class TokenFeatures:
+    """Per-token feature arrays for one transcript, queried per window.
+
+    A window is a token range ``[start, end)``; its text is the tokens joined
+    by single spaces. Every score is assembled from prefix sums, so any
+    window costs O(1) regardless of its length, and the results equal
+    :func:`score_text` on that window's text.
+    """
+
+    def __init__(self, tokens: List[str], categories: List[str],
+                 match_starts: np.ndarray, match_ends: np.ndarray,
+                 match_categories: np.ndarray):
+        self.tokens = tokens
+        self.categories = categories
+        n = len(tokens)
+
+        # Pattern hits, bucketed by the token each match ends in. A match
+        # spanning several tokens only counts when its first token is inside
+        # the window too, so matches that straddle each token boundary are
+        # tracked separately.
+        self.match_starts = match_starts
+        self.match_ends = match_ends
+        self.max_match_span = int((match_ends - match_starts).max()) + 1 if len(match_starts) else 1
+        self.category_end_prefix = {}
+        for c, category in enumerate(categories):
+            ends = match_ends[match_categories == c]
+            self.category_end_prefix[category] = _prefix(np.bincount(ends, minlength=n))
+        self.match_end_prefix = _prefix(np.bincount(match_ends, minlength=n))
+        crossing = np.zeros(n + 1, dtype=np.float64)
+        spanning = match_ends > match_starts
+        if spanning.any():
+            # A match crosses boundary x (before token x) when start < x <= end
+            np.add.at(crossing, match_starts[spanning] + 1, 1)
+            np.add.at(crossing, match_ends[spanning] + 1, -1)
+            crossing = np.cumsum(crossing)
+        self.crossing = crossing
+
+        # Emotional indicators: '!' plus runs of capitals
+        self.emotional_prefix = _prefix([t.count('!') + len(CAPS_PATTERN.findall(t)) for t in tokens])
+
+        # Readability: words (tokens with a word character) and syllables
+        has_word = np.array([1 if WORD_CHAR.search(t) else 0 for t in tokens], dtype=np.int64)
+        self.word_prefix = _prefix(has_word)
+        syllable_cache: Dict[str, int] = {}
+        syllables = []
+        for token in tokens:
+            count = syllable_cache.get(token)
+            if count is None:
+                count = textstat.syllable_count(token)
+                syllable_cache[token] = count
+            syllables.append(count)
+        self.syllable_prefix = _prefix(syllables)
+
+        self._build_sentence_features(tokens, has_word)
+
+    def _build_sentence_features(self, tokens: List[str], has_word: np.ndarray):
+        """Arrays reproducing textstat's sentence_count for any window.
+
+        textstat splits on runs of ``.!?`` and ignores sentences of two words
+        or fewer. Tokens containing a terminator ("breakers") split runs; the
+        run between two consecutive breakers has a fixed word count, so only
+        the partial runs at the window edges need computing per window.
+        """
+        n = len(tokens)
+        is_breaker = np.zeros(n, dtype=bool)
+        head_word = np.zeros(n, dtype=np.int64)  # word chars before first terminator
+        tail_word = np.zeros(n, dtype=np.int64)  # word chars after last terminator
+        for i, token in enumerate(tokens):
+            first = min((token.find(ch) for ch in SENTENCE_TERMINATORS if ch in token), default=-1)
+            if first < 0:
+                continue
+            last = max(token.rfind(ch) for ch in SENTENCE_TERMINATORS)
+            is_breaker[i] = True
+            head_word[i] = 1 if WORD_CHAR.search(token[:first]) else 0
+            tail_word[i] = 1 if WORD_CHAR.search(token[last + 1:]) else 0
+
+        breakers = np.flatnonzero(is_breaker)
+        self.head_word = head_word
+        self.tail_word = tail_word
+        self.breakers = breakers
+
+        # Complete sentences between consecutive breakers
+        if len(breakers) > 1:
+            between = self.word_prefix[breakers[1:]] - self.word_prefix[breakers[:-1] + 1]
+            run_words = tail_word[breakers[:-1]] + between + head_word[breakers[1:]]
+            self.full_run_prefix = _prefix(run_words > 2)
+        else:
+            self.full_run_prefix = np.zeros(max(len(breakers), 1), dtype=np.float64)
+
+        # Ordinal of the first breaker at or after each token, and of the last
+        # breaker at or before each token (-1 when there is none)
+        ordinals = np.cumsum(is_breaker)
+        self.next_breaker = np.searchsorted(breakers, np.arange(n + 1), side='left')
+        self.prev_breaker = ordinals - 1
+
+    def _words(self, start: np.ndarray, end: np.ndarray) -> np.ndarray:
+        return self.word_prefix[end] - self.word_prefix[start]
+
+    def pattern_counts(self, start: np.ndarray, end: np.ndarray) -> np.ndarray:
+        counts = (self.match_end_prefix[end] - self.match_end_prefix[start]) - self.crossing[start]
+
+        # Windows narrower than the longest match could have a match that
+        # starts before and ends after them; count those few directly
+        short = np.flatnonzero((end - start) < self.max_match_span)
+        for idx in short:
+            counts[idx] = np.count_nonzero(
+                (self.match_starts >= start[idx]) & (self.match_ends < end[idx])
+            )
+        return counts
+
+    def category_counts(self, start: np.ndarray, end: np.ndarray) -> Dict[str, np.ndarray]:
+        """Pattern hits per category (matches are counted by the token they end in)"""
+        return {
+            category: prefix[end] - prefix[start]
+            for category, prefix in self.category_end_prefix.items()
+        }
+
+    def sentence_counts(self, start: np.ndarray, end: np.ndarray) -> np.ndarray:
+        start = np.asarray(start, dtype=np.int64)
+        end = np.asarray(end, dtype=np.int64)
+        first_ordinal = self.next_breaker[start]
+        last_ordinal = self.prev_breaker[np.maximum(end - 1, 0)]
+        has_breaker = (first_ordinal <= last_ordinal) & (end > start)
+
+        # No terminator in the window: the whole window is one sentence
+        plain = (self._words(start, end) > 2).astype(np.float64)
+
+        safe_first = np.clip(first_ordinal, 0, max(len(self.breakers) - 1, 0))
+        safe_last = np.clip(last_ordinal, 0, max(len(self.breakers) - 1, 0))
+        if len(self.breakers):
+            first_breaker = self.breakers[safe_first]
+            last_breaker = self.breakers[safe_last]
+            leading = self._words(start, first_breaker) + self.head_word[first_breaker]
+            trailing = self.tail_word[last_breaker] + self._words(np.minimum(last_breaker + 1, end), end)
+            interior = self.full_run_prefix[safe_last] - self.full_run_prefix[safe_first]
+            with_breakers = (leading > 2).astype(np.float64) + interior + (trailing > 2)
+        else:
+            with_breakers = plain
+
+        counts = np.where(has_breaker, with_breakers, plain)
+        return np.maximum(counts, 1.0)
+
+    def readability(self, start: np.ndarray, end: np.ndarray) -> np.ndarray:
+        words = self._words(start, end)
+        syllables = self.syllable_prefix[end] - self.syllable_prefix[start]
+        sentences = self.sentence_counts(start, end)
+
+        avg_sentence_length = _legacy_round(words / sentences, 1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            avg_syllables = np.where(words > 0, _legacy_round(syllables / np.maximum(words, 1), 1), 0.0)
+        flesch = _legacy_round(
+            FRE_BASE - FRE_SENTENCE_LENGTH * avg_sentence_length - FRE_SYLL_PER_WORD * avg_syllables, 2
+        )
+        return np.minimum(flesch / 100.0, 1.0)
+
+    def score_windows(self, start, end) -> Dict[str, np.ndarray]:
+        """Score components for every window, matching :func:`score_text`"""
+        start = np.asarray(start, dtype=np.int64)
+        end = np.asarray(end, dtype=np.int64)
+
+        matches = self.pattern_counts(start, end)
+        emotional = self.emotional_prefix[end] - self.emotional_prefix[start]
+        word_count = end - start
+
+        return {
+            'pattern_matches': np.minimum(matches / 10.0, 1.0),
+            'emotional_intensity': np.minimum(emotional / 5.0, 1.0),
+            'length_score': np.where((word_count >= 20) & (word_count <= 100), 1.0, 0.5),
+            'readability': self.readability(start, end)
+        }
+
+    def text(self, start: int, end: int) -> str:
+        return ' '.join(self.tokens[start:end])
+
+
+class BatchTextScorer:
+    """Tokenizes a transcript once and scores many windows of it in bulk"""
+
+    def __init__(self, viral_patterns: Optional[Dict[str, List[str]]] = None):
+        self.viral_patterns = viral_patterns or VIRAL_PATTERNS
+        self.categories = list(self.viral_patterns.keys())
+
+        # One alternation over every pattern; each category gets a named group
+        alternatives = []
+        for c, category in enumerate(self.categories):
+            joined = '|'.join(f'(?:{p})' for p in self.viral_patterns[category])
+            alternatives.append(f'(?P<c{c}>{joined})')
+        self.combined_pattern = re.compile('|'.join(alternatives))
+
+    def prepare(self, tokens: List[str]) -> TokenFeatures:
+        """Build per-token features for a whitespace-tokenized transcript"""
+        lowered = [t.lower() for t in tokens]
+        text_lower = ' '.join(lowered)
+
+        # Character offset -> token index
+        token_starts = np.zeros(len(tokens), dtype=np.int64)
+        offset = 0
+        for i, token in enumerate(lowered):
+            token_starts[i] = offset
+            offset += len(token) + 1
+
+        starts, ends, categories = [], [], []
+        for match in self.combined_pattern.finditer(text_lower):
+            starts.append(match.start())
+            ends.append(match.end() - 1)
+            categories.append(int(match.lastgroup[1:]))
+
+        match_starts = np.searchsorted(token_starts, np.array(starts, dtype=np.int64), side='right') - 1
+        match_ends = np.searchsorted(token_starts, np.array(ends, dtype=np.int64), side='right') - 1
+
+        return TokenFeatures(
+            tokens,
+            self.categories,
+            match_starts.astype(np.int64),
+            match_ends.astype(np.int64),
+            np.array(categories, dtype=np.int64)
+        )
+
+    def prepare_text(self, text: str) -> TokenFeatures:
+        return self.prepare(text.split())
+
+
+def token_ranges(texts: List[str]) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """Tokenize consecutive texts, returning tokens and each text's token range"""
+    tokens: List[str] = []
+    starts = np.zeros(len(texts), dtype=np.int64)
+    ends = np.zeros(len(texts), dtype=np.int64)
+    for i, text in enumerate(texts):
+        starts[i] = len(tokens)
+        tokens.extend(text.split())
+        ends[i] = len(tokens)
+    return tokens, starts, ends
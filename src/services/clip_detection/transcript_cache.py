@@ -0,0 +1,140 @@
+"""
+Transcript cache - content-addressed storage of Whisper results
+"""
+import gzip
+import hashlib
+import json
+import os
+import threading
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import numpy as np
+from dotenv import load_dotenv
+
+from src.utils.hashing import sha256_file
+
+load_dotenv()
+
+
+def _json_default(value: Any):
+    """Serialise the numpy values Whisper sometimes leaves in its results"""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class TranscriptCache:
+    """On-disk cache of full Whisper results.
+
+    Entries are keyed by (audio content hash, model name, decode options) and
+    stored as gzip-compressed compact JSON, so segments and word timings come
+    back exactly as Whisper produced them. The directory is kept under
+    ``max_size_mb`` by evicting the least recently used entries; a hit
+    refreshes the entry's mtime.
+    """
+
+    SUFFIX = ".json.gz"
+
+    def __init__(self, cache_dir: Optional[str] = None, max_size_mb: Optional[float] = None):
+        self.cache_dir = Path(cache_dir or os.getenv('TRANSCRIPT_CACHE_DIR', 'data/cache/transcripts'))
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        if max_size_mb is None:
+            max_size_mb = float(os.getenv('TRANSCRIPT_CACHE_MAX_MB', '1024'))
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+    @staticmethod
+    def make_key(audio_hash: str, model_name: str, options: Optional[Dict] = None) -> str:
+        options_json = json.dumps(options or {}, sort_keys=True, default=str)
+        raw = f"{audio_hash}|{model_name}|{options_json}"
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def key_for_file(self, audio_path: str, model_name: str, options: Optional[Dict] = None) -> str:
+        return self.make_key(sha256_file(audio_path), model_name, options)
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}{self.SUFFIX}"
+
+    def get(self, key: str) -> Optional[Dict]:
+        path = self._entry_path(key)
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                result = json.load(f)
+        except (FileNotFoundError, OSError, json.JSONDecodeError):
+            with self._lock:
+                self.stats["misses"] += 1
+            return None
+
+        try:
+            os.utime(path)  # mark as recently used
+        except OSError:
+            pass
+
+        with self._lock:
+            self.stats["hits"] += 1
+        return result
+
+    def put(self, key: str, result: Dict):
+        path = self._entry_path(key)
+        tmp_path = self.cache_dir / f".{key}.{uuid.uuid4().hex}.tmp"
+
+        with gzip.open(tmp_path, 'wt', encoding='utf-8', compresslevel=6) as f:
+            json.dump(result, f, separators=(',', ':'), default=_json_default)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self.stats["writes"] += 1
+            self._evict_if_needed()
+
+    def _evict_if_needed(self):
+        entries = []
+        total = 0
+        for path in self.cache_dir.glob(f"*{self.SUFFIX}"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        if total <= self.max_size_bytes:
+            return
+
+        entries.sort()  # least recently used first
+        for _, size, path in entries:
+            if total <= self.max_size_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            self.stats["evictions"] += 1
+
+    def size_bytes(self) -> int:
+        return sum(p.stat().st_size for p in self.cache_dir.glob(f"*{self.SUFFIX}"))
+
+    def describe(self) -> Dict:
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "hit_rate": round(self.stats["hits"] / lookups, 3) if lookups else 0.0,
+                "size_mb": round(self.size_bytes() / 1024 / 1024, 2),
+                "max_size_mb": round(self.max_size_bytes / 1024 / 1024, 2)
+            }
+
+
+_cache: Optional[TranscriptCache] = None
+
+
+def get_transcript_cache() -> TranscriptCache:
+    """Return the process-wide transcript cache"""
+    global _cache
+    if _cache is None:
+        _cache = TranscriptCache()
+    return _cache
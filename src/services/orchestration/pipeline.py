@@ -2,27 +2,48 @@
 Complete pipeline orchestrator - ties everything together
 """
 import asyncio
+import functools
 import json
+import os
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 
-from src.services.clip_detection.detector import EnhancedClipDetector
+from src.core.model_registry import ModelRegistry
+from src.services.clip_detection.detector import ClipCandidate, EnhancedClipDetector
 from src.services.broll_matching.matcher import BRollMatcher
 from src.services.video_processing.processor import VideoProcessor, ProcessingSpec
+from src.services.video_processing.encode_scheduler import EncodePriority, EncodeQueueFull
+from src.services.video_processing.workspace import JobWorkspace
+from src.services.orchestration.stages import Stage, StagedPipeline
 
 class ViralContentPipeline:
-    def __init__(self):
-        self.clip_detector = EnhancedClipDetector()
+    def __init__(self, registry: Optional[ModelRegistry] = None):
+        self.clip_detector = EnhancedClipDetector(registry=registry)
         self.broll_matcher = BRollMatcher()
-        self.video_processor = VideoProcessor()
+        
+        # Workers per stage; the bounded queues between stages apply backpressure
+        self.search_concurrency = int(os.getenv('PIPELINE_SEARCH_CONCURRENCY', '2'))
+        self.download_concurrency = int(os.getenv('PIPELINE_DOWNLOAD_CONCURRENCY', '2'))
+        self.render_concurrency = int(os.getenv('PIPELINE_RENDER_CONCURRENCY', '2'))
+        self.stage_queue_size = int(os.getenv('PIPELINE_STAGE_QUEUE_SIZE', '2'))
 
     async def process_audio_file(self, audio_path: str, podcaster: str = "unknown", 
-                               target_platforms: List[str] = ["tiktok"]) -> Dict:
-        """Complete pipeline: audio → clips → B-roll → videos"""
+                               target_platforms: List[str] = ["tiktok"],
+                               priority: int = EncodePriority.BATCH,
+                               job_id: Optional[str] = None) -> Dict:
+        """Complete pipeline: audio → clips → B-roll → videos
+
+        Each run renders in its own workspace, so several runs can share a box;
+        finished videos are promoted to ``data/processed/<job_id>/``.
+        """
         
         print(f"🚀 Starting viral content pipeline for: {audio_path}")
+        workspace = JobWorkspace(job_id=job_id)
+        video_processor = VideoProcessor(workspace=workspace)
+        pinned: Dict[int, List[str]] = {}  # clip index -> B-roll paths pinned for its render
         results = {
             "success": False,
+            "job_id": workspace.job_id,
             "audio_path": audio_path,
             "podcaster": podcaster,
             "clips_detected": 0,
@@ -33,7 +54,7 @@ class ViralContentPipeline:
         try:
             # Step 1: Detect viral clips
             print("\n🎯 Step 1: Detecting viral clips...")
-            clips = self.clip_detector.detect_clips(audio_path)
+            clips = await self.clip_detector.detect_clips_async(audio_path)
             results["clips_detected"] = len(clips)
             
             if not clips:
@@ -42,44 +63,23 @@ class ViralContentPipeline:
             
             print(f"✅ Found {len(clips)} potential viral clips")
             
-            # Step 2: Process each clip
-            for i, clip in enumerate(clips[:3]):  # Process top 3 clips
-                print(f"\n🎬 Step 2.{i+1}: Processing clip {i+1}")
-                
-                # Find B-roll footage
-                print("  🎞️  Finding B-roll footage...")
-                broll_footage = await self.broll_matcher.find_broll_for_keywords(clip.topic_keywords)
-                
-                if not broll_footage:
-                    print("  ⚠️  No B-roll footage found, skipping clip")
-                    continue
-                
-                # Convert footage to dict format
-                broll_data = [
-                    {
-                        'id': footage.id,
-                        'download_url': footage.download_url,
-                        'title': footage.title,
-                        'duration': footage.duration
-                    }
-                    for footage in broll_footage[:3]
-                ]
-                
-                # Process for each platform
-                for platform in target_platforms:
-                    print(f"  📱 Creating {platform} video...")
-                    
-                    spec = ProcessingSpec(
-                        clip_id=f"clip_{i+1}_{platform}",
-                        start_time=clip.start_time,
-                        end_time=clip.end_time,
-                        transcript=clip.transcript,
-                        broll_footage=broll_data,
-                        target_platform=platform
-                    )
-                    
-                    video_path = await self.video_processor.process_clip(spec, audio_path)
-                    
+            # Step 2: Search, download and render clips as overlapping stages,
+            # so clip N+1's search and downloads run while clip N encodes.
+            # Downloaded B-roll stays pinned in the cache until its clip renders.
+            stages = StagedPipeline([
+                Stage("search", self._find_clip_broll, self.search_concurrency),
+                Stage("download", functools.partial(self._download_clip_broll, video_processor, pinned),
+                      self.download_concurrency),
+                Stage("render", functools.partial(
+                    self._render_clip, video_processor, workspace, audio_path, target_platforms, priority,
+                    pinned
+                ), self.render_concurrency)
+            ], queue_size=self.stage_queue_size)
+            rendered = await stages.run(enumerate(clips[:3]))  # Process top 3 clips
+            results["stages"] = stages.describe()
+            
+            for i, clip, video_paths in sorted(rendered, key=lambda item: item[0]):
+                for platform, video_path in zip(target_platforms, video_paths):
                     if video_path:
                         results["output_files"].append({
                             "clip_number": i + 1,
@@ -90,15 +90,12 @@ class ViralContentPipeline:
                             "keywords": clip.topic_keywords
                         })
                         results["videos_created"] += 1
-                        print(f"  ✅ {platform} video created!")
-                    else:
-                        print(f"  ❌ {platform} video failed")
             
             results["success"] = results["videos_created"] > 0
             
             # Export summary
-            summary_path = Path("data/processed") / f"pipeline_results_{Path(audio_path).stem}.json"
-            summary_path.parent.mkdir(exist_ok=True)
+            summary_path = workspace.output_dir / f"pipeline_results_{Path(audio_path).stem}.json"
+            summary_path.parent.mkdir(parents=True, exist_ok=True)
             
             with open(summary_path, 'w') as f:
                 json.dump(results, f, indent=2)
@@ -108,14 +105,103 @@ class ViralContentPipeline:
             
             return results
             
+        except EncodeQueueFull:
+            # Backpressure: let the caller turn this into a retry-later response
+            raise
         except Exception as e:
             print(f"❌ Pipeline error: {e}")
             results["error"] = str(e)
             return results
         
         finally:
-            # Cleanup
-            self.video_processor.cleanup_temp_files()
+            # Cleanup (the B-roll matcher's client is process-wide and stays open)
+            for paths in pinned.values():  # clips that never reached the render stage
+                self._release_broll(video_processor, paths)
+            await video_processor.close()
+            video_processor.cleanup_temp_files()
+
+    async def _find_clip_broll(self, item: Tuple[int, ClipCandidate]) -> Optional[Tuple]:
+        """Search stage: B-roll footage for a clip (drops clips with none)"""
+        i, clip = item
+        print(f"\n🎞️  Finding B-roll footage for clip {i+1}...")
+        broll_footage = await self.broll_matcher.find_broll_for_keywords(
+            clip.topic_keywords, context=clip.transcript
+        )
+        
+        if not broll_footage:
+            print(f"  ⚠️  No B-roll footage found, skipping clip {i+1}")
+            return None
+        
+        # Convert footage to dict format
+        broll_data = [
+            {
+                'id': footage.id,
+                'download_url': footage.download_url,
+                'title': footage.title,
+                'duration': footage.duration
+            }
+            for footage in broll_footage[:3]
+        ]
+        return i, clip, broll_data
+
+    async def _download_clip_broll(self, video_processor: VideoProcessor, pinned: Dict[int, List[str]],
+                                   item: Tuple) -> Tuple:
+        """Download stage: fetch a clip's B-roll so rendering reads local files"""
+        i, clip, broll_data = item
+        paths = await asyncio.gather(*(
+            video_processor.download_broll_clip(
+                footage['download_url'], f"clip_{i+1}_{j}", footage_id=footage.get('id')
+            )
+            for j, footage in enumerate(broll_data)
+        ))
+        # Queued renders can wait a while; don't let cache eviction remove their footage
+        pinned[i] = [path for path in paths if path]
+        for path in pinned[i]:
+            video_processor.download_cache.pin(Path(path))
+        local_footage = [
+            {**footage, 'download_url': Path(path).resolve().as_uri()}
+            for footage, path in zip(broll_data, paths) if path
+        ]
+        print(f"  📥 Clip {i+1}: {len(local_footage)}/{len(broll_data)} B-roll clips ready")
+        return i, clip, local_footage
+
+    @staticmethod
+    def _release_broll(video_processor: VideoProcessor, paths: List[str]):
+        for path in paths:
+            video_processor.download_cache.release(Path(path))
+
+    async def _render_clip(self, video_processor: VideoProcessor, workspace: JobWorkspace,
+                           audio_path: str, target_platforms: List[str], priority: int,
+                           pinned: Dict[int, List[str]], item: Tuple) -> Tuple:
+        """Render stage: every platform video for a clip, promoted out of the workspace"""
+        i, clip, broll_data = item
+        try:
+            # Platforms with identical output parameters share one encode
+            specs = [
+                ProcessingSpec(
+                    clip_id=f"clip_{i+1}_{platform}",
+                    start_time=clip.start_time,
+                    end_time=clip.end_time,
+                    transcript=clip.transcript,
+                    broll_footage=broll_data,
+                    target_platform=platform
+                )
+                for platform in target_platforms
+            ]
+            print(f"\n🎬 Clip {i+1}: creating {', '.join(target_platforms)} videos...")
+            video_paths = await video_processor.process_clips(specs, audio_path, priority)
+            
+            promoted = []
+            for platform, video_path in zip(target_platforms, video_paths):
+                if video_path:
+                    promoted.append(workspace.promote(video_path))
+                    print(f"  ✅ Clip {i+1} {platform} video created!")
+                else:
+                    promoted.append(None)
+                    print(f"  ❌ Clip {i+1} {platform} video failed")
+            return i, clip, promoted
+        finally:
+            self._release_broll(video_processor, pinned.pop(i, []))
 
 # Test function
 async def test_pipeline():
@@ -0,0 +1,93 @@
+"""
+Staged execution - producer/consumer stages connected by bounded asyncio queues
+"""
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+_DONE = object()
+
+
+@dataclass
+class Stage:
+    name: str
+    handler: Callable[[Any], Awaitable[Optional[Any]]]  # returning None drops the item
+    concurrency: int = 1
+
+
+class StagedPipeline:
+    """Runs items through a chain of stages so that different items occupy
+    different stages at the same time.
+
+    Each stage has ``concurrency`` workers reading from a queue of at most
+    ``queue_size`` items; a stage that gets ahead blocks on the full queue
+    downstream (backpressure) instead of piling up work. An exception in any
+    handler cancels the whole run and is re-raised.
+    """
+
+    def __init__(self, stages: List[Stage], queue_size: int = 2):
+        self.stages = stages
+        self.queue_size = queue_size
+        self.stats: Dict[str, Dict[str, float]] = {}
+
+    async def run(self, items: Iterable[Any]) -> List[Any]:
+        """Outputs of the last stage, in completion order"""
+        queues = [asyncio.Queue(maxsize=self.queue_size) for _ in self.stages]
+        remaining = [stage.concurrency for stage in self.stages]
+        outputs: List[Any] = []
+        self.stats = {
+            stage.name: {"processed": 0, "dropped": 0, "busy_seconds": 0.0, "blocked_seconds": 0.0}
+            for stage in self.stages
+        }
+
+        async def feed():
+            for item in items:
+                await queues[0].put(item)
+            for _ in range(self.stages[0].concurrency):
+                await queues[0].put(_DONE)
+
+        async def work(index: int):
+            stage = self.stages[index]
+            stats = self.stats[stage.name]
+            while True:
+                item = await queues[index].get()
+                if item is _DONE:
+                    break
+                started = time.perf_counter()
+                result = await stage.handler(item)
+                stats["busy_seconds"] += time.perf_counter() - started
+                if result is None:
+                    stats["dropped"] += 1
+                    continue
+                stats["processed"] += 1
+                if index + 1 < len(self.stages):
+                    blocked = time.perf_counter()
+                    await queues[index + 1].put(result)
+                    stats["blocked_seconds"] += time.perf_counter() - blocked
+                else:
+                    outputs.append(result)
+
+            # The stage's last worker to finish closes the next stage
+            remaining[index] -= 1
+            if remaining[index] == 0 and index + 1 < len(self.stages):
+                for _ in range(self.stages[index + 1].concurrency):
+                    await queues[index + 1].put(_DONE)
+
+        tasks = [asyncio.ensure_future(feed())]
+        for index, stage in enumerate(self.stages):
+            tasks += [asyncio.ensure_future(work(index)) for _ in range(stage.concurrency)]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        return outputs
+
+    def describe(self) -> Dict:
+        return {
+            name: {k: round(v, 3) if isinstance(v, float) else v for k, v in stats.items()}
+            for name, stats in self.stats.items()
+        }
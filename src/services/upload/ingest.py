@@ -0,0 +1,185 @@
+"""
+Upload ingestion service - streams uploads to disk with hashing and dedup
+"""
+import asyncio
+import hashlib
+import json
+import os
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional
+
+import aiofiles
+from dotenv import load_dotenv
+
+load_dotenv()
+
+CHUNK_SIZE = 1024 * 1024  # 1 MB
+
+
+class UploadTooLargeError(Exception):
+    """Raised when an upload exceeds the configured size limit"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        super().__init__(f"Upload exceeds maximum size of {max_bytes // (1024 * 1024)} MB")
+
+
+@dataclass
+class IngestedFile:
+    file_id: str
+    path: Path
+    sha256: str
+    size_bytes: int
+    duplicate: bool
+
+
+class UploadIngestor:
+    """Streams uploads into the upload directory.
+
+    The file is written in chunks to a temporary name while its SHA-256 is
+    computed, then atomically renamed into place. Content already ingested is
+    recognised by hash and the existing ``file_id`` is returned instead of
+    storing a second copy.
+    """
+
+    INDEX_FILENAME = ".ingest_index.json"
+
+    def __init__(self, upload_dir: Optional[str] = None,
+                 max_upload_mb: Optional[float] = None,
+                 chunk_size: int = CHUNK_SIZE):
+        self.upload_dir = Path(upload_dir or os.getenv('UPLOAD_PATH', 'data/uploads'))
+        self.upload_dir.mkdir(parents=True, exist_ok=True)
+
+        if max_upload_mb is None:
+            max_upload_mb = float(os.getenv('MAX_UPLOAD_SIZE', '500'))
+        self.max_bytes = int(max_upload_mb * 1024 * 1024)
+        self.chunk_size = chunk_size
+
+        self.index_path = self.upload_dir / self.INDEX_FILENAME
+        self._index_lock = asyncio.Lock()
+
+    def _load_index(self) -> Dict[str, Dict]:
+        try:
+            with open(self.index_path) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save_index(self, index: Dict[str, Dict]):
+        tmp_path = self.index_path.with_suffix(f".{uuid.uuid4().hex}.tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(index, f)
+        os.replace(tmp_path, self.index_path)
+
+    def lookup(self, sha256: str) -> Optional[IngestedFile]:
+        """Return the stored file for a content hash, if it still exists"""
+        entry = self._load_index().get(sha256)
+        if not entry:
+            return None
+
+        path = self.upload_dir / entry['filename']
+        if not path.exists():
+            return None
+
+        return IngestedFile(
+            file_id=entry['file_id'],
+            path=path,
+            sha256=sha256,
+            size_bytes=entry['size_bytes'],
+            duplicate=True
+        )
+
+    async def ingest(self, upload, filename: Optional[str] = None) -> IngestedFile:
+        """Stream an ``UploadFile`` (or anything with async ``read(n)``) to disk"""
+        filename = filename or getattr(upload, 'filename', None) or ''
+        file_id = str(uuid.uuid4())
+        extension = Path(filename).suffix.lower()
+        tmp_path = self.upload_dir / f".{file_id}{extension}.part"
+
+        # Reject early when the client declared a size over the limit
+        declared_size = getattr(upload, 'size', None)
+        if declared_size is not None and declared_size > self.max_bytes:
+            raise UploadTooLargeError(self.max_bytes)
+
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            async with aiofiles.open(tmp_path, 'wb') as out:
+                while True:
+                    chunk = await upload.read(self.chunk_size)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        raise UploadTooLargeError(self.max_bytes)
+                    digest.update(chunk)
+                    await out.write(chunk)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+
+        sha256 = digest.hexdigest()
+
+        async with self._index_lock:
+            existing = self.lookup(sha256)
+            if existing:
+                tmp_path.unlink(missing_ok=True)
+                # Another request now depends on this file; its owner may no longer discard it
+                index = self._load_index()
+                if not index[sha256].get('shared'):
+                    index[sha256]['shared'] = True
+                    self._save_index(index)
+                print(f"♻️  Duplicate upload, reusing file {existing.file_id}")
+                return existing
+
+            final_path = self.upload_dir / f"{file_id}{extension}"
+            os.replace(tmp_path, final_path)
+
+            index = self._load_index()
+            index[sha256] = {
+                'file_id': file_id,
+                'filename': final_path.name,
+                'size_bytes': size
+            }
+            self._save_index(index)
+
+        return IngestedFile(
+            file_id=file_id,
+            path=final_path,
+            sha256=sha256,
+            size_bytes=size,
+            duplicate=False
+        )
+
+    async def discard(self, ingested: IngestedFile):
+        """Remove a freshly ingested file, e.g. after processing failed.
+
+        Files that a later upload was deduplicated onto are kept, since that
+        request (or the job it queued) still needs them.
+        """
+        if ingested.duplicate:
+            return
+
+        async with self._index_lock:
+            index = self._load_index()
+            entry = index.get(ingested.sha256, {})
+            if entry.get('file_id') == ingested.file_id:
+                if entry.get('shared'):
+                    print(f"📎 Keeping upload {ingested.file_id}, other requests share it")
+                    return
+                del index[ingested.sha256]
+                self._save_index(index)
+            ingested.path.unlink(missing_ok=True)
+
+
+_ingestor: Optional[UploadIngestor] = None
+
+
+def get_upload_ingestor() -> UploadIngestor:
+    """Return the shared ingestor so all requests see one dedup index"""
+    global _ingestor
+    if _ingestor is None:
+        _ingestor = UploadIngestor()
+    return _ingestor
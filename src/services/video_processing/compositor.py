@@ -0,0 +1,91 @@
+"""
+Single-pass compositor - builds one ffmpeg filtergraph per rendered clip
+"""
+import os
+from typing import List, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+OUTPUT_FPS = 30
+
+# One house caption look (ASS style overrides for the subtitles filter)
+DEFAULT_CAPTION_STYLE = (
+    "FontName=Arial,FontSize=16,Bold=1,PrimaryColour=&H00FFFFFF,OutlineColour=&H00000000,"
+    "BorderStyle=1,Outline=2,Shadow=0,Alignment=2,MarginV=60"
+)
+
+
+def escape_filter_value(value: str) -> str:
+    """Escape a value for use inside a single-quoted filtergraph option"""
+    return value.replace('\\', '\\\\').replace("'", "'\\''").replace(':', '\\:')
+
+
+def shot_durations(duration: float, shot_count: int) -> List[float]:
+    """Split ``duration`` evenly across shots (the last absorbs rounding)"""
+    if shot_count <= 0:
+        return []
+    each = round(duration / shot_count, 3)
+    return [each] * (shot_count - 1) + [round(duration - each * (shot_count - 1), 3)]
+
+
+def build_composite_command(broll_paths: List[str], audio_path: str, duration: float,
+                            width: int, height: int, output_path: str,
+                            caption_path: Optional[str] = None,
+                            caption_style: Optional[str] = None,
+                            audio_codec: str = 'copy', audio_start: float = 0.0) -> List[str]:
+    """ffmpeg command that renders a whole clip in one decode/encode pass.
+
+    Every B-roll shot is trimmed to its share of ``duration`` (looping shots
+    that are too short), scaled and cropped to fill ``width``x``height`` and
+    normalised to a common frame rate, then all shots are concatenated, the
+    captions are burned in and the clip audio is muxed alongside. With no
+    B-roll a plain background is used instead.
+    """
+    cmd = ['ffmpeg', '-y']
+    filters = []
+
+    if broll_paths:
+        durations = shot_durations(duration, len(broll_paths))
+        for path, shot_duration in zip(broll_paths, durations):
+            # Loop the input so short stock clips still fill their slot
+            cmd += ['-stream_loop', '-1', '-t', str(shot_duration), '-i', path]
+        for i, shot_duration in enumerate(durations):
+            filters.append(
+                f"[{i}:v]trim=duration={shot_duration},setpts=PTS-STARTPTS,"
+                f"scale={width}:{height}:force_original_aspect_ratio=increase,crop={width}:{height},"
+                f"fps={OUTPUT_FPS},setsar=1,format=yuv420p[v{i}]"
+            )
+        shot_labels = ''.join(f"[v{i}]" for i in range(len(durations)))
+        filters.append(f"{shot_labels}concat=n={len(durations)}:v=1:a=0[vcat]")
+    else:
+        cmd += ['-f', 'lavfi', '-i', f"color=c=black:s={width}x{height}:r={OUTPUT_FPS}:d={duration}"]
+        filters.append("[0:v]format=yuv420p[vcat]")
+
+    audio_index = max(len(broll_paths), 1)
+    if audio_start > 0:
+        cmd += ['-ss', str(audio_start)]  # input-side seek
+    cmd += ['-i', audio_path]
+
+    if caption_path:
+        style = caption_style or os.getenv('CAPTION_FORCE_STYLE', DEFAULT_CAPTION_STYLE)
+        filters.append(
+            f"[vcat]subtitles=filename='{escape_filter_value(caption_path)}'"
+            f":force_style='{escape_filter_value(style)}'[vout]"
+        )
+        video_label = '[vout]'
+    else:
+        video_label = '[vcat]'
+
+    cmd += [
+        '-filter_complex', ';'.join(filters),
+        '-map', video_label,
+        '-map', f'{audio_index}:a:0',
+        '-t', str(duration),
+        '-c:v', 'libx264',
+        '-c:a', audio_codec,
+        '-movflags', '+faststart',
+        str(output_path)
+    ]
+    return cmd
@@ -0,0 +1,254 @@
+"""
+B-roll download cache - content-addressed footage files shared across clips and jobs
+"""
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Optional
+from urllib.parse import urlparse
+
+from dotenv import load_dotenv
+
+from src.utils.hashing import sha256_file
+
+load_dotenv()
+
+
+class DownloadIntegrityError(Exception):
+    """Raised when a downloaded file does not match what the server announced"""
+
+
+class DownloadAborted(Exception):
+    """Handed to coalesced waiters when the caller that owned a download was cancelled"""
+
+
+# Writes the file to the given path; returns the expected size in bytes if known
+Fetcher = Callable[[Path], Awaitable[Optional[int]]]
+
+
+class DownloadCache:
+    """Persistent cache of downloaded B-roll files.
+
+    Files are keyed by footage id (or URL when there is no id), so the same
+    stock clip is fetched once no matter how many clips, platforms or jobs use
+    it. Downloads land in a temporary file, are checked against the announced
+    size, hashed, and only then atomically renamed into place alongside a small
+    metadata sidecar. Concurrent requests for the same key share one download.
+    The directory is kept under ``max_size_mb`` by evicting least recently used
+    files, never touching anything used within the last ``grace_seconds`` or
+    pinned by a run that has yet to render it.
+    """
+
+    META_SUFFIX = ".meta.json"
+
+    def __init__(self, cache_dir: Optional[str] = None, max_size_mb: Optional[float] = None,
+                 grace_seconds: Optional[float] = None, verify: Optional[str] = None):
+        self.cache_dir = Path(cache_dir or os.getenv('BROLL_DOWNLOAD_CACHE_DIR', 'data/cache/broll'))
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        if max_size_mb is None:
+            max_size_mb = float(os.getenv('BROLL_DOWNLOAD_CACHE_MAX_MB', '5120'))
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+        self.grace_seconds = grace_seconds if grace_seconds is not None else \
+            float(os.getenv('BROLL_DOWNLOAD_CACHE_GRACE', '600'))
+        # "size" checks hits cheaply; "sha256" re-hashes the file on every hit
+        self.verify = verify or os.getenv('BROLL_DOWNLOAD_CACHE_VERIFY', 'size')
+
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self._pins: Dict[Path, int] = {}
+        self.stats = {
+            "hits": 0, "misses": 0, "coalesced": 0, "evictions": 0,
+            "corrupt": 0, "bytes_downloaded": 0, "bytes_served": 0
+        }
+
+    @staticmethod
+    def make_key(url: str, footage_id: Optional[str] = None) -> str:
+        return hashlib.sha256((footage_id or url).encode('utf-8')).hexdigest()
+
+    def _paths(self, key: str, url: str):
+        suffix = Path(urlparse(url).path).suffix.lower() or '.mp4'
+        if len(suffix) > 5:
+            suffix = '.mp4'
+        return self.cache_dir / f"{key}{suffix}", self.cache_dir / f"{key}{self.META_SUFFIX}"
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self.stats[name] += amount
+
+    def _lookup(self, key: str, url: str) -> Optional[Path]:
+        """Path of a valid cached file, dropping it if it fails verification"""
+        path, meta_path = self._paths(key, url)
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            size = path.stat().st_size
+        except (FileNotFoundError, OSError, json.JSONDecodeError):
+            return None
+
+        valid = size == meta.get('size_bytes')
+        if valid and self.verify == 'sha256':
+            valid = sha256_file(str(path)) == meta.get('sha256')
+        if not valid:
+            print(f"⚠️  Cached B-roll failed verification, re-downloading: {path.name}")
+            self._count("corrupt")
+            path.unlink(missing_ok=True)
+            meta_path.unlink(missing_ok=True)
+            return None
+
+        try:
+            os.utime(path)  # mark as recently used
+        except OSError:
+            pass
+        return path
+
+    def pin(self, path: Path):
+        """Protect ``path`` from eviction until a matching :meth:`release`.
+
+        Fresh files are already covered by the grace period; pins hold footage
+        for renders that may wait longer than that behind a busy encoder.
+        """
+        with self._lock:
+            self._pins[Path(path)] = self._pins.get(Path(path), 0) + 1
+
+    def release(self, path: Path):
+        with self._lock:
+            count = self._pins.pop(Path(path), 0) - 1
+            if count > 0:
+                self._pins[Path(path)] = count
+
+    async def get_or_download(self, url: str, fetch: Fetcher, footage_id: Optional[str] = None) -> Path:
+        """Local path for ``url``, downloading it with ``fetch`` on a miss"""
+        key = self.make_key(url, footage_id)
+
+        while True:
+            path = await asyncio.to_thread(self._lookup, key, url)
+            if path is not None:
+                self._count("hits")
+                self._count("bytes_served", path.stat().st_size)
+                return path
+
+            if key not in self._inflight:
+                break
+            self._count("coalesced")
+            try:
+                return await asyncio.shield(self._inflight[key])
+            except DownloadAborted:
+                # The owner's job was cancelled, not ours: download it ourselves
+                continue
+
+        self._count("misses")
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            path = await self._download(key, url, fetch, footage_id)
+            future.set_result(path)
+            return path
+        except asyncio.CancelledError:
+            future.set_exception(DownloadAborted(f"Download of {url} was cancelled by its owner"))
+            future.exception()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # don't warn when nobody else was waiting
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _download(self, key: str, url: str, fetch: Fetcher, footage_id: Optional[str]) -> Path:
+        path, meta_path = self._paths(key, url)
+        tmp_path = self.cache_dir / f".{key}.{uuid.uuid4().hex}.part"
+        try:
+            expected_size = await fetch(tmp_path)
+            size = tmp_path.stat().st_size
+            if size == 0 or (expected_size is not None and size != expected_size):
+                raise DownloadIntegrityError(
+                    f"Downloaded {size} bytes, expected {expected_size if expected_size is not None else '> 0'}"
+                )
+            digest = await asyncio.to_thread(sha256_file, str(tmp_path))
+
+            os.replace(tmp_path, path)
+            meta = {
+                'url': url,
+                'footage_id': footage_id,
+                'size_bytes': size,
+                'sha256': digest,
+                'downloaded_at': time.time()
+            }
+            meta_tmp = self.cache_dir / f".{key}.{uuid.uuid4().hex}.meta"
+            with open(meta_tmp, 'w') as f:
+                json.dump(meta, f)
+            os.replace(meta_tmp, meta_path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+        self._count("bytes_downloaded", size)
+        await asyncio.to_thread(self._evict_if_needed)
+        return path
+
+    def _evict_if_needed(self):
+        entries = []
+        total = 0
+        for meta_path in self.cache_dir.glob(f"*{self.META_SUFFIX}"):
+            key = meta_path.name[:-len(self.META_SUFFIX)]
+            for path in self.cache_dir.glob(f"{key}.*"):
+                if path == meta_path:
+                    continue
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path, meta_path))
+                total += stat.st_size
+
+        if total <= self.max_size_bytes:
+            return
+
+        with self._lock:
+            pinned = set(self._pins)
+        cutoff = time.time() - self.grace_seconds
+        entries.sort(key=lambda entry: entry[0])  # least recently used first
+        for mtime, size, path, meta_path in entries:
+            if total <= self.max_size_bytes or mtime > cutoff:
+                break
+            if path in pinned:
+                continue
+            path.unlink(missing_ok=True)
+            meta_path.unlink(missing_ok=True)
+            total -= size
+            self._count("evictions")
+
+    def size_bytes(self) -> int:
+        return sum(
+            p.stat().st_size for p in self.cache_dir.iterdir()
+            if p.is_file() and not p.name.startswith('.') and not p.name.endswith(self.META_SUFFIX)
+        )
+
+    def describe(self) -> Dict:
+        with self._lock:
+            stats = dict(self.stats)
+            pinned = len(self._pins)
+        lookups = stats["hits"] + stats["misses"] + stats["coalesced"]
+        return {
+            **stats,
+            "hit_rate": round((stats["hits"] + stats["coalesced"]) / lookups, 3) if lookups else 0.0,
+            "pinned": pinned,
+            "size_mb": round(self.size_bytes() / 1024 / 1024, 2),
+            "max_size_mb": round(self.max_size_bytes / 1024 / 1024, 2)
+        }
+
+
+_cache: Optional[DownloadCache] = None
+
+
+def get_download_cache() -> DownloadCache:
+    """Return the process-wide B-roll download cache"""
+    global _cache
+    if _cache is None:
+        _cache = DownloadCache()
+    return _cache
@@ -0,0 +1,187 @@
+"""
+FFmpeg job scheduler - bounded, core-aware and prioritised encoding
+"""
+import asyncio
+import heapq
+import itertools
+import os
+import signal
+import time
+from collections import deque
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import Deque, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class EncodePriority(IntEnum):
+    """Lower runs first"""
+    INTERACTIVE = 0   # a user is waiting on the result (previews, API requests)
+    BATCH = 10        # background jobs
+
+
+class EncodeQueueFull(Exception):
+    """Raised when too many ffmpeg jobs are already waiting"""
+
+
+@dataclass
+class EncodeResult:
+    returncode: int
+    stderr: str
+    wait_seconds: float
+    run_seconds: float
+
+    @property
+    def ok(self) -> bool:
+        return self.returncode == 0
+
+
+def available_cores() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+class EncodeScheduler:
+    """Runs ffmpeg commands with a fixed number of concurrent slots.
+
+    Each job gets ``threads_per_job`` encoder threads and the slot count is
+    sized so that ``slots * threads_per_job`` roughly matches the available
+    cores, so concurrent renders share the CPU instead of thrashing it. Waiting
+    jobs are started by priority, then in submission order. Once
+    ``max_queued`` jobs are waiting, new submissions fail fast with
+    :class:`EncodeQueueFull`. Cancelling the awaiting task terminates its
+    ffmpeg child.
+    """
+
+    def __init__(self, max_concurrent: Optional[int] = None, threads_per_job: Optional[int] = None,
+                 max_queued: Optional[int] = None):
+        cores = available_cores()
+        self.threads_per_job = threads_per_job or int(os.getenv('FFMPEG_THREADS_PER_JOB', str(min(4, cores))))
+        self.max_concurrent = max_concurrent or int(
+            os.getenv('FFMPEG_MAX_CONCURRENT', str(max(1, cores // self.threads_per_job)))
+        )
+        self.max_queued = max_queued or int(os.getenv('FFMPEG_MAX_QUEUED', '100'))
+
+        self._running = 0
+        self._waiting: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._recent_waits: Deque[float] = deque(maxlen=500)
+        self.stats = {"completed": 0, "failed": 0, "cancelled": 0, "rejected": 0, "total_wait_seconds": 0.0}
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(1 for _, _, future in self._waiting if not future.done())
+
+    def _with_threads(self, cmd: List[str]) -> List[str]:
+        if '-threads' in cmd:
+            return list(cmd)
+        # Output option: goes right before the output path
+        return cmd[:-1] + ['-threads', str(self.threads_per_job)] + cmd[-1:]
+
+    async def _acquire(self, priority: int):
+        if self._running < self.max_concurrent and self.queue_depth == 0:
+            self._running += 1
+            return
+
+        if self.queue_depth >= self.max_queued:
+            self.stats["rejected"] += 1
+            raise EncodeQueueFull(f"{self.queue_depth} encodes already queued")
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiting, (int(priority), next(self._sequence), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            self.stats["cancelled"] += 1
+            if future.done() and not future.cancelled():
+                # We were handed a slot just as we were cancelled; pass it on
+                self._release()
+            raise
+
+    def _release(self):
+        self._running -= 1
+        while self._waiting and self._running < self.max_concurrent:
+            _, _, future = heapq.heappop(self._waiting)
+            if not future.done():
+                self._running += 1
+                future.set_result(None)
+
+    async def run(self, cmd: List[str], priority: int = EncodePriority.BATCH,
+                  label: str = "ffmpeg") -> EncodeResult:
+        """Run an ffmpeg command when a slot is free and return its result"""
+        queued_at = time.perf_counter()
+        await self._acquire(priority)
+        wait_seconds = time.perf_counter() - queued_at
+        self._recent_waits.append(wait_seconds)
+        self.stats["total_wait_seconds"] += wait_seconds
+        if wait_seconds > 1.0:
+            print(f"⏳ {label} waited {wait_seconds:.1f}s for an encode slot")
+
+        started = time.perf_counter()
+        process = None
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *self._with_threads(cmd),
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE
+            )
+            _, stderr = await process.communicate()
+        except asyncio.CancelledError:
+            self.stats["cancelled"] += 1
+            if process is not None:
+                await self._terminate(process, label)
+            raise
+        finally:
+            self._release()
+
+        self.stats["completed" if process.returncode == 0 else "failed"] += 1
+        return EncodeResult(
+            returncode=process.returncode,
+            stderr=stderr.decode(errors='replace'),
+            wait_seconds=wait_seconds,
+            run_seconds=time.perf_counter() - started
+        )
+
+    async def _terminate(self, process: asyncio.subprocess.Process, label: str):
+        """Stop an ffmpeg child: SIGINT lets it finalise, then escalate"""
+        if process.returncode is not None:
+            return
+        print(f"🛑 Cancelling {label}")
+        try:
+            process.send_signal(signal.SIGINT)
+            await asyncio.wait_for(process.wait(), timeout=5)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+        except ProcessLookupError:
+            pass
+
+    def describe(self) -> Dict:
+        waits = sorted(self._recent_waits)
+        return {
+            "max_concurrent": self.max_concurrent,
+            "threads_per_job": self.threads_per_job,
+            "running": self._running,
+            "queue_depth": self.queue_depth,
+            "max_queued": self.max_queued,
+            "avg_wait_seconds": round(sum(waits) / len(waits), 3) if waits else 0.0,
+            "p95_wait_seconds": round(waits[int(0.95 * (len(waits) - 1))], 3) if waits else 0.0,
+            **{k: round(v, 3) if isinstance(v, float) else v for k, v in self.stats.items()}
+        }
+
+
+_scheduler: Optional[EncodeScheduler] = None
+
+
+def get_encode_scheduler() -> EncodeScheduler:
+    """Return the process-wide encode scheduler"""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = EncodeScheduler()
+    return _scheduler
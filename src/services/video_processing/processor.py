@@ -4,12 +4,26 @@ Video processing service - creates viral clips with B-roll and captions
 import os
 import json
 import asyncio
+import hashlib
+import re
 import aiohttp
-from typing import List, Dict, Optional
-from dataclasses import dataclass
+import aiofiles
+from typing import List, Dict, Optional, Tuple
+from dataclasses import dataclass, field
 from pathlib import Path
 import tempfile
 import subprocess
+from urllib.parse import unquote, urlparse
+
+from src.services.video_processing.download_cache import DownloadCache, get_download_cache
+from src.services.video_processing.compositor import build_composite_command
+from src.services.video_processing.encode_scheduler import (
+    EncodePriority, EncodeQueueFull, EncodeScheduler, get_encode_scheduler
+)
+from src.services.video_processing.workspace import JobWorkspace, WorkspaceQuotaExceeded
+
+DOWNLOAD_CHUNK_SIZE = 256 * 1024
+DOWNLOAD_WRITE_BUFFER = 4 * 1024 * 1024  # write to disk in a few large, off-loop writes
 
 @dataclass
 class ProcessingSpec:
@@ -20,10 +34,38 @@ class ProcessingSpec:
     broll_footage: List[Dict]
     target_platform: str = "tiktok"
 
+@dataclass
+class RenderPlan:
+    """One encode shared by every spec whose output parameters match"""
+    signature: Tuple
+    duration: float                   # longest duration any member needs
+    specs: List[ProcessingSpec] = field(default_factory=list)
+
 class VideoProcessor:
-    def __init__(self):
-        self.temp_dir = Path("data/temp")
-        self.temp_dir.mkdir(exist_ok=True)
+    def __init__(self, download_cache: Optional[DownloadCache] = None,
+                 encode_scheduler: Optional[EncodeScheduler] = None,
+                 workspace: Optional[JobWorkspace] = None):
+        # Scratch files live in this run's own workspace, never a shared directory
+        self.workspace = workspace or JobWorkspace()
+        self.temp_dir = self.workspace.path
+        
+        # Downloaded B-roll lives in a shared cache, not the temp dir
+        self.download_cache = download_cache or get_download_cache()
+        
+        # All ffmpeg work goes through the shared, core-aware scheduler
+        self.encode_scheduler = encode_scheduler or get_encode_scheduler()
+        
+        # Clip audio segments, cut from the episode once and shared by every render
+        self._clip_audio: Dict[Tuple[str, float, float], asyncio.Future] = {}
+        
+        # Downloads share one pooled session; the semaphore bounds them across clips
+        self.download_concurrency = int(os.getenv('BROLL_DOWNLOAD_CONCURRENCY', '4'))
+        self.download_timeout = float(os.getenv('BROLL_DOWNLOAD_TIMEOUT', '90'))
+        self.download_read_timeout = float(os.getenv('BROLL_DOWNLOAD_READ_TIMEOUT', '15'))
+        self.download_retries = int(os.getenv('BROLL_DOWNLOAD_RETRIES', '3'))
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop = None
+        self._download_semaphore: Optional[asyncio.Semaphore] = None
         
         # Platform specifications
         self.platform_specs = {
@@ -44,29 +86,118 @@ class VideoProcessor:
             }
         }
 
-    async def download_broll_clip(self, download_url: str, clip_id: str) -> Optional[str]:
-        """Download a B-roll clip from URL"""
+    async def download_broll_clip(self, download_url: str, clip_id: str,
+                                  footage_id: Optional[str] = None) -> Optional[str]:
+        """Download a B-roll clip from URL (via the shared download cache)"""
+        # Local library footage is used in place, no download needed
+        if download_url.startswith('file://'):
+            local_path = unquote(urlparse(download_url).path)
+            return local_path if os.path.exists(local_path) else None
+        
         try:
-            output_path = self.temp_dir / f"broll_{clip_id}.mp4"
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.get(download_url) as response:
-                    if response.status == 200:
-                        with open(output_path, 'wb') as f:
-                            async for chunk in response.content.iter_chunked(8192):
-                                f.write(chunk)
-                        return str(output_path)
+            path = await self.download_cache.get_or_download(
+                download_url,
+                lambda destination: self._fetch_to_file(download_url, destination),
+                footage_id=footage_id
+            )
+            return str(path)
             
-            print(f"⚠️  Failed to download B-roll: {download_url}")
+        except asyncio.TimeoutError:
+            print(f"⚠️  B-roll download for {clip_id} timed out after {self.download_timeout:.0f}s, skipping")
             return None
-            
         except Exception as e:
-            print(f"❌ Error downloading B-roll: {e}")
+            print(f"❌ Error downloading B-roll for {clip_id}: {e}")
             return None
 
-    def create_simple_caption_file(self, transcript: str, duration: float) -> str:
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Long-lived pooled session (recreated if the event loop changed)"""
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            connector = aiohttp.TCPConnector(
+                limit=self.download_concurrency * 2,
+                ttl_dns_cache=300,
+                keepalive_timeout=60
+            )
+            # No total timeout here: large files are bounded by download_timeout,
+            # while sock_read catches a stalled edge quickly
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=None, connect=10, sock_read=self.download_read_timeout)
+            )
+            self._session_loop = loop
+            self._download_semaphore = asyncio.Semaphore(self.download_concurrency)
+        return self._session
+
+    async def close(self):
+        """Close the pooled download session"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def _fetch_to_file(self, download_url: str, destination: Path) -> Optional[int]:
+        """Write ``download_url`` to ``destination``; returns the announced size"""
+        await self._get_session()
+        async with self._download_semaphore:
+            return await asyncio.wait_for(
+                self._download_with_resume(download_url, destination),
+                timeout=self.download_timeout
+            )
+
+    async def _download_with_resume(self, download_url: str, destination: Path) -> Optional[int]:
+        """Stream to disk, resuming with an HTTP Range request after a dropped connection"""
+        session = await self._get_session()
+        written = 0
+        expected_size = None
+        
+        for attempt in range(self.download_retries + 1):
+            headers = {'Range': f'bytes={written}-'} if written else {}
+            try:
+                async with session.get(download_url, headers=headers) as response:
+                    if response.status == 206 and written:
+                        mode = 'ab'
+                        content_range = re.match(r'bytes (\d+)-\d+/(\d+)', response.headers.get('Content-Range', ''))
+                        if content_range is None or int(content_range.group(1)) != written:
+                            raise RuntimeError(f"Unexpected Content-Range for {download_url}")
+                        expected_size = int(content_range.group(2))
+                    elif response.status == 200:
+                        # Fresh start (or the server ignored our Range header)
+                        mode = 'wb'
+                        written = 0
+                        expected_size = response.content_length
+                    else:
+                        raise RuntimeError(f"HTTP {response.status} for {download_url}")
+                    
+                    async with aiofiles.open(destination, mode) as f:
+                        buffer = bytearray()
+                        try:
+                            async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+                                buffer += chunk
+                                if len(buffer) >= DOWNLOAD_WRITE_BUFFER:
+                                    await f.write(bytes(buffer))
+                                    written += len(buffer)
+                                    buffer.clear()
+                        finally:
+                            # Keep whatever arrived so a retry can resume after it
+                            if buffer:
+                                await f.write(bytes(buffer))
+                                written += len(buffer)
+                
+                if expected_size is not None and written < expected_size:
+                    raise aiohttp.ClientPayloadError(f"Connection closed at {written}/{expected_size} bytes")
+                return expected_size
+                
+            except (aiohttp.ClientPayloadError, aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if attempt == self.download_retries:
+                    raise
+                print(f"⚠️  B-roll download interrupted at {written / 1e6:.1f} MB ({e}), resuming...")
+                await asyncio.sleep(min(2 ** attempt, 8))
+        
+        return expected_size
+
+    def create_simple_caption_file(self, transcript: str, duration: float,
+                                   name: str = "captions") -> str:
         """Create a simple caption file"""
-        caption_path = self.temp_dir / "captions.srt"
+        caption_path = self.temp_dir / f"{name}.srt"
         
         # Simple caption - split transcript into chunks
         words = transcript.split()
@@ -98,102 +229,248 @@ class VideoProcessor:
         millisecs = int((seconds % 1) * 1000)
         return f"{hours:02d}:{minutes:02d}:{secs:02d},{millisecs:03d}"
 
-    async def process_clip(self, spec: ProcessingSpec, original_audio_path: str) -> Optional[str]:
+    def render_signature(self, spec: ProcessingSpec) -> Tuple:
+        """Everything that changes the encoded pixels or audio for a spec.
+
+        Platforms with equal signatures can share one encode. Only the output
+        resolution reaches the encoder today; ``max_duration`` is handled by
+        trimming and ``caption_style`` is not rendered.
+        """
+        platform = self.platform_specs[spec.target_platform]
+        return (
+            spec.start_time,
+            spec.end_time,
+            spec.transcript,
+            tuple(footage.get('id') or footage['download_url'] for footage in spec.broll_footage[:3]),
+            platform['resolution']
+        )
+
+    def platform_duration(self, spec: ProcessingSpec) -> float:
+        return min(spec.end_time - spec.start_time, self.platform_specs[spec.target_platform]['max_duration'])
+
+    def plan_renders(self, specs: List[ProcessingSpec]) -> List[RenderPlan]:
+        """Group specs that can share an encode, preserving first-seen order"""
+        plans: Dict[Tuple, RenderPlan] = {}
+        for spec in specs:
+            signature = self.render_signature(spec)
+            plan = plans.setdefault(signature, RenderPlan(signature=signature, duration=0.0))
+            plan.specs.append(spec)
+            plan.duration = max(plan.duration, self.platform_duration(spec))
+        return list(plans.values())
+
+    def output_path_for(self, spec: ProcessingSpec) -> Path:
+        return self.temp_dir / f"{spec.clip_id}_{spec.target_platform}.mp4"
+
+    async def process_clip(self, spec: ProcessingSpec, original_audio_path: str,
+                           priority: int = EncodePriority.BATCH) -> Optional[str]:
         """Process a clip with B-roll and captions"""
-        print(f"🎬 Processing clip: {spec.clip_id}")
+        return (await self.process_clips([spec], original_audio_path, priority))[0]
+
+    async def process_clips(self, specs: List[ProcessingSpec], original_audio_path: str,
+                            priority: int = EncodePriority.BATCH) -> List[Optional[str]]:
+        """Render several specs (typically one clip for several platforms),
+        encoding once per group of identical output parameters.
+
+        The group's longest member is encoded; every other member is derived
+        from it by a stream-copy trim. Returns each spec's output path (or None)
+        in the order given.
+        """
+        # Longest duration needed from each clip range, so one audio cut serves all
+        audio_durations: Dict[Tuple[float, float], float] = {}
+        for spec in specs:
+            key = (spec.start_time, spec.end_time)
+            audio_durations[key] = max(audio_durations.get(key, 0.0), self.platform_duration(spec))
         
+        outputs: Dict[int, Optional[str]] = {}
+        for plan in self.plan_renders(specs):
+            if len(plan.specs) > 1:
+                platforms = ', '.join(spec.target_platform for spec in plan.specs)
+                print(f"♻️  Sharing one encode across: {platforms}")
+            lead = plan.specs[0]
+            clip_audio_path = await self.extract_clip_audio(
+                original_audio_path, lead.start_time,
+                audio_durations[(lead.start_time, lead.end_time)], priority
+            )
+            results = await self._render_plan(plan, clip_audio_path, priority)
+            for spec, path in zip(plan.specs, results):
+                outputs[id(spec)] = path
+        return [outputs.get(id(spec)) for spec in specs]
+
+    async def extract_clip_audio(self, audio_path: str, start_time: float, duration: float,
+                                 priority: int = EncodePriority.BATCH) -> Optional[str]:
+        """Cut a clip's audio out of the episode once (input-side seek, AAC).
+
+        Concurrent and repeated requests for the same range share one cut, so
+        every platform render of a clip reads a small segment instead of
+        decoding the episode from the start.
+        """
+        key = (os.path.realpath(audio_path), round(start_time, 3), round(duration, 3))
+        future = self._clip_audio.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._extract_clip_audio(key, audio_path, start_time, duration, priority))
+            self._clip_audio[key] = future
+        return await asyncio.shield(future)
+
+    async def _extract_clip_audio(self, key: Tuple[str, float, float], audio_path: str,
+                                  start_time: float, duration: float, priority: int) -> Optional[str]:
         try:
-            # Download B-roll clips
-            broll_paths = []
-            for i, footage in enumerate(spec.broll_footage[:3]):  # Limit to 3 clips
-                path = await self.download_broll_clip(footage['download_url'], f"{spec.clip_id}_{i}")
-                if path:
-                    broll_paths.append(path)
+            # Don't start writing into a workspace that is already over quota
+            self.workspace.check_quota()
+        except WorkspaceQuotaExceeded:
+            self._clip_audio.pop(key, None)
+            raise
+        digest = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()[:16]
+        output_path = self.temp_dir / f"clip_audio_{digest}.m4a"
+        cmd = [
+            'ffmpeg', '-y',
+            '-ss', str(start_time),  # before -i: seek in the input, don't decode up to it
+            '-t', str(duration),
+            '-i', audio_path,
+            '-vn',
+            '-c:a', 'aac', '-b:a', '192k',
+            str(output_path)
+        ]
+        result = await self.encode_scheduler.run(cmd, priority=priority, label=f"audio {output_path.name}")
+        if not result.ok:
+            print(f"FFmpeg audio extraction error: {result.stderr}")
+            self._clip_audio.pop(key, None)
+            return None
+        self.workspace.check_quota()
+        return str(output_path)
+
+    async def _render_plan(self, plan: RenderPlan, clip_audio_path: Optional[str],
+                           priority: int) -> List[Optional[str]]:
+        lead = max(plan.specs, key=self.platform_duration)
+        print(f"🎬 Processing clip: {lead.clip_id}")
+        
+        try:
+            # Download B-roll clips concurrently (bounded by the download semaphore)
+            downloads = await asyncio.gather(*(
+                self.download_broll_clip(
+                    footage['download_url'], f"{lead.clip_id}_{i}", footage_id=footage.get('id')
+                )
+                for i, footage in enumerate(lead.broll_footage[:3])  # Limit to 3 clips
+            ))
+            broll_paths = [path for path in downloads if path]
+            
+            if clip_audio_path is None:
+                print("❌ Clip audio unavailable")
+                return [None] * len(plan.specs)
             
             if not broll_paths:
                 print("⚠️  No B-roll footage downloaded, creating audio-only clip")
             
-            # Create captions
-            duration = spec.end_time - spec.start_time
-            caption_file = self.create_simple_caption_file(spec.transcript, duration)
+            # Downloads land in the shared cache; check before this plan writes its own files
+            self.workspace.check_quota()
+            
+            # Create captions (named per clip: several plans may render at once)
+            caption_file = self.create_simple_caption_file(
+                lead.transcript, plan.duration, name=f"{lead.clip_id}_captions"
+            )
             
             # Create output path
-            output_path = self.temp_dir / f"{spec.clip_id}_{spec.target_platform}.mp4"
+            output_path = self.output_path_for(lead)
             
-            # For now, create a simple video with the first B-roll clip and captions
-            if broll_paths:
-                success = await self._create_video_with_ffmpeg(
-                    broll_paths[0], 
-                    original_audio_path,
-                    spec.start_time,
-                    duration,
-                    caption_file,
-                    output_path,
-                    spec.target_platform
-                )
-                
-                if success:
-                    print(f"✅ Video created: {output_path}")
-                    return str(output_path)
+            # All B-roll shots, captions and audio in a single encode
+            success = await self._create_video_with_ffmpeg(
+                broll_paths, 
+                clip_audio_path,
+                0.0,  # the clip audio segment already starts at the clip
+                plan.duration,
+                caption_file,
+                output_path,
+                lead.target_platform,
+                priority,
+                audio_codec='copy'
+            )
+            
+            if success:
+                print(f"✅ Video created: {output_path}")
+                results = []
+                for spec in plan.specs:
+                    if spec is lead:
+                        results.append(str(output_path))
+                        continue
+                    # Same pixels, maybe shorter: remux instead of re-encoding
+                    self.workspace.check_quota()
+                    derived_path = self.output_path_for(spec)
+                    if await self._trim_copy(output_path, self.platform_duration(spec), derived_path, priority):
+                        print(f"✅ Video created: {derived_path} (stream copy)")
+                        results.append(str(derived_path))
+                    else:
+                        results.append(None)
+                self.workspace.check_quota()
+                return results
             
             print("❌ Video processing failed")
-            return None
+            return [None] * len(plan.specs)
             
+        except (EncodeQueueFull, WorkspaceQuotaExceeded):
+            raise
         except Exception as e:
             print(f"❌ Error processing clip: {e}")
-            return None
+            return [None] * len(plan.specs)
+
+    async def _trim_copy(self, source_path: Path, duration: float, output_path: Path,
+                         priority: int = EncodePriority.BATCH) -> bool:
+        """Copy the first ``duration`` seconds of a rendered video without re-encoding"""
+        cmd = [
+            'ffmpeg', '-y',
+            '-i', str(source_path),
+            '-t', str(duration),
+            '-c', 'copy',
+            '-movflags', '+faststart',
+            str(output_path)
+        ]
+        result = await self.encode_scheduler.run(cmd, priority=priority, label=f"trim {output_path.name}")
+        if not result.ok:
+            print(f"FFmpeg trim error: {result.stderr}")
+            return False
+        return True
 
-    async def _create_video_with_ffmpeg(self, video_path: str, audio_path: str, 
+    async def _create_video_with_ffmpeg(self, video_paths: List[str], audio_path: str, 
                                       start_time: float, duration: float,
-                                      caption_file: str, output_path: Path,
-                                      platform: str) -> bool:
-        """Create video using FFmpeg"""
+                                      caption_file: Optional[str], output_path: Path,
+                                      platform: str, priority: int = EncodePriority.BATCH,
+                                      audio_codec: str = 'aac') -> bool:
+        """Create video using FFmpeg: every B-roll shot, burned-in captions
+        and the clip audio in one filtergraph, so the clip is encoded once"""
         try:
             spec = self.platform_specs[platform]
             width, height = spec['resolution']
             
-            # FFmpeg command to create vertical video with captions
-            cmd = [
-                'ffmpeg', '-y',  # Overwrite output
-                '-i', video_path,  # Video input
-                '-i', audio_path,  # Audio input
-                '-ss', str(start_time),  # Start time for audio
-                '-t', str(duration),  # Duration
-                '-vf', f'scale={width}:{height}:force_original_aspect_ratio=increase,crop={width}:{height}',  # Resize and crop
-                '-c:v', 'libx264',  # Video codec
-                '-c:a', 'aac',  # Audio codec
-                '-shortest',  # Stop when shortest input ends
-                str(output_path)
-            ]
-            
-            # Run FFmpeg
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
+            cmd = build_composite_command(
+                video_paths,
+                audio_path,
+                duration,
+                width,
+                height,
+                str(output_path),
+                caption_path=caption_file,
+                audio_codec=audio_codec,
+                audio_start=start_time
             )
             
-            stdout, stderr = await process.communicate()
+            # Run FFmpeg once the scheduler grants a slot
+            result = await self.encode_scheduler.run(cmd, priority=priority, label=f"encode {output_path.name}")
             
-            if process.returncode == 0:
+            if result.ok:
                 return True
             else:
-                print(f"FFmpeg error: {stderr.decode()}")
+                print(f"FFmpeg error: {result.stderr}")
                 return False
                 
+        except EncodeQueueFull:
+            raise
         except Exception as e:
             print(f"FFmpeg execution error: {e}")
             return False
 
     def cleanup_temp_files(self):
-        """Clean up temporary files"""
-        try:
-            for file_path in self.temp_dir.glob("*"):
-                if file_path.is_file():
-                    file_path.unlink()
-            print("🧹 Temporary files cleaned up")
-        except Exception as e:
-            print(f"⚠️  Cleanup error: {e}")
+        """Remove this processor's workspace (other runs' files are untouched)"""
+        self._clip_audio.clear()
+        self.workspace.cleanup()
+        print("🧹 Temporary files cleaned up")
 
 # Test function
 async def test_video_processor():
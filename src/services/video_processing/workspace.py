@@ -0,0 +1,102 @@
+"""
+Job workspaces - isolated scratch directories with a disk quota per pipeline run
+"""
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from typing import Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+WORKSPACE_PREFIX = "job_"
+
+
+class WorkspaceQuotaExceeded(Exception):
+    """Raised when a job writes more scratch data than its quota allows"""
+
+
+class JobWorkspace:
+    """Scratch space owned by exactly one pipeline run.
+
+    Every run gets a fresh directory under ``root``, so concurrent runs never
+    share intermediate files, and :meth:`cleanup` removes only that directory.
+    Finished artifacts are moved out with :meth:`promote` into a per-job
+    output directory before the workspace is torn down.
+    """
+
+    def __init__(self, job_id: Optional[str] = None, root: Optional[str] = None,
+                 output_root: Optional[str] = None, quota_mb: Optional[float] = None):
+        self.job_id = job_id or uuid.uuid4().hex
+        self.root = Path(root or os.getenv('TEMP_PATH', 'data/temp'))
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.path = Path(tempfile.mkdtemp(prefix=f"{WORKSPACE_PREFIX}{self.job_id}_", dir=self.root))
+        self.output_dir = Path(output_root or os.getenv('PROCESSED_PATH', 'data/processed')) / self.job_id
+
+        if quota_mb is None:
+            quota_mb = float(os.getenv('JOB_DISK_QUOTA_MB', '2048'))
+        self.quota_bytes = int(quota_mb * 1024 * 1024)
+
+    def file(self, name: str) -> Path:
+        """Path for a scratch file inside this workspace"""
+        return self.path / Path(name).name
+
+    def usage_bytes(self) -> int:
+        total = 0
+        for dirpath, _, filenames in os.walk(self.path):
+            for filename in filenames:
+                try:
+                    total += os.path.getsize(os.path.join(dirpath, filename))
+                except OSError:
+                    pass  # removed while we were walking
+        return total
+
+    def check_quota(self):
+        """Raise if the workspace has outgrown its quota"""
+        used = self.usage_bytes()
+        if used > self.quota_bytes:
+            raise WorkspaceQuotaExceeded(
+                f"Job {self.job_id} uses {used / 1024 / 1024:.0f} MB of scratch space "
+                f"(quota {self.quota_bytes / 1024 / 1024:.0f} MB)"
+            )
+
+    def promote(self, path: str) -> str:
+        """Move a finished artifact out of the workspace; returns its new path"""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        destination = self.output_dir / Path(path).name
+        shutil.move(str(path), destination)
+        return str(destination)
+
+    def cleanup(self):
+        """Remove this workspace (and nothing else)"""
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def __enter__(self) -> "JobWorkspace":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.cleanup()
+
+
+def sweep_stale_workspaces(root: Optional[str] = None, max_age_hours: Optional[float] = None) -> int:
+    """Remove workspaces left behind by crashed runs; returns how many were removed"""
+    root_path = Path(root or os.getenv('TEMP_PATH', 'data/temp'))
+    if max_age_hours is None:
+        max_age_hours = float(os.getenv('WORKSPACE_MAX_AGE_HOURS', '24'))
+    if not root_path.exists():
+        return 0
+
+    cutoff = time.time() - max_age_hours * 3600
+    removed = 0
+    for path in root_path.glob(f"{WORKSPACE_PREFIX}*"):
+        try:
+            if path.is_dir() and path.stat().st_mtime < cutoff:
+                shutil.rmtree(path, ignore_errors=True)
+                removed += 1
+        except OSError:
+            pass
+    return removed
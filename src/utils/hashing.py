@@ -0,0 +1,38 @@
+"""
+Content hashing helpers
+"""
+import hashlib
+import os
+import threading
+from typing import Dict, Tuple
+
+HASH_CHUNK_SIZE = 1024 * 1024  # 1 MB
+
+_memo: Dict[Tuple[str, int, int], str] = {}
+_memo_lock = threading.Lock()
+
+
+def sha256_file(path: str) -> str:
+    """SHA-256 of a file's contents, streamed in chunks.
+
+    Results are memoised on (path, size, mtime) so repeated lookups of an
+    unchanged file do not re-read it.
+    """
+    real_path = os.path.realpath(path)
+    stat = os.stat(real_path)
+    memo_key = (real_path, stat.st_size, stat.st_mtime_ns)
+
+    with _memo_lock:
+        cached = _memo.get(memo_key)
+    if cached:
+        return cached
+
+    digest = hashlib.sha256()
+    with open(real_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    result = digest.hexdigest()
+
+    with _memo_lock:
+        _memo[memo_key] = result
+    return result
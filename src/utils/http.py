@@ -0,0 +1,41 @@
+"""
+Shared HTTP session helpers
+"""
+import asyncio
+from typing import Callable, Optional
+
+import aiohttp
+
+
+class LoopBoundSession:
+    """A pooled ``aiohttp`` session that follows the running event loop.
+
+    Sessions cannot be used across event loops, and workers that call
+    ``asyncio.run`` per job start a new loop each time. ``get()`` hands out the
+    session for the current loop, closing the previous loop's session first
+    so its connections are not leaked.
+    """
+
+    def __init__(self, factory: Callable[[], aiohttp.ClientSession]):
+        self.factory = factory
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._loop = None
+
+    async def get(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        if self._session is not None and not self._session.closed and self._loop is loop:
+            return self._session
+        await self.close()
+        self._session = self.factory()
+        self._loop = loop
+        return self._session
+
+    async def close(self):
+        session, self._session = self._session, None
+        if session is None or session.closed:
+            return
+        try:
+            await session.close()
+        except Exception as e:
+            # The old loop is gone; its sockets went with it
+            print(f"⚠️  Could not close HTTP session from a finished event loop: {e}")
@@ -0,0 +1,60 @@
+"""
+Async rate limiting helpers
+"""
+import asyncio
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """Async token bucket: ``rate`` tokens per second, bursting up to ``capacity``.
+
+    ``acquire()`` waits until a token is available, so callers can fan out
+    freely and still stay within a provider's quota.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        if rate <= 0 or capacity <= 0:
+            raise ValueError("rate and capacity must be positive")
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+        self._lock_loop = None
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _get_lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        return self._lock
+
+    async def acquire(self, tokens: float = 1.0) -> float:
+        """Take ``tokens``, sleeping as needed; returns the seconds spent waiting"""
+        waited = 0.0
+        # The lock keeps waiters in FIFO order
+        async with self._get_lock():
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                delay = max(0.0, self._blocked_until - now)
+                if delay == 0.0 and self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                if delay == 0.0:
+                    delay = (tokens - self._tokens) / self.rate
+                await asyncio.sleep(delay)
+                waited += delay
+
+    def pause(self, seconds: float):
+        """Stop handing out tokens for ``seconds`` (e.g. after an HTTP 429)"""
+        now = time.monotonic()
+        self._refill(now)
+        self._tokens = 0.0
+        self._blocked_until = max(self._blocked_until, now + seconds)
@@ -0,0 +1,51 @@
+"""
+Celery application for pipeline workers
+
+Start a worker (one pipeline at a time per process; scale with more workers):
+    celery -A src.workers.celery_app worker -Q pipeline --concurrency 1 --loglevel INFO
+"""
+import os
+
+from celery import Celery
+from celery.signals import worker_process_init
+from dotenv import load_dotenv
+
+from src.workers.tasks import JobDeferred, execute_pipeline_job
+
+load_dotenv()
+
+PIPELINE_QUEUE = os.getenv('PIPELINE_QUEUE', 'pipeline')
+
+celery_app = Celery(
+    'viral_content',
+    broker=os.getenv('CELERY_BROKER_URL', 'redis://localhost:6379/0'),
+    backend=os.getenv('CELERY_RESULT_BACKEND', 'redis://localhost:6379/0')
+)
+celery_app.conf.update(
+    task_default_queue=PIPELINE_QUEUE,
+    # A job is only acknowledged once it finished, so a crashed worker's job is redelivered
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
+    worker_prefetch_multiplier=1,
+    task_ignore_result=True,  # job state lives in the job store
+)
+
+
+@worker_process_init.connect
+def warm_worker_models(**_):
+    """Load shared models once per worker process, before the first job"""
+    from src.core.model_registry import get_model_registry, startup_models
+    try:
+        get_model_registry().warm(startup_models())
+    except Exception as e:
+        print(f"⚠️  Worker model warm-up failed: {e}")
+
+
+@celery_app.task(name='pipeline.run_job', bind=True, max_retries=None)
+def run_pipeline_job(self, job_id: str) -> str:
+    try:
+        execute_pipeline_job(job_id)
+    except JobDeferred as e:
+        # Re-enqueue with a countdown; the job store caps the number of attempts
+        raise self.retry(countdown=e.retry_in)
+    return job_id
@@ -0,0 +1,180 @@
+"""
+Pipeline job records and durable job state stores
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class JobStatus:
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+    FINISHED = (SUCCEEDED, FAILED)
+
+
+class JobNotFound(Exception):
+    """Raised when a job id is unknown to the store"""
+
+
+@dataclass
+class JobRecord:
+    job_id: str
+    audio_path: str
+    podcaster: str = "unknown"
+    platforms: List[str] = field(default_factory=lambda: ["tiktok"])
+    status: str = JobStatus.QUEUED
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    attempts: int = 0
+    worker: Optional[str] = None
+    result: Optional[Dict] = None
+    error: Optional[str] = None
+    metadata: Dict = field(default_factory=dict)
+
+    @staticmethod
+    def new_id() -> str:
+        return uuid.uuid4().hex
+
+    @property
+    def finished(self) -> bool:
+        return self.status in JobStatus.FINISHED
+
+    def describe(self) -> Dict:
+        """Status view without the (possibly large) result payload"""
+        data = asdict(self)
+        data.pop("result")
+        if self.started_at:
+            data["queue_seconds"] = round(self.started_at - self.created_at, 3)
+        if self.started_at and self.finished_at:
+            data["run_seconds"] = round(self.finished_at - self.started_at, 3)
+        return data
+
+
+class JobStore(ABC):
+    """Durable job state shared by the API and the workers"""
+
+    @abstractmethod
+    def save(self, job: JobRecord):
+        ...
+
+    @abstractmethod
+    def load(self, job_id: str) -> JobRecord:
+        ...
+
+    @abstractmethod
+    def iter_jobs(self, statuses: Optional[Iterable[str]] = None) -> Iterator[JobRecord]:
+        """Every stored job, optionally only those in ``statuses``"""
+
+    def update(self, job_id: str, **changes) -> JobRecord:
+        job = self.load(job_id)
+        for name, value in changes.items():
+            setattr(job, name, value)
+        self.save(job)
+        return job
+
+
+class FileJobStore(JobStore):
+    """One JSON file per job; survives restarts and is visible to workers on the same host"""
+
+    def __init__(self, jobs_dir: Optional[str] = None):
+        self.jobs_dir = Path(jobs_dir or os.getenv('JOB_STORE_DIR', 'data/jobs'))
+        self.jobs_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def _path(self, job_id: str) -> Path:
+        if not job_id.isalnum():
+            raise JobNotFound(job_id)
+        return self.jobs_dir / f"{job_id}.json"
+
+    def save(self, job: JobRecord):
+        path = self._path(job.job_id)
+        tmp_path = self.jobs_dir / f".{job.job_id}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(asdict(job), f)
+        os.replace(tmp_path, path)
+
+    def load(self, job_id: str) -> JobRecord:
+        try:
+            with open(self._path(job_id)) as f:
+                return JobRecord(**json.load(f))
+        except FileNotFoundError:
+            raise JobNotFound(job_id)
+
+    def iter_jobs(self, statuses: Optional[Iterable[str]] = None) -> Iterator[JobRecord]:
+        wanted = set(statuses) if statuses is not None else None
+        for path in self.jobs_dir.glob('*.json'):
+            try:
+                job = self.load(path.stem)
+            except (JobNotFound, json.JSONDecodeError, TypeError):
+                continue
+            if wanted is None or job.status in wanted:
+                yield job
+
+    def update(self, job_id: str, **changes) -> JobRecord:
+        with self._lock:
+            return super().update(job_id, **changes)
+
+
+class RedisJobStore(JobStore):
+    """Job state in Redis, for API and workers spread over several hosts"""
+
+    def __init__(self, url: Optional[str] = None, prefix: str = "pipeline:job:",
+                 ttl_seconds: Optional[int] = None):
+        import redis
+        self.client = redis.Redis.from_url(url or os.getenv('REDIS_URL', 'redis://localhost:6379/0'))
+        self.prefix = prefix
+        self.ttl_seconds = ttl_seconds or int(os.getenv('JOB_TTL_SECONDS', str(7 * 24 * 3600)))
+
+    def save(self, job: JobRecord):
+        self.client.set(self.prefix + job.job_id, json.dumps(asdict(job)), ex=self.ttl_seconds)
+
+    def load(self, job_id: str) -> JobRecord:
+        raw = self.client.get(self.prefix + job_id)
+        if raw is None:
+            raise JobNotFound(job_id)
+        return JobRecord(**json.loads(raw))
+
+    def iter_jobs(self, statuses: Optional[Iterable[str]] = None) -> Iterator[JobRecord]:
+        wanted = set(statuses) if statuses is not None else None
+        for key in self.client.scan_iter(match=self.prefix + '*'):
+            try:
+                job = self.load(key.decode('utf-8')[len(self.prefix):])
+            except JobNotFound:
+                continue  # expired between scan and load
+            if wanted is None or job.status in wanted:
+                yield job
+
+
+_store: Optional[JobStore] = None
+
+
+def create_job_store(kind: Optional[str] = None) -> JobStore:
+    """Job store named by ``kind`` or JOB_STORE (file | redis)"""
+    kind = (kind or os.getenv('JOB_STORE', 'file')).lower()
+    if kind == 'redis':
+        return RedisJobStore()
+    if kind == 'file':
+        return FileJobStore()
+    raise ValueError(f"Unknown job store '{kind}'. Choose from: file, redis")
+
+
+def get_job_store() -> JobStore:
+    """Return the process-wide job store"""
+    global _store
+    if _store is None:
+        _store = create_job_store()
+    return _store
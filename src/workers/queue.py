@@ -0,0 +1,195 @@
+"""
+Pipeline job queue - submits jobs to a broker and tracks them in the job store
+"""
+import multiprocessing
+import os
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from src.workers.jobs import JobRecord, JobStatus, JobStore, get_job_store
+from src.workers.tasks import JOB_MAX_ATTEMPTS, JobDeferred, execute_pipeline_job
+
+load_dotenv()
+
+
+class JobBroker(ABC):
+    """Delivers job ids to worker processes"""
+
+    name = "base"
+
+    # True when the workers live and die with this process, so jobs that were
+    # queued or running when it stopped can only be finished by re-dispatching
+    owns_workers = False
+
+    @abstractmethod
+    def dispatch(self, job_id: str):
+        ...
+
+    def shutdown(self):
+        pass
+
+
+class CeleryBroker(JobBroker):
+    """Production broker: Celery over Redis, workers on any number of hosts"""
+
+    name = "celery"
+
+    def __init__(self):
+        from src.workers.celery_app import celery_app, PIPELINE_QUEUE
+        self.celery_app = celery_app
+        self.queue = PIPELINE_QUEUE
+
+    def dispatch(self, job_id: str):
+        self.celery_app.send_task('pipeline.run_job', args=[job_id], queue=self.queue)
+
+
+class LocalBroker(JobBroker):
+    """In-process stand-in for Celery: a pool of local worker processes.
+
+    Useful for development and tests; state still goes through the job store,
+    so the API code path is identical to production.
+    """
+
+    name = "local"
+    owns_workers = True
+
+    def __init__(self, workers: Optional[int] = None):
+        workers = workers or int(os.getenv('JOB_LOCAL_WORKERS', '1'))
+        # spawn: never fork a process that is running an event loop and threads
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context('spawn')
+        )
+        self.futures: Dict[str, Future] = {}
+        self._retry_timers: Dict[str, threading.Timer] = {}
+        self._closed = False
+
+    def dispatch(self, job_id: str):
+        future = self.executor.submit(execute_pipeline_job, job_id)
+        self.futures[job_id] = future
+        future.add_done_callback(lambda done: self._on_done(job_id, done))
+
+    def _on_done(self, job_id: str, future: Future):
+        self.futures.pop(job_id, None)
+        if future.cancelled() or self._closed:
+            return
+        error = future.exception()
+        if isinstance(error, JobDeferred):
+            # Same contract as Celery's retry(countdown=...)
+            timer = threading.Timer(error.retry_in, self._redispatch, args=(job_id,))
+            timer.daemon = True
+            self._retry_timers[job_id] = timer
+            timer.start()
+
+    def _redispatch(self, job_id: str):
+        self._retry_timers.pop(job_id, None)
+        if not self._closed:
+            self.dispatch(job_id)
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[JobRecord]:
+        """Block until a dispatched job finishes (``None`` if it already has)"""
+        future = self.futures.get(job_id)
+        return future.result(timeout=timeout) if future else None
+
+    def shutdown(self):
+        self._closed = True
+        for timer in list(self._retry_timers.values()):
+            timer.cancel()
+        self._retry_timers.clear()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+JOB_BROKERS = {
+    CeleryBroker.name: CeleryBroker,
+    LocalBroker.name: LocalBroker
+}
+
+
+class JobQueue:
+    def __init__(self, store: Optional[JobStore] = None, broker: Optional[JobBroker] = None):
+        self.store = store or get_job_store()
+        self.broker = broker or create_job_broker()
+
+    def submit(self, audio_path: str, podcaster: str = "unknown",
+               platforms: Optional[List[str]] = None, metadata: Optional[Dict] = None) -> JobRecord:
+        """Record a new job and hand it to the broker; returns immediately"""
+        job = JobRecord(
+            job_id=JobRecord.new_id(),
+            audio_path=audio_path,
+            podcaster=podcaster,
+            platforms=platforms or ["tiktok"],
+            metadata=metadata or {}
+        )
+        self.store.save(job)
+
+        try:
+            self.broker.dispatch(job.job_id)
+        except Exception as e:
+            print(f"❌ Could not enqueue job {job.job_id}: {e}")
+            return self.store.update(job.job_id, status=JobStatus.FAILED, error=f"Enqueue failed: {e}")
+
+        print(f"📥 Queued job {job.job_id} via {self.broker.name}")
+        return job
+
+    def get(self, job_id: str) -> JobRecord:
+        return self.store.load(job_id)
+
+    def recover_orphaned_jobs(self) -> Dict[str, int]:
+        """Re-dispatch jobs a previous process left queued or running.
+
+        Only brokers whose workers die with this process need this (the local
+        broker); Celery redelivers unacknowledged messages itself. Assumes a
+        single API process owns the job store, as the local broker does.
+        """
+        counts = {"requeued": 0, "failed": 0}
+        if not self.broker.owns_workers:
+            return counts
+
+        for job in self.store.iter_jobs([JobStatus.QUEUED, JobStatus.RUNNING]):
+            if job.attempts >= JOB_MAX_ATTEMPTS:
+                self.store.update(job.job_id, status=JobStatus.FAILED,
+                                  error=f"Abandoned after {job.attempts} attempts (worker restarted)")
+                counts["failed"] += 1
+                continue
+            if job.status == JobStatus.RUNNING:
+                self.store.update(job.job_id, status=JobStatus.QUEUED, worker=None)
+            try:
+                self.broker.dispatch(job.job_id)
+                counts["requeued"] += 1
+            except Exception as e:
+                self.store.update(job.job_id, status=JobStatus.FAILED, error=f"Enqueue failed: {e}")
+                counts["failed"] += 1
+        return counts
+
+    def shutdown(self):
+        self.broker.shutdown()
+
+
+def create_job_broker(name: Optional[str] = None) -> JobBroker:
+    """Broker named by ``name`` or JOB_BROKER (celery | local)"""
+    name = (name or os.getenv('JOB_BROKER', 'local')).lower()
+    if name not in JOB_BROKERS:
+        raise ValueError(f"Unknown job broker '{name}'. Choose from: {', '.join(JOB_BROKERS)}")
+    return JOB_BROKERS[name]()
+
+
+_queue: Optional[JobQueue] = None
+
+
+def get_job_queue() -> JobQueue:
+    """Return the process-wide job queue"""
+    global _queue
+    if _queue is None:
+        _queue = JobQueue()
+    return _queue
+
+
+def shutdown_job_queue():
+    """Stop the process-wide queue's broker, if one was started"""
+    global _queue
+    if _queue is not None:
+        _queue.shutdown()
+        _queue = None
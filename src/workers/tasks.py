@@ -0,0 +1,103 @@
+"""
+Pipeline job execution - shared by every broker's worker processes
+"""
+import asyncio
+import os
+import socket
+import time
+from typing import Optional
+
+from dotenv import load_dotenv
+
+from src.services.video_processing.encode_scheduler import EncodeQueueFull
+from src.workers.jobs import JobRecord, JobStatus, JobStore, get_job_store
+
+load_dotenv()
+
+JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', '5'))
+JOB_RETRY_BASE_SECONDS = float(os.getenv('JOB_RETRY_BASE_SECONDS', '30'))
+JOB_RETRY_MAX_SECONDS = float(os.getenv('JOB_RETRY_MAX_SECONDS', '600'))
+
+
+class JobDeferred(Exception):
+    """The job could not run now (e.g. the render queue is full); retry it later"""
+
+    def __init__(self, job_id: str, reason: str, retry_in: float):
+        super().__init__(job_id, reason, retry_in)
+        self.job_id = job_id
+        self.reason = reason
+        self.retry_in = retry_in
+
+    def __str__(self):
+        return f"Job {self.job_id} deferred for {self.retry_in:.0f}s: {self.reason}"
+
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff after ``attempts`` runs"""
+    return min(JOB_RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0), JOB_RETRY_MAX_SECONDS)
+
+
+def worker_name() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def execute_pipeline_job(job_id: str, store: Optional[JobStore] = None) -> JobRecord:
+    """Run ``ViralContentPipeline`` for a queued job and record the outcome.
+
+    Safe to call again for a job that already finished (e.g. a redelivered
+    message): it returns the stored record without re-running. When the render
+    queue is full the job goes back to ``queued`` and :class:`JobDeferred` is
+    raised so the broker can redeliver it after a backoff.
+    """
+    # Imported here so the API process can enqueue jobs without loading the pipeline
+    from src.services.orchestration.pipeline import ViralContentPipeline
+    from src.services.clip_detection.detection_pool import configure_detection_pool, get_detection_pool
+
+    if get_detection_pool().workers != 0:
+        # This process is already a dedicated worker; detect here rather than in a nested pool
+        configure_detection_pool(0)
+
+    store = store or get_job_store()
+    job = store.load(job_id)
+    if job.finished:
+        return job
+
+    job = store.update(
+        job_id,
+        status=JobStatus.RUNNING,
+        started_at=time.time(),
+        attempts=job.attempts + 1,
+        worker=worker_name()
+    )
+    print(f"👷 Worker {job.worker} running job {job_id}")
+
+    try:
+        pipeline = ViralContentPipeline()
+        results = asyncio.run(pipeline.process_audio_file(
+            job.audio_path, job.podcaster, job.platforms, job_id=job.job_id
+        ))
+    except EncodeQueueFull as e:
+        # Backpressure, not a failure: give the render queue time to drain
+        if job.attempts >= JOB_MAX_ATTEMPTS:
+            print(f"❌ Job {job_id} gave up after {job.attempts} attempts: render queue full")
+            return store.update(job_id, status=JobStatus.FAILED, finished_at=time.time(),
+                                error=f"Render queue full after {job.attempts} attempts: {e}")
+        retry_in = retry_delay(job.attempts)
+        store.update(job_id, status=JobStatus.QUEUED, worker=None,
+                     error=f"Render queue full, retrying in {retry_in:.0f}s: {e}")
+        print(f"⏳ Job {job_id} deferred for {retry_in:.0f}s: render queue full")
+        raise JobDeferred(job_id, str(e), retry_in)
+    except Exception as e:
+        print(f"❌ Job {job_id} failed: {e}")
+        return store.update(job_id, status=JobStatus.FAILED, finished_at=time.time(), error=str(e))
+
+    status = JobStatus.FAILED if results.get("error") else JobStatus.SUCCEEDED
+    job = store.update(
+        job_id,
+        status=status,
+        finished_at=time.time(),
+        result=results,
+        error=results.get("error")
+    )
+    print(f"✅ Job {job_id} {status}")
+    return job
@@ -24,6 +24,7 @@ async def test_complete_system():
         matcher = BRollMatcher()
         test_keywords = ["productivity", "focus"]
         footage = await matcher.find_broll_for_keywords(test_keywords)
+        await matcher.close()
         print(f"   ✅ Found {len(footage)} B-roll clips for: {test_keywords}")
         
         # Test 3: Video Processing
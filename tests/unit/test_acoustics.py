@@ -0,0 +1,84 @@
+"""
+Tests for the streaming acoustic feature engine
+"""
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+pytest.importorskip("librosa")
+
+from src.services.clip_detection import acoustics
+from src.services.clip_detection.acoustics import (
+    AcousticAnalyzer, FRAMES_PER_CELL, HOP_LENGTH, PITCH_FRAME_LENGTH, SAMPLE_RATE
+)
+
+CELL_SAMPLES = HOP_LENGTH * FRAMES_PER_CELL
+
+
+def stream_blocks(samples: np.ndarray, block_samples: int):
+    """Blocks shaped like ``AcousticAnalyzer._stream_blocks`` output"""
+    for start in range(0, len(samples), block_samples):
+        body = samples[start:start + block_samples]
+        lookahead = samples[start + block_samples:start + block_samples + PITCH_FRAME_LENGTH]
+        yield np.concatenate([body, lookahead]), len(body)
+
+
+def speech_like(n_samples: int, seed: int = 3) -> np.ndarray:
+    rnd = np.random.default_rng(seed)
+    t = np.arange(n_samples) / SAMPLE_RATE
+    tone = 0.3 * np.sin(2 * np.pi * 140 * t) * (np.sin(2 * np.pi * 2 * t) > 0)
+    return (tone + 0.01 * rnd.standard_normal(n_samples)).astype(np.float32)
+
+
+@pytest.mark.parametrize("n_samples", [80000, 80100, 80800, 80900, 1040300, 1601])
+def test_partial_final_cell_is_analyzed(tmp_path, monkeypatch, n_samples):
+    analyzer = AcousticAnalyzer(cache_dir=str(tmp_path / "cache"), block_seconds=60.0)
+    samples = speech_like(n_samples)
+    monkeypatch.setattr(analyzer, "_stream_blocks", lambda path: stream_blocks(samples, analyzer.block_samples))
+
+    audio = tmp_path / f"episode_{n_samples}.raw"
+    audio.write_bytes(samples.tobytes())
+    profile = analyzer.analyze(str(audio))
+
+    assert profile.n_cells == int(np.ceil(n_samples / CELL_SAMPLES))
+    assert profile.duration == pytest.approx(n_samples / SAMPLE_RATE)
+    # Frames past the end of the audio are not counted
+    assert profile.cumulative['frames'][-1] == int(np.ceil(n_samples / HOP_LENGTH))
+
+
+def test_window_scores_cover_the_final_partial_cell(tmp_path, monkeypatch):
+    analyzer = AcousticAnalyzer(cache_dir=str(tmp_path / "cache"))
+    samples = speech_like(80100)
+    monkeypatch.setattr(analyzer, "_stream_blocks", lambda path: stream_blocks(samples, analyzer.block_samples))
+    audio = tmp_path / "episode.raw"
+    audio.write_bytes(samples.tobytes())
+
+    profile = analyzer.analyze(str(audio))
+    scores = profile.window_scores(np.array([0.0, 2.0]), np.array([5.0, 5.006]))
+    assert set(scores) == {'speaker_energy', 'acoustic_intensity'}
+    assert all(np.isfinite(values).all() for values in scores.values())
+
+
+def failing_decoder(partial_samples: int):
+    """Popen stand-in for an ffmpeg that writes some audio, then fails"""
+    real_popen = subprocess.Popen
+    script = (
+        "import sys; "
+        f"sys.stdout.buffer.write(b'\\0' * {partial_samples * 4}); "
+        "sys.stderr.write('Invalid data found when processing input'); sys.exit(1)"
+    )
+    return lambda cmd, **kwargs: real_popen([sys.executable, '-c', script], **kwargs)
+
+
+@pytest.mark.parametrize("partial_samples", [0, 16000])
+def test_failed_decode_is_raised_and_not_cached(tmp_path, monkeypatch, partial_samples):
+    analyzer = AcousticAnalyzer(cache_dir=str(tmp_path / "cache"))
+    monkeypatch.setattr(acoustics.subprocess, "Popen", failing_decoder(partial_samples))
+    audio = tmp_path / "broken.mp3"
+    audio.write_bytes(b"not audio")
+
+    with pytest.raises(RuntimeError, match="Invalid data"):
+        analyzer.analyze(str(audio))
+    assert list((tmp_path / "cache").iterdir()) == []
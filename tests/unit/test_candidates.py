@@ -0,0 +1,84 @@
+"""
+Tests for sentence-snapped window enumeration and top-k selection
+"""
+import numpy as np
+
+from src.services.clip_detection.candidates import (
+    TranscriptSentence, enumerate_windows, select_top_k, split_into_sentences
+)
+
+
+def sentences_of(lengths):
+    sentences, t = [], 0.0
+    for i, length in enumerate(lengths):
+        sentences.append(TranscriptSentence(t, t + length, f"Sentence {i}."))
+        t += length
+    return sentences
+
+
+def brute_force_windows(sentences, min_duration, max_duration):
+    return [
+        (i, j)
+        for i in range(len(sentences))
+        for j in range(i, len(sentences))
+        if min_duration <= sentences[j].end - sentences[i].start <= max_duration
+    ]
+
+
+def test_windows_are_every_sentence_run_within_bounds():
+    sentences = sentences_of([4.0, 7.5, 3.0, 12.0, 5.0, 9.0, 2.5])
+
+    first, last = enumerate_windows(sentences, 10.0, 20.0)
+
+    assert list(zip(first.tolist(), last.tolist())) == brute_force_windows(sentences, 10.0, 20.0)
+    durations = np.array([sentences[j].end - sentences[i].start for i, j in zip(first, last)])
+    assert durations.min() >= 10.0 and durations.max() <= 20.0
+
+
+def test_window_bounds_are_inclusive_and_empty_inputs_are_safe():
+    sentences = sentences_of([5.0, 5.0, 5.0])
+
+    first, last = enumerate_windows(sentences, 10.0, 10.0)
+    assert list(zip(first.tolist(), last.tolist())) == [(0, 1), (1, 2)]
+
+    first, last = enumerate_windows(sentences, 30.0, 60.0)
+    assert len(first) == len(last) == 0
+    assert len(enumerate_windows([], 10.0, 20.0)[0]) == 0
+
+
+def test_unpunctuated_speech_is_split_by_duration():
+    segments = [{'start': float(i), 'end': float(i + 1), 'text': f" word{i}"} for i in range(40)]
+
+    sentences = split_into_sentences(segments, max_sentence_duration=15.0)
+
+    assert [s.end - s.start for s in sentences] == [15.0, 15.0, 10.0]
+
+
+def test_top_k_is_best_first_without_overlap():
+    starts = np.array([0.0, 5.0, 20.0, 30.0, 45.0])
+    ends = np.array([20.0, 25.0, 40.0, 50.0, 60.0])
+    scores = np.array([0.6, 0.9, 0.7, 0.8, 0.5])
+
+    # 1 wins, which suppresses 0 and 2 (they overlap it); 3 then suppresses 4
+    assert select_top_k(starts, ends, scores, k=5) == [1, 3]
+    assert select_top_k(starts, ends, scores, k=1) == [1]
+
+
+def test_top_k_tolerates_the_allowed_overlap():
+    starts = np.array([0.0, 15.0, 30.0])
+    ends = np.array([20.0, 35.0, 50.0])
+    scores = np.array([0.9, 0.8, 0.7])
+
+    assert select_top_k(starts, ends, scores, k=3, max_overlap=0.0) == [0, 2]
+    # 5s of a 20s clip is a 25% overlap
+    assert select_top_k(starts, ends, scores, k=3, max_overlap=0.25) == [0, 1, 2]
+    assert select_top_k(starts, ends, scores, k=0) == []
+    assert select_top_k(starts[:0], ends[:0], scores[:0], k=3) == []
+
+
+def test_equal_scores_keep_the_earlier_window():
+    starts = np.array([0.0, 10.0, 40.0])
+    ends = np.array([20.0, 30.0, 60.0])
+    scores = np.array([0.5, 0.5, 0.5])
+
+    assert select_top_k(starts, ends, scores, k=3) == [0, 2]
@@ -0,0 +1,90 @@
+"""
+Tests for silence-aligned chunk planning, stitching and the worker budget
+"""
+import multiprocessing
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from src.services.clip_detection import chunked_transcription
+from src.services.clip_detection.chunked_transcription import (
+    VAD_FRAME_SECONDS, ChunkedTranscriber, plan_chunks, stitch_segments, transcribe_worker_share
+)
+from src.services.clip_detection.detection_pool import DetectionPool
+
+
+def speech_with_pauses(seconds: float, pause_every: float) -> np.ndarray:
+    levels = np.full(int(seconds / VAD_FRAME_SECONDS), -20.0)
+    for t in np.arange(pause_every, seconds, pause_every):
+        i = int(t / VAD_FRAME_SECONDS)
+        levels[i - 20:i + 20] = -70.0
+    return levels
+
+
+def test_chunks_are_cut_in_pauses_and_cover_the_episode():
+    chunks = plan_chunks(speech_with_pauses(3600, 590), chunk_seconds=600, overlap_seconds=5)
+    assert chunks[0].core_start == 0.0
+    assert abs(chunks[-1].core_end - 3600) < 0.1
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert chunk.core_start == previous.core_end
+        assert abs(chunk.core_start % 590) < 1.0 or abs(chunk.core_start % 590 - 590) < 1.0
+        assert chunk.start == chunk.core_start - 5
+
+
+def test_stitching_keeps_each_overlapping_word_once():
+    chunks = plan_chunks(speech_with_pauses(1800, 590), chunk_seconds=600, overlap_seconds=5)
+    words = [(t, t + 0.4, f" w{int(t)}") for t in np.arange(0.0, chunks[-1].core_end - 1, 1.0)]
+
+    results = []
+    for chunk in chunks:
+        local = [
+            {"start": s - chunk.start, "end": e - chunk.start, "word": w, "probability": 1.0}
+            for s, e, w in words if chunk.start <= s and e <= chunk.end
+        ]
+        results.append({"segments": [{
+            "start": local[0]["start"], "end": local[-1]["end"],
+            "text": "".join(word["word"] for word in local), "words": local
+        }], "language": "en"})
+
+    stitched = stitch_segments(chunks, results)
+    assert stitched["text"] == "".join(w for _, _, w in words)
+    assert stitched["language"] == "en"
+
+
+def test_detection_workers_split_the_transcription_budget(monkeypatch):
+    monkeypatch.setenv("TRANSCRIBE_WORKERS", "4")
+    assert transcribe_worker_share(1) == 4
+    assert transcribe_worker_share(2) == 2
+    assert transcribe_worker_share(4) == 1
+    pool = DetectionPool(workers=4, warm_models=[])
+    # Four detectors with one chunk worker each: every episode goes single pass
+    assert pool.transcribe_workers == 1
+    assert not ChunkedTranscriber(workers=pool.transcribe_workers).enabled
+
+
+def test_daemonic_processes_transcribe_in_a_single_pass(monkeypatch):
+    assert ChunkedTranscriber(workers=2).enabled
+    monkeypatch.setattr(multiprocessing.current_process(), "daemon", True, raising=False)
+    assert not ChunkedTranscriber(workers=2).enabled
+
+
+def test_configure_replaces_and_closes_the_shared_transcriber():
+    first = chunked_transcription.configure_chunked_transcriber(3)
+    assert chunked_transcription.get_chunked_transcriber() is first
+    chunked_transcription.close_chunked_transcriber()
+    assert chunked_transcription.get_chunked_transcriber() is not first
+    chunked_transcription.close_chunked_transcriber()
+
+
+def test_failed_decode_raises_instead_of_planning_nothing(tmp_path, monkeypatch):
+    real_popen = subprocess.Popen
+    script = "import sys; sys.stderr.write('moov atom not found'); sys.exit(1)"
+    monkeypatch.setattr(
+        chunked_transcription.subprocess, "Popen",
+        lambda cmd, **kwargs: real_popen([sys.executable, '-c', script], **kwargs)
+    )
+
+    with pytest.raises(RuntimeError, match="moov atom not found"):
+        ChunkedTranscriber(workers=2).plan(str(tmp_path / "broken.m4a"))
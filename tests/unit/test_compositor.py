@@ -0,0 +1,68 @@
+"""
+Tests for the single-pass ffmpeg compositor command
+"""
+from src.services.video_processing.compositor import (
+    build_composite_command, escape_filter_value, shot_durations
+)
+
+
+def option_values(cmd, option):
+    return [cmd[i + 1] for i, arg in enumerate(cmd) if arg == option]
+
+
+def test_shot_durations_cover_the_clip():
+    assert shot_durations(10.0, 3) == [3.333, 3.333, 3.334]
+    assert sum(shot_durations(10.0, 3)) == 10.0
+    assert shot_durations(10.0, 0) == []
+
+
+def test_every_shot_is_looped_trimmed_and_concatenated():
+    cmd = build_composite_command(
+        ['a.mp4', 'b.mp4'], 'clip.m4a', 20.0, 1080, 1920, 'out.mp4'
+    )
+
+    assert option_values(cmd, '-i') == ['a.mp4', 'b.mp4', 'clip.m4a']
+    assert option_values(cmd, '-stream_loop') == ['-1', '-1']
+    filters = option_values(cmd, '-filter_complex')[0].split(';')
+    assert filters[0] == (
+        "[0:v]trim=duration=10.0,setpts=PTS-STARTPTS,"
+        "scale=1080:1920:force_original_aspect_ratio=increase,crop=1080:1920,"
+        "fps=30,setsar=1,format=yuv420p[v0]"
+    )
+    assert filters[1].startswith("[1:v]trim=duration=10.0,") and filters[1].endswith("[v1]")
+    assert filters[2] == "[v0][v1]concat=n=2:v=1:a=0[vcat]"
+    # Audio is the input after the shots, copied as-is; video is the concat output
+    assert option_values(cmd, '-map') == ['[vcat]', '2:a:0']
+    assert option_values(cmd, '-c:a') == ['copy']
+    assert option_values(cmd, '-c:v') == ['libx264']
+    assert cmd[-1] == 'out.mp4' and cmd[cmd.index('-t', cmd.index('-filter_complex')) + 1] == '20.0'
+    assert '-ss' not in cmd
+
+
+def test_no_broll_renders_on_a_plain_background():
+    cmd = build_composite_command([], 'clip.m4a', 15.0, 1080, 1920, 'out.mp4', audio_start=4.5)
+
+    assert cmd[cmd.index('-f') + 1] == 'lavfi'
+    assert option_values(cmd, '-i')[0] == "color=c=black:s=1080x1920:r=30:d=15.0"
+    assert option_values(cmd, '-filter_complex') == ["[0:v]format=yuv420p[vcat]"]
+    assert option_values(cmd, '-map') == ['[vcat]', '1:a:0']
+    # Input-side seek applies to the audio input only
+    assert cmd[cmd.index('-ss'):cmd.index('-ss') + 4] == ['-ss', '4.5', '-i', 'clip.m4a']
+
+
+def test_captions_are_burned_in_with_escaped_paths():
+    cmd = build_composite_command(
+        ['a.mp4'], 'clip.m4a', 5.0, 1080, 1920, 'out.mp4',
+        caption_path="/tmp/it's:here.srt", caption_style="FontSize=16", audio_codec='aac'
+    )
+
+    filters = option_values(cmd, '-filter_complex')[0].split(';')
+    assert filters[-1] == (
+        "[vcat]subtitles=filename='/tmp/it'\\''s\\:here.srt':force_style='FontSize=16'[vout]"
+    )
+    assert option_values(cmd, '-map') == ['[vout]', '1:a:0']
+    assert option_values(cmd, '-c:a') == ['aac']
+
+
+def test_escape_filter_value():
+    assert escape_filter_value("C:\\clips\\a'b") == "C\\:\\\\clips\\\\a'\\''b"
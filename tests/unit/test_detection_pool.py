@@ -0,0 +1,78 @@
+"""
+Tests for dispatching detection work to warm worker processes
+"""
+import asyncio
+import os
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from src.services.clip_detection import detection_pool
+from src.services.clip_detection import detector as detector_module
+from src.services.clip_detection.detection_pool import DetectionPool
+from src.services.clip_detection.detector import EnhancedClipDetector
+from src.services.clip_detection.keywords import KeywordExtractor
+from src.services.clip_detection.transcript_cache import TranscriptCache
+
+
+class StubKeywords(KeywordExtractor):
+    name = "stub"
+
+    async def extract_many(self, texts, context=None):
+        return [["topic"] for _ in texts]
+
+
+def test_in_process_pool_runs_jobs_in_a_thread(monkeypatch):
+    calls = []
+
+    def find_candidates(*args):
+        calls.append((args, os.getpid()))
+        return [], ["sentence"]
+
+    monkeypatch.setattr(detection_pool, '_find_candidates', find_candidates)
+    pool = DetectionPool(workers=0, warm_models=[])
+
+    result = asyncio.run(pool.find_clip_candidates("episode.mp3", 15.0, 90.0, 5, 0.0, "base", "large-v3"))
+
+    assert result == ([], ["sentence"])
+    assert calls == [(("episode.mp3", 15.0, 90.0, 5, 0.0, "base", "large-v3"), os.getpid())]
+    assert pool.describe()["workers"] == 0 and pool.stats["completed"] == 1
+
+
+def test_async_detection_forwards_both_model_sizes(monkeypatch, tmp_path):
+    monkeypatch.setattr(detector_module, 'DEPENDENCIES_AVAILABLE', True)
+    submitted = []
+
+    class RecordingPool:
+        async def find_clip_candidates(self, *args):
+            submitted.append(args)
+            return [], []
+
+    detector = EnhancedClipDetector(
+        whisper_model_size="base", refine_model_size="large-v3",
+        keyword_extractor=StubKeywords(), detection_pool=RecordingPool(),
+        transcript_cache=TranscriptCache(cache_dir=str(tmp_path))
+    )
+    assert asyncio.run(detector.detect_clips_async("episode.mp3")) == []
+    assert submitted[0][-2:] == ("base", "large-v3")
+
+
+def test_jobs_run_in_worker_processes_and_a_crash_resets_the_pool():
+    pool = DetectionPool(workers=1, warm_models=[])
+
+    async def run():
+        worker_pid = await pool._submit(os.getpid)
+        with pytest.raises(BrokenProcessPool):
+            # A worker dying mid-job (e.g. the OOM killer) breaks the whole executor
+            await pool._submit(os._exit, 1)
+        fresh_pid = await pool._submit(os.getpid)
+        return worker_pid, fresh_pid
+
+    try:
+        worker_pid, fresh_pid = asyncio.run(run())
+    finally:
+        pool.close()
+
+    assert worker_pid != os.getpid()
+    assert fresh_pid not in (worker_pid, os.getpid())
+    assert pool.stats["restarts"] == 1 and pool.stats["completed"] == 2
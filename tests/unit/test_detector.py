@@ -0,0 +1,162 @@
+"""
+Tests for clip selection and transcript refinement in the clip detector
+"""
+from contextlib import contextmanager
+
+import numpy as np
+
+from src.services.clip_detection import detector as detector_module
+from src.services.clip_detection.asr import ASRBackend, text_between
+from src.services.clip_detection.detector import ClipCandidate, EnhancedClipDetector
+from src.services.clip_detection.keywords import KeywordExtractor
+from src.services.clip_detection.transcript_cache import TranscriptCache
+
+
+class StubKeywords(KeywordExtractor):
+    name = "stub"
+
+    async def extract_many(self, texts, context=None):
+        return [["topic"] for _ in texts]
+
+
+class FixedScores:
+    """TokenFeatures stand-in that gives each window a preset score"""
+
+    def __init__(self, scores):
+        self.scores = np.asarray(scores, dtype=np.float64)
+
+    def score_windows(self, start, end):
+        return {'virality': self.scores[:len(start)]}
+
+    def text(self, start, end):
+        return f"tokens {start}-{end}"
+
+
+class FakeBackend(ASRBackend):
+    """Answers every slice with the same slice-relative words"""
+
+    family = "fake"
+
+    def __init__(self, words=None, error=None):
+        self.words = words or []
+        self.error = error
+        self.calls = []
+
+    def transcribe(self, model, audio, **options):
+        self.calls.append((model, len(audio)))
+        if self.error is not None:
+            raise self.error
+        words = [{"start": start, "end": end, "word": word, "probability": 1.0}
+                 for start, end, word in self.words]
+        return {"text": "".join(w["word"] for w in words), "language": "en",
+                "segments": [{"id": 0, "start": 0.0, "end": 30.0, "text": "", "words": words}]}
+
+
+class StubRegistry:
+    @contextmanager
+    def borrow(self, name):
+        yield name
+
+
+def make_detector(tmp_path, monkeypatch, **kwargs) -> EnhancedClipDetector:
+    # The heavy model packages are only needed to load real models
+    monkeypatch.setattr(detector_module, 'DEPENDENCIES_AVAILABLE', True)
+    kwargs.setdefault('transcript_cache', TranscriptCache(cache_dir=str(tmp_path / "transcripts")))
+    return EnhancedClipDetector(keyword_extractor=StubKeywords(), **kwargs)
+
+
+def ten_second_sentences(count: int):
+    return {'segments': [
+        {'start': 10.0 * i, 'end': 10.0 * (i + 1), 'text': f" Sentence {i}."} for i in range(count)
+    ]}
+
+
+def test_low_confidence_windows_do_not_take_top_k_slots(tmp_path, monkeypatch):
+    detector = make_detector(tmp_path, monkeypatch)
+    monkeypatch.setattr(detector, 'transcribe', lambda path, **options: ten_second_sentences(6))
+    monkeypatch.setattr(detector, '_acoustic_scores', lambda *args: {})
+    monkeypatch.setattr(detector.batch_scorer, 'prepare',
+                        lambda tokens: FixedScores([0.9, 0.2, 0.8, 0.25, 0.7, 0.1]))
+
+    # One window per sentence, so none of them overlap
+    clips = detector.find_clip_candidates("episode.mp3", min_duration=10.0, max_duration=10.0, top_k=3)
+
+    assert [clip.confidence_score for clip in clips] == [0.9, 0.8, 0.7]
+    assert [clip.start_time for clip in clips] == [0.0, 20.0, 40.0]
+    assert detector.find_clip_candidates("episode.mp3", 10.0, 10.0, top_k=5) == clips
+
+
+def refining_detector(tmp_path, monkeypatch, backend):
+    monkeypatch.setattr(detector_module, 'backend_for_model', lambda name: backend)
+    monkeypatch.setattr(detector_module, 'load_audio_slice',
+                        lambda path, start, duration: np.zeros(int(duration * 16000), dtype=np.float32))
+    monkeypatch.setenv('TRANSCRIBE_REFINE_PADDING_SECONDS', '1.0')
+    monkeypatch.setenv('ASR_BACKEND', 'whisper')
+    audio = tmp_path / "episode.mp3"
+    audio.write_bytes(b"episode audio")
+    return make_detector(tmp_path, monkeypatch, registry=StubRegistry(), refine_model_size='small'), str(audio)
+
+
+def clip(start, end, transcript="fast transcript"):
+    return ClipCandidate(start, end, transcript, 0.9, {}, [], 0.5, 0.5)
+
+
+def test_refined_text_is_cut_by_word_midpoint_within_the_slice(tmp_path, monkeypatch):
+    # The slice starts 1s before the clip; times below are relative to the slice
+    backend = FakeBackend(words=[
+        (0.2, 0.6, " padding"),   # 9.4s: before the clip
+        (0.8, 1.4, " straddles"),  # midpoint 10.1s: inside
+        (5.0, 5.5, " middle"),
+        (10.6, 11.3, " end"),     # midpoint 19.95s: inside
+        (10.9, 11.5, " after"),   # midpoint 20.2s: past the clip
+    ])
+    detector, audio = refining_detector(tmp_path, monkeypatch, backend)
+    clips = [clip(10.0, 20.0)]
+
+    detector._refine_clip_transcripts(audio, clips)
+
+    assert clips[0].transcript == "straddles middle end"
+    assert backend.calls == [("whisper:small", 12 * 16000)]
+
+
+def test_each_slice_is_cached_on_its_own_key(tmp_path, monkeypatch):
+    backend = FakeBackend(words=[(5.0, 5.5, " hello")])
+    detector, audio = refining_detector(tmp_path, monkeypatch, backend)
+
+    detector._refine_clip_transcripts(audio, [clip(10.0, 20.0), clip(30.0, 45.0)])
+    assert len(backend.calls) == 2
+
+    again = [clip(30.0, 45.0), clip(10.0, 20.0), clip(50.0, 60.0)]
+    detector._refine_clip_transcripts(audio, again)
+    # Only the new range is transcribed; the others come from the cache
+    assert len(backend.calls) == 3
+    assert [c.transcript for c in again] == ["hello"] * 3
+
+
+def test_failed_refinement_keeps_the_fast_transcript(tmp_path, monkeypatch):
+    backend = FakeBackend(error=RuntimeError("model crashed"))
+    detector, audio = refining_detector(tmp_path, monkeypatch, backend)
+    clips = [clip(10.0, 20.0, "fast one"), clip(30.0, 40.0, "fast two")]
+
+    detector._refine_clip_transcripts(audio, clips)
+
+    assert [c.transcript for c in clips] == ["fast one", "fast two"]
+    assert len(backend.calls) == 2
+
+
+def test_empty_refinement_keeps_the_fast_transcript(tmp_path, monkeypatch):
+    detector, audio = refining_detector(tmp_path, monkeypatch, FakeBackend(words=[(0.1, 0.3, " pad")]))
+    clips = [clip(10.0, 20.0, "fast one")]
+
+    detector._refine_clip_transcripts(audio, clips)
+
+    assert clips[0].transcript == "fast one"
+
+
+def test_segments_without_word_timings_are_cut_by_segment_midpoint():
+    result = {"segments": [
+        {"start": 0.0, "end": 3.0, "text": " before"},
+        {"start": 2.0, "end": 6.0, "text": " kept", "words": []},
+        {"start": 9.0, "end": 12.0, "text": " after"},
+    ]}
+    assert text_between(result, 2.0, 10.0) == "kept"
@@ -0,0 +1,108 @@
+"""
+Tests for the content-addressed B-roll download cache
+"""
+import asyncio
+
+import pytest
+
+from src.services.video_processing.download_cache import DownloadCache, DownloadIntegrityError
+
+
+def writer(data: bytes, calls: list):
+    async def fetch(destination):
+        calls.append(destination)
+        await asyncio.sleep(0.01)
+        destination.write_bytes(data)
+        return len(data)
+    return fetch
+
+
+def test_concurrent_requests_share_one_download(tmp_path):
+    cache = DownloadCache(cache_dir=str(tmp_path), max_size_mb=10, grace_seconds=0)
+    calls = []
+
+    async def run():
+        return await asyncio.gather(*(
+            cache.get_or_download("https://cdn.test/a.mp4", writer(b"a" * 100, calls), footage_id="a")
+            for _ in range(3)
+        ))
+
+    paths = asyncio.run(run())
+    assert len(calls) == 1
+    assert len(set(paths)) == 1 and paths[0].read_bytes() == b"a" * 100
+    assert asyncio.run(cache.get_or_download("https://cdn.test/a.mp4", writer(b"", calls), "a")) == paths[0]
+    assert cache.stats["hits"] == 1 and cache.stats["coalesced"] == 2
+
+
+def test_short_download_is_rejected(tmp_path):
+    cache = DownloadCache(cache_dir=str(tmp_path), max_size_mb=10, grace_seconds=0)
+
+    async def truncated(destination):
+        destination.write_bytes(b"abc")
+        return 10
+
+    with pytest.raises(DownloadIntegrityError):
+        asyncio.run(cache.get_or_download("https://cdn.test/b.mp4", truncated))
+    assert cache.size_bytes() == 0
+
+
+def test_pinned_files_survive_eviction_until_released(tmp_path):
+    # Room for two 600-byte files, with no grace period to hide behind
+    cache = DownloadCache(cache_dir=str(tmp_path), max_size_mb=1300 / 1024 / 1024, grace_seconds=0)
+    calls = []
+
+    def download(name):
+        return asyncio.run(cache.get_or_download(
+            f"https://cdn.test/{name}.mp4", writer(name.encode() * 600, calls), footage_id=name
+        ))
+
+    held = download("a")
+    cache.pin(held)  # a render queued behind the encoder still needs this
+    download("b")
+    download("c")  # over the cap: the oldest unpinned file goes instead
+    assert held.exists()
+    assert cache.describe()["pinned"] == 1
+
+    cache.release(held)
+    download("d")
+    assert not held.exists()
+    assert cache.describe()["pinned"] == 0
+
+
+def test_pins_are_counted(tmp_path):
+    cache = DownloadCache(cache_dir=str(tmp_path))
+    path = tmp_path / "x.mp4"
+    cache.pin(path)
+    cache.pin(path)
+    cache.release(path)
+    assert cache.describe()["pinned"] == 1
+    cache.release(path)
+    cache.release(path)  # extra releases are harmless
+    assert cache.describe()["pinned"] == 0
+
+
+def test_cancelled_owner_does_not_cancel_other_waiters(tmp_path):
+    cache = DownloadCache(cache_dir=str(tmp_path), max_size_mb=10, grace_seconds=0)
+    calls = []
+
+    async def stalled(destination):
+        calls.append(destination)
+        await asyncio.sleep(10)
+
+    async def run():
+        owner = asyncio.ensure_future(cache.get_or_download("https://cdn.test/e.mp4", stalled, "e"))
+        await asyncio.sleep(0.05)
+        waiter = asyncio.ensure_future(
+            cache.get_or_download("https://cdn.test/e.mp4", writer(b"e" * 50, calls), "e")
+        )
+        await asyncio.sleep(0.05)
+        # e.g. the owner's client disconnected
+        owner.cancel()
+        path = await waiter
+        return owner, path
+
+    owner, path = asyncio.run(run())
+    assert owner.cancelled()
+    # The waiter took the download over instead of being torn down with the owner
+    assert path.read_bytes() == b"e" * 50
+    assert len(calls) == 2
@@ -0,0 +1,103 @@
+"""
+Tests for the prioritised, bounded ffmpeg scheduler (with stand-in commands)
+"""
+import asyncio
+import os
+import sys
+
+import pytest
+
+from src.services.video_processing.encode_scheduler import (
+    EncodePriority, EncodeQueueFull, EncodeScheduler
+)
+
+
+def sleeper(seconds: float, pid_file=None):
+    """A command that sleeps; '-threads' is already present so none is added"""
+    script = "import sys, time, os\n"
+    if pid_file is not None:
+        script += f"open({str(pid_file)!r}, 'w').write(str(os.getpid()))\n"
+    script += f"time.sleep({seconds})\n"
+    return [sys.executable, '-c', script, '-threads', '1', 'out.mp4']
+
+
+def test_waiting_jobs_start_by_priority_then_submission_order():
+    scheduler = EncodeScheduler(max_concurrent=1, threads_per_job=1)
+    finished = []
+
+    async def job(name, priority):
+        await scheduler.run(sleeper(0.05), priority=priority, label=name)
+        finished.append(name)
+
+    async def run():
+        holder = asyncio.ensure_future(job("holder", EncodePriority.BATCH))
+        await asyncio.sleep(0.01)
+        waiting = [
+            asyncio.ensure_future(job("batch-1", EncodePriority.BATCH)),
+            asyncio.ensure_future(job("batch-2", EncodePriority.BATCH)),
+            asyncio.ensure_future(job("preview", EncodePriority.INTERACTIVE)),
+        ]
+        await asyncio.gather(holder, *waiting)
+
+    asyncio.run(run())
+    assert finished == ["holder", "preview", "batch-1", "batch-2"]
+    assert scheduler.describe()["completed"] == 4 and scheduler.describe()["running"] == 0
+
+
+def test_submissions_are_rejected_once_the_queue_is_full():
+    scheduler = EncodeScheduler(max_concurrent=1, threads_per_job=1, max_queued=1)
+
+    async def run():
+        running = asyncio.ensure_future(scheduler.run(sleeper(0.2)))
+        await asyncio.sleep(0.01)
+        queued = asyncio.ensure_future(scheduler.run(sleeper(0.01)))
+        await asyncio.sleep(0.01)
+        with pytest.raises(EncodeQueueFull):
+            await scheduler.run(sleeper(0.01))
+        return await asyncio.gather(running, queued)
+
+    results = asyncio.run(run())
+    assert all(result.ok for result in results)
+    assert scheduler.stats["rejected"] == 1
+
+
+def test_missing_threads_option_goes_before_the_output():
+    scheduler = EncodeScheduler(max_concurrent=1, threads_per_job=3)
+    assert scheduler._with_threads(['ffmpeg', '-i', 'in.mp4', 'out.mp4']) == \
+        ['ffmpeg', '-i', 'in.mp4', '-threads', '3', 'out.mp4']
+
+
+def test_cancelling_a_running_job_stops_its_child(tmp_path):
+    scheduler = EncodeScheduler(max_concurrent=1, threads_per_job=1)
+    pid_file = tmp_path / "pid"
+
+    async def run():
+        task = asyncio.ensure_future(scheduler.run(sleeper(30, pid_file), label="long render"))
+        while not pid_file.exists() or not pid_file.read_text():
+            await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        # The slot is free again for the next job
+        return await asyncio.wait_for(scheduler.run(sleeper(0.01)), timeout=5)
+
+    assert asyncio.run(run()).ok
+    with pytest.raises(ProcessLookupError):
+        os.kill(int(pid_file.read_text()), 0)
+    assert scheduler.stats["cancelled"] == 1
+
+
+def test_cancelled_waiter_does_not_lose_the_slot():
+    scheduler = EncodeScheduler(max_concurrent=1, threads_per_job=1)
+
+    async def run():
+        holder = asyncio.ensure_future(scheduler.run(sleeper(0.1)))
+        await asyncio.sleep(0.01)
+        abandoned = asyncio.ensure_future(scheduler.run(sleeper(0.01)))
+        waiting = asyncio.ensure_future(scheduler.run(sleeper(0.01)))
+        await asyncio.sleep(0.01)
+        abandoned.cancel()
+        return await asyncio.wait_for(asyncio.gather(holder, waiting), timeout=5)
+
+    assert all(result.ok for result in asyncio.run(run()))
+    assert scheduler.describe()["running"] == 0 and scheduler.queue_depth == 0
@@ -0,0 +1,68 @@
+"""
+Tests for streamed upload ingestion and deduplication
+"""
+import asyncio
+import io
+
+import pytest
+
+from src.services.upload.ingest import UploadIngestor, UploadTooLargeError
+
+
+class FakeUpload:
+    """Anything with an async ``read(n)``, like Starlette's ``UploadFile``"""
+
+    def __init__(self, data: bytes, filename: str = "episode.mp3"):
+        self.filename = filename
+        self._buffer = io.BytesIO(data)
+
+    async def read(self, n: int) -> bytes:
+        return self._buffer.read(n)
+
+
+def test_duplicate_upload_reuses_the_stored_file(tmp_path):
+    ingestor = UploadIngestor(upload_dir=str(tmp_path), chunk_size=4)
+
+    async def run():
+        first = await ingestor.ingest(FakeUpload(b"same audio bytes"))
+        second = await ingestor.ingest(FakeUpload(b"same audio bytes"))
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert not first.duplicate and second.duplicate
+    assert second.file_id == first.file_id and second.path == first.path
+
+
+def test_discard_keeps_a_file_another_request_deduplicated_onto(tmp_path):
+    ingestor = UploadIngestor(upload_dir=str(tmp_path))
+
+    async def run():
+        owner = await ingestor.ingest(FakeUpload(b"shared audio"))
+        await ingestor.ingest(FakeUpload(b"shared audio"))
+        # The first request's analysis fails after the second deduplicated onto its file
+        await ingestor.discard(owner)
+        return owner, await ingestor.ingest(FakeUpload(b"shared audio"))
+
+    owner, later = asyncio.run(run())
+    assert owner.path.exists()
+    assert later.duplicate and later.file_id == owner.file_id
+
+
+def test_discard_removes_an_unshared_file(tmp_path):
+    ingestor = UploadIngestor(upload_dir=str(tmp_path))
+
+    async def run():
+        owner = await ingestor.ingest(FakeUpload(b"lonely audio"))
+        await ingestor.discard(owner)
+        return owner, await ingestor.ingest(FakeUpload(b"lonely audio"))
+
+    owner, again = asyncio.run(run())
+    assert not owner.path.exists()
+    assert not again.duplicate
+
+
+def test_oversized_upload_leaves_no_partial_file(tmp_path):
+    ingestor = UploadIngestor(upload_dir=str(tmp_path), max_upload_mb=1 / 1024, chunk_size=256)
+    with pytest.raises(UploadTooLargeError):
+        asyncio.run(ingestor.ingest(FakeUpload(b"x" * 2048)))
+    assert [p.name for p in tmp_path.iterdir()] == []
@@ -0,0 +1,154 @@
+"""
+Tests for the pipeline job queue, store and worker entry point
+"""
+import pytest
+
+from src.services.video_processing.encode_scheduler import EncodeQueueFull
+from src.workers import tasks
+from src.workers.jobs import FileJobStore, JobNotFound, JobRecord, JobStatus
+from src.workers.queue import JobBroker, JobQueue
+from src.workers.tasks import JobDeferred, execute_pipeline_job
+
+
+class FakeBroker(JobBroker):
+    name = "fake"
+
+    def __init__(self, owns_workers: bool = True, fail: bool = False):
+        self.owns_workers = owns_workers
+        self.fail = fail
+        self.dispatched = []
+
+    def dispatch(self, job_id: str):
+        if self.fail:
+            raise ConnectionError("broker down")
+        self.dispatched.append(job_id)
+
+
+class FakePipeline:
+    outcome = {"success": True, "videos_created": 1}
+
+    async def process_audio_file(self, audio_path, podcaster, platforms, job_id=None):
+        if isinstance(self.outcome, Exception):
+            raise self.outcome
+        return dict(self.outcome, job_id=job_id)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return FileJobStore(jobs_dir=str(tmp_path / "jobs"))
+
+
+@pytest.fixture
+def fake_pipeline(monkeypatch):
+    from src.services.orchestration import pipeline
+    monkeypatch.setattr(pipeline, "ViralContentPipeline", FakePipeline)
+    monkeypatch.setattr(FakePipeline, "outcome", {"success": True, "videos_created": 1})
+    return FakePipeline
+
+
+def test_submit_records_and_dispatches(store):
+    broker = FakeBroker()
+    job = JobQueue(store=store, broker=broker).submit("episode.mp3", "host", ["tiktok"])
+    assert broker.dispatched == [job.job_id]
+    assert store.load(job.job_id).status == JobStatus.QUEUED
+
+
+def test_submit_marks_the_job_failed_when_the_broker_is_down(store):
+    job = JobQueue(store=store, broker=FakeBroker(fail=True)).submit("episode.mp3")
+    assert job.status == JobStatus.FAILED
+    assert "broker down" in store.load(job.job_id).error
+
+
+def test_unknown_job_id(store):
+    with pytest.raises(JobNotFound):
+        store.load("doesnotexist")
+    with pytest.raises(JobNotFound):
+        store.load("../etc/passwd")
+
+
+def test_worker_runs_the_pipeline_and_stores_the_result(store, fake_pipeline):
+    job = JobQueue(store=store, broker=FakeBroker()).submit("episode.mp3")
+    finished = execute_pipeline_job(job.job_id, store=store)
+    assert finished.status == JobStatus.SUCCEEDED
+    assert finished.attempts == 1
+    assert finished.result["job_id"] == job.job_id
+    # A redelivered message for a finished job does not run it again
+    assert execute_pipeline_job(job.job_id, store=store).attempts == 1
+
+
+def test_full_render_queue_defers_the_job_with_backoff(store, fake_pipeline, monkeypatch):
+    monkeypatch.setattr(FakePipeline, "outcome", EncodeQueueFull("8 encodes already queued"))
+    job = JobQueue(store=store, broker=FakeBroker()).submit("episode.mp3")
+
+    with pytest.raises(JobDeferred) as deferred:
+        execute_pipeline_job(job.job_id, store=store)
+    assert deferred.value.retry_in == tasks.retry_delay(1)
+    assert store.load(job.job_id).status == JobStatus.QUEUED
+
+    with pytest.raises(JobDeferred) as deferred:
+        execute_pipeline_job(job.job_id, store=store)
+    assert deferred.value.retry_in == tasks.retry_delay(2) > tasks.retry_delay(1)
+
+    monkeypatch.setattr(FakePipeline, "outcome", {"success": True})
+    assert execute_pipeline_job(job.job_id, store=store).status == JobStatus.SUCCEEDED
+    assert store.load(job.job_id).error is None
+
+
+def test_full_render_queue_fails_the_job_after_max_attempts(store, fake_pipeline, monkeypatch):
+    monkeypatch.setattr(FakePipeline, "outcome", EncodeQueueFull("queue full"))
+    monkeypatch.setattr(tasks, "JOB_MAX_ATTEMPTS", 2)
+    job = JobQueue(store=store, broker=FakeBroker()).submit("episode.mp3")
+
+    with pytest.raises(JobDeferred):
+        execute_pipeline_job(job.job_id, store=store)
+    finished = execute_pipeline_job(job.job_id, store=store)
+    assert finished.status == JobStatus.FAILED
+    assert "queue full" in finished.error
+
+
+def test_orphaned_jobs_are_requeued_or_failed(store, monkeypatch):
+    monkeypatch.setattr("src.workers.queue.JOB_MAX_ATTEMPTS", 3)
+    queued = JobRecord(job_id=JobRecord.new_id(), audio_path="a.mp3")
+    running = JobRecord(job_id=JobRecord.new_id(), audio_path="b.mp3",
+                        status=JobStatus.RUNNING, attempts=1, worker="host:1")
+    exhausted = JobRecord(job_id=JobRecord.new_id(), audio_path="c.mp3",
+                          status=JobStatus.RUNNING, attempts=3)
+    done = JobRecord(job_id=JobRecord.new_id(), audio_path="d.mp3", status=JobStatus.SUCCEEDED)
+    for job in (queued, running, exhausted, done):
+        store.save(job)
+
+    broker = FakeBroker()
+    counts = JobQueue(store=store, broker=broker).recover_orphaned_jobs()
+
+    assert counts == {"requeued": 2, "failed": 1}
+    assert sorted(broker.dispatched) == sorted([queued.job_id, running.job_id])
+    assert store.load(running.job_id).status == JobStatus.QUEUED
+    assert store.load(exhausted.job_id).status == JobStatus.FAILED
+    assert store.load(done.job_id).status == JobStatus.SUCCEEDED
+
+
+def test_brokers_with_remote_workers_do_not_recover(store):
+    store.save(JobRecord(job_id=JobRecord.new_id(), audio_path="a.mp3", status=JobStatus.RUNNING))
+    broker = FakeBroker(owns_workers=False)
+    assert JobQueue(store=store, broker=broker).recover_orphaned_jobs() == {"requeued": 0, "failed": 0}
+    assert broker.dispatched == []
+
+
+def test_local_broker_redispatches_deferred_jobs(monkeypatch):
+    import pickle
+    from concurrent.futures import Future
+    from src.workers.queue import LocalBroker
+
+    # The exception crosses the process boundary
+    error = pickle.loads(pickle.dumps(JobDeferred("abc", "queue full", 0.2)))
+    assert error.retry_in == 0.2
+
+    broker = LocalBroker(workers=1)
+    redispatched = []
+    monkeypatch.setattr(broker, "dispatch", redispatched.append)
+    future = Future()
+    future.set_exception(error)
+    broker._on_done("abc", future)
+    broker._retry_timers["abc"].join(timeout=5)
+    broker.shutdown()
+    assert redispatched == ["abc"]
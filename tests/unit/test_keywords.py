@@ -0,0 +1,142 @@
+"""
+Tests for the batched LLM keyword extractor against a stub completions server
+"""
+import asyncio
+import json
+import re
+
+from aiohttp import web
+
+from src.services.clip_detection.keywords import FALLBACK_KEYWORDS, LLMKeywordExtractor
+
+
+class StubCompletions:
+    """OpenAI-compatible ``/chat/completions`` that answers from canned replies"""
+
+    def __init__(self, replies=None, delay: float = 0.0):
+        self.replies = list(replies or [])  # 'ok', 'bad_json', 'missing_choices' or an HTTP status
+        self.delay = delay
+        self.batches = []
+
+    async def handle(self, request):
+        payload = await request.json()
+        ids = [int(i) for i in re.findall(r'^\[(\d+)\]', payload['messages'][1]['content'], re.M)]
+        self.batches.append(len(ids))
+        await asyncio.sleep(self.delay)
+
+        reply = self.replies.pop(0) if self.replies else 'ok'
+        if isinstance(reply, int):
+            return web.Response(status=reply)
+        if reply == 'missing_choices':
+            return web.json_response({'error': 'truncated'})
+        content = {"results": [{"id": i, "keywords": [f"topic {i}"]} for i in ids]}
+        content = json.dumps(content)
+        if reply == 'bad_json':
+            content = content[:len(content) // 2]
+        return web.json_response({'choices': [{'message': {'content': content}}]})
+
+
+def run_against(stub: StubCompletions, scenario, extractor=None, close=True, **options):
+    async def main():
+        nonlocal extractor
+        app = web.Application()
+        app.router.add_post('/chat/completions', stub.handle)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        base_url = f"http://127.0.0.1:{port}"
+        if extractor is None:
+            extractor = LLMKeywordExtractor(api_key='key', base_url=base_url, **options)
+        extractor.base_url = base_url
+        try:
+            return await scenario(extractor)
+        finally:
+            if close:
+                await extractor.close()
+            await runner.cleanup()
+
+    return asyncio.run(main())
+
+
+def test_texts_are_batched_and_cached():
+    stub = StubCompletions()
+    texts = [f"clip number {i}" for i in range(5)]
+
+    async def scenario(extractor):
+        first = await extractor.extract_many(texts)
+        second = await extractor.extract_many(texts)
+        return first, second
+
+    first, second = run_against(stub, scenario, batch_size=2)
+    assert stub.batches == [2, 2, 1]
+    assert first == second
+    assert first[0] == ["topic 0"] and first[4] == ["topic 0"]  # ids restart per batch
+
+
+def test_retryable_status_and_bad_json_are_retried():
+    stub = StubCompletions(replies=[503, 'bad_json', 'missing_choices', 'ok'])
+
+    async def scenario(extractor):
+        return await extractor.extract("the brain at rest")
+
+    assert run_against(stub, scenario, max_retries=3) == ["topic 0"]
+    assert stub.batches == [1, 1, 1, 1]
+
+
+def test_persistent_parse_errors_fall_back_without_caching():
+    stub = StubCompletions(replies=['bad_json'] * 3)
+
+    async def scenario(extractor):
+        fallback = await extractor.extract("the brain at rest")
+        retried = await extractor.extract("the brain at rest")
+        return fallback, retried
+
+    fallback, retried = run_against(stub, scenario, max_retries=2)
+    assert fallback == FALLBACK_KEYWORDS
+    assert retried == ["topic 0"]
+
+
+def test_concurrent_requests_for_the_same_text_share_one_call():
+    stub = StubCompletions(delay=0.2)
+
+    async def scenario(extractor):
+        return await asyncio.gather(
+            extractor.extract_many(["Same  clip text"]),
+            extractor.extract_many(["same clip text", "another clip"])
+        )
+
+    first, second = run_against(stub, scenario)
+    assert sum(stub.batches) == 2
+    assert first[0] == second[0]
+
+
+def test_cancelled_waiter_does_not_break_the_owning_call():
+    stub = StubCompletions(delay=0.2)
+
+    async def scenario(extractor):
+        owner = asyncio.ensure_future(extractor.extract_many(["same clip text"]))
+        await asyncio.sleep(0.05)
+        waiter = asyncio.ensure_future(extractor.extract_many(["Same clip text"]))
+        await asyncio.sleep(0.05)
+        waiter.cancel()
+        return await owner, waiter
+
+    keywords, waiter = run_against(stub, scenario)
+    assert keywords == [["topic 0"]]
+    assert waiter.cancelled()
+    assert stub.batches == [1]
+
+
+def test_extractor_is_reusable_across_event_loops():
+    stub = StubCompletions()
+    extractor = LLMKeywordExtractor(api_key='key')
+
+    # Sync callers such as detect_clips use asyncio.run once per call and never close it
+    first = run_against(stub, lambda e: e.extract("first loop"), extractor=extractor, close=False)
+    second = run_against(stub, lambda e: e.extract("second loop"), extractor=extractor, close=False)
+    asyncio.run(extractor.close())
+
+    assert first == second == ["topic 0"]
+    assert stub.batches == [1, 1]
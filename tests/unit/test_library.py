@@ -0,0 +1,96 @@
+"""
+Tests for importing and searching the local B-roll library
+"""
+import json
+
+import numpy as np
+
+from src.services.broll_matching import library
+from src.services.broll_matching.library import FootageLibrary
+
+VOCABULARY = ['ocean', 'waves', 'city', 'night', 'brain', 'scan']
+
+
+class StubRelevance:
+    """Bag-of-words embedder standing in for the sentence-transformer"""
+
+    embedding_model_name = 'stub/bag-of-words'
+
+    def __init__(self, error: Exception = None):
+        self.embeddings_available = True
+        self.error = error
+        self.calls = []
+
+    def embed(self, texts):
+        self.calls.append(list(texts))
+        if self.error is not None:
+            raise self.error
+        return np.array([
+            [float(word in text.lower()) for word in VOCABULARY] + [0.01] for text in texts
+        ], dtype=np.float32)
+
+
+def make_footage(directory, name: str, content: bytes, tags=None):
+    path = directory / f"{name}.mp4"
+    path.write_bytes(content)
+    if tags is not None:
+        path.with_suffix('.json').write_text(json.dumps({'tags': tags}))
+    return path
+
+
+def fake_probe(path):
+    return {'duration': 8.0, 'width': 1920, 'height': 1080, 'codec': 'h264'}
+
+
+def test_import_copies_probes_and_dedups(tmp_path, monkeypatch):
+    monkeypatch.setattr(library, 'probe_footage', fake_probe)
+    source = tmp_path / "source"
+    source.mkdir()
+    make_footage(source, "ocean-waves-123", b"ocean", tags=['sea'])
+    make_footage(source, "copy-of-ocean", b"ocean")
+    make_footage(source, "city_at_night", b"city")
+
+    footage = FootageLibrary(library_dir=str(tmp_path / "lib"), relevance=StubRelevance())
+    added = footage.import_directory(str(source))
+
+    # Identical content is imported once, whatever it is called
+    assert len(added) == 2 and len(footage) == 2
+    assert {entry.title for entry in added} & {'ocean waves', 'copy of ocean'}
+    assert all(footage.path_for(entry).exists() for entry in added)
+    assert footage.import_directory(str(source)) == []
+
+    reloaded = FootageLibrary(library_dir=str(tmp_path / "lib"), relevance=StubRelevance())
+    assert set(reloaded.entries) == set(footage.entries)
+    assert len(reloaded.index) == 2
+
+
+def test_search_ranks_by_embedding(tmp_path, monkeypatch):
+    monkeypatch.setattr(library, 'probe_footage', fake_probe)
+    make_footage(tmp_path, "ocean-waves", b"ocean")
+    make_footage(tmp_path, "city-night", b"city")
+    make_footage(tmp_path, "brain-scan", b"brain")
+
+    footage = FootageLibrary(library_dir=str(tmp_path / "lib"), relevance=StubRelevance())
+    footage.import_directory(str(tmp_path))
+    results = footage.search("a scan of the brain", k=2)
+
+    assert [clip.title for clip in results][0] == 'brain scan'
+    assert len(results) == 2
+    assert results[0].source == 'library' and results[0].download_url.startswith('file://')
+
+
+def test_offline_model_falls_back_to_lexical_and_keeps_metadata(tmp_path, monkeypatch):
+    monkeypatch.setattr(library, 'probe_footage', fake_probe)
+    make_footage(tmp_path, "ocean-waves", b"ocean")
+    make_footage(tmp_path, "city-night", b"city")
+    offline = StubRelevance(error=OSError("couldn't connect to huggingface.co"))
+
+    footage = FootageLibrary(library_dir=str(tmp_path / "lib"), relevance=offline)
+    added = footage.import_directory(str(tmp_path))
+    results = footage.search("night in the city")
+
+    assert len(added) == 2 and len(footage.index) == 0
+    assert results[0].title == 'city night'
+    # Metadata was written even though embedding failed
+    reloaded = FootageLibrary(library_dir=str(tmp_path / "lib"), relevance=StubRelevance())
+    assert set(reloaded.entries) == set(footage.entries)
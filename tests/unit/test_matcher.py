@@ -0,0 +1,82 @@
+"""
+Tests for the shared Pexels client behind every B-roll matcher
+"""
+import asyncio
+
+from aiohttp import web
+
+from src.services.broll_matching.matcher import BRollMatcher, PexelsClient, get_pexels_client
+from src.services.broll_matching.search_cache import SearchResultCache
+
+VIDEO = {
+    'id': 7, 'url': 'https://pexels.test/7', 'duration': 12, 'tags': ['brain'],
+    'video_files': [{'link': 'https://cdn.test/7.mp4', 'width': 1920, 'height': 1080}]
+}
+
+
+async def start_stub_pexels(requests: list):
+    async def search(request):
+        requests.append(dict(request.query))
+        return web.json_response({'videos': [VIDEO]})
+
+    app = web.Application()
+    app.router.add_get('/videos/search', search)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+def test_matchers_share_the_process_wide_client():
+    assert BRollMatcher().pexels is get_pexels_client()
+    assert BRollMatcher().pexels.rate_limiter is BRollMatcher().pexels.rate_limiter
+
+
+def test_client_survives_runs_on_separate_event_loops():
+    requests = []
+    client = PexelsClient(api_key='key')
+
+    async def run(query):
+        runner, client.base_url = await start_stub_pexels(requests)
+        try:
+            matcher = BRollMatcher(pexels=client, search_cache=SearchResultCache(shared=None))
+            return await matcher.search_pexels(query)
+        finally:
+            await runner.cleanup()
+
+    # Celery workers call asyncio.run once per job
+    first = asyncio.run(run('brain'))
+    second = asyncio.run(run('ocean'))
+    asyncio.run(client.close())
+
+    assert [clip.id for clip in first] == ['pexels_7']
+    assert [clip.id for clip in second] == ['pexels_7']
+    assert [r['query'] for r in requests] == ['brain', 'ocean']
+
+
+def test_rate_limit_is_shared_across_matchers():
+    requests = []
+    client = PexelsClient(api_key='key')
+    client.rate_limiter.capacity = client.rate_limiter._tokens = 1.0
+
+    async def run():
+        runner, client.base_url = await start_stub_pexels(requests)
+        try:
+            cache = SearchResultCache(shared=None)
+            await BRollMatcher(pexels=client, search_cache=cache).search_pexels('brain')
+            client.rate_limiter.pause(30)
+            # A second matcher must wait on the same bucket rather than get its own
+            waiting = asyncio.ensure_future(
+                BRollMatcher(pexels=client, search_cache=cache).search_pexels('ocean')
+            )
+            await asyncio.sleep(0.2)
+            assert not waiting.done()
+            waiting.cancel()
+        finally:
+            await client.close()
+            await runner.cleanup()
+
+    asyncio.run(run())
+    assert len(requests) == 1
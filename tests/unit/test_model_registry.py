@@ -0,0 +1,59 @@
+"""
+Tests for model size estimates used by the registry's memory cap
+"""
+import sys
+import types
+
+from src.core import model_registry
+from src.core.model_registry import ModelRegistry, directory_size_bytes, estimate_model_size
+
+
+class FakeWhisperModel:
+    """Shaped like faster_whisper.WhisperModel: no ``parameters()`` to count"""
+
+    def __init__(self, model_path, device, compute_type, cpu_threads):
+        self.model_path = model_path
+
+
+def fake_faster_whisper(monkeypatch, model_dir):
+    package = types.ModuleType("faster_whisper")
+    package.WhisperModel = FakeWhisperModel
+    utils = types.ModuleType("faster_whisper.utils")
+    utils.download_model = lambda size: str(model_dir)
+    monkeypatch.setitem(sys.modules, "faster_whisper", package)
+    monkeypatch.setitem(sys.modules, "faster_whisper.utils", utils)
+
+
+def converted_model(tmp_path):
+    model_dir = tmp_path / "faster-whisper-base"
+    (model_dir / "sub").mkdir(parents=True)
+    (model_dir / "model.bin").write_bytes(b"\0" * 70000)
+    (model_dir / "sub" / "vocabulary.json").write_bytes(b"\0" * 500)
+    return model_dir
+
+
+def test_directory_size_counts_nested_files(tmp_path):
+    assert directory_size_bytes(str(converted_model(tmp_path))) == 70500
+
+
+def test_models_without_parameters_fall_back_to_zero():
+    assert estimate_model_size(object()) == 0
+
+
+def test_faster_whisper_models_are_sized_from_their_weights(tmp_path, monkeypatch):
+    model_dir = converted_model(tmp_path)
+    fake_faster_whisper(monkeypatch, model_dir)
+
+    model = model_registry._load_faster_whisper("base")
+    assert model.model_path == str(model_dir)
+    assert estimate_model_size(model) == 70500
+
+
+def test_memory_cap_evicts_sized_ctranslate2_models(tmp_path, monkeypatch):
+    fake_faster_whisper(monkeypatch, converted_model(tmp_path))
+    registry = ModelRegistry(memory_limit_mb=0.1)  # ~105 KB: room for one 70 KB model
+    registry.register_family("faster-whisper", model_registry._load_faster_whisper)
+
+    registry.warm(["faster-whisper:base"])
+    registry.warm(["faster-whisper:small"])
+    assert list(registry.describe()["models"]) == ["faster-whisper:small"]
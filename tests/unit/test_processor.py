@@ -0,0 +1,204 @@
+"""
+Tests for B-roll downloads and clip renders in the video processor
+"""
+import asyncio
+
+import pytest
+from aiohttp import web
+
+from src.services.video_processing.download_cache import DownloadCache
+from src.services.video_processing.encode_scheduler import EncodeResult
+from src.services.video_processing.processor import ProcessingSpec, VideoProcessor
+from src.services.video_processing.workspace import JobWorkspace, WorkspaceQuotaExceeded
+
+PAYLOAD = bytes(range(256)) * 64
+
+
+class StubScheduler:
+    """Records ffmpeg commands and writes each one's output file"""
+
+    def __init__(self, fail_labels=()):
+        self.commands = []
+        self.fail_labels = tuple(fail_labels)
+
+    async def run(self, cmd, priority=0, label=""):
+        self.commands.append(cmd)
+        await asyncio.sleep(0.01)
+        if label.startswith(self.fail_labels):
+            return EncodeResult(returncode=1, stderr="boom", wait_seconds=0.0, run_seconds=0.0)
+        with open(cmd[-1], 'wb') as f:
+            f.write(b"media")
+        return EncodeResult(returncode=0, stderr="", wait_seconds=0.0, run_seconds=0.0)
+
+
+def make_spec(platform: str, clip_id: str = "clip", end_time: float = 120.0) -> ProcessingSpec:
+    return ProcessingSpec(
+        clip_id=clip_id, start_time=10.0, end_time=end_time,
+        transcript="a few words about the brain", broll_footage=[], target_platform=platform
+    )
+
+
+def make_processor(tmp_path, quota_mb=None, **kwargs) -> VideoProcessor:
+    workspace = JobWorkspace(
+        root=str(tmp_path / "temp"), output_root=str(tmp_path / "out"), quota_mb=quota_mb
+    )
+    return VideoProcessor(
+        download_cache=DownloadCache(cache_dir=str(tmp_path / "cache"), max_size_mb=10, grace_seconds=0),
+        workspace=workspace,
+        **kwargs
+    )
+
+
+async def start_stub_cdn(ranges: list, honour_range: bool = True):
+    async def video(request):
+        ranges.append(request.headers.get('Range'))
+        if len(ranges) == 1:
+            # Announce the whole file, then drop the connection halfway through it
+            response = web.StreamResponse(headers={'Content-Length': str(len(PAYLOAD))})
+            await response.prepare(request)
+            await response.write(PAYLOAD[:len(PAYLOAD) // 2])
+            # Let the client read the first half before the connection goes
+            await asyncio.sleep(0.1)
+            request.transport.close()
+            return response
+        if not honour_range:
+            return web.Response(body=PAYLOAD)
+        start = int(request.headers['Range'][len('bytes='):-1])
+        return web.Response(
+            status=206,
+            body=PAYLOAD[start:],
+            headers={'Content-Range': f"bytes {start}-{len(PAYLOAD) - 1}/{len(PAYLOAD)}"}
+        )
+
+    app = web.Application()
+    app.router.add_get('/video.mp4', video)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/video.mp4"
+
+
+def fetch(processor, destination, ranges, honour_range=True):
+    async def run():
+        runner, url = await start_stub_cdn(ranges, honour_range)
+        try:
+            return await processor._fetch_to_file(url, destination)
+        finally:
+            await processor.close()
+            await runner.cleanup()
+
+    return asyncio.run(run())
+
+
+def test_dropped_download_resumes_from_the_bytes_on_disk(tmp_path):
+    ranges = []
+    destination = tmp_path / "video.mp4"
+
+    assert fetch(make_processor(tmp_path), destination, ranges) == len(PAYLOAD)
+    assert ranges == [None, f"bytes={len(PAYLOAD) // 2}-"]
+    assert destination.read_bytes() == PAYLOAD
+
+
+def test_server_ignoring_range_restarts_the_file(tmp_path):
+    ranges = []
+    destination = tmp_path / "video.mp4"
+
+    assert fetch(make_processor(tmp_path), destination, ranges, honour_range=False) == len(PAYLOAD)
+    assert ranges == [None, f"bytes={len(PAYLOAD) // 2}-"]
+    # A 200 answer is the whole file again: overwrite rather than append
+    assert destination.read_bytes() == PAYLOAD
+
+
+def test_platforms_with_equal_output_share_one_plan(tmp_path):
+    processor = make_processor(tmp_path, encode_scheduler=StubScheduler())
+    specs = [make_spec('tiktok'), make_spec('instagram'), make_spec('tiktok', clip_id="other", end_time=50.0)]
+
+    plans = processor.plan_renders(specs)
+
+    assert [plan.specs for plan in plans] == [specs[:2], specs[2:]]
+    # The shared encode is as long as its longest member needs
+    assert [plan.duration for plan in plans] == [90, 40.0]
+
+    processor.platform_specs['instagram']['resolution'] = (1080, 1350)
+    assert len(processor.plan_renders(specs)) == 3
+
+
+def test_shorter_platforms_are_stream_copied_from_the_shared_encode(tmp_path):
+    scheduler = StubScheduler()
+    processor = make_processor(tmp_path, encode_scheduler=scheduler)
+    specs = [make_spec('tiktok'), make_spec('instagram'), make_spec('youtube_shorts')]
+
+    outputs = asyncio.run(processor.process_clips(specs, str(tmp_path / "episode.mp3")))
+
+    assert outputs == [str(processor.output_path_for(spec)) for spec in specs]
+    audio, encode, *trims = scheduler.commands
+    assert encode[encode.index('-t') + 1] == '90' and encode[-1] == outputs[1]
+    # Derived outputs remux the instagram encode instead of encoding again
+    assert [trim[-1] for trim in trims] == [outputs[0], outputs[2]]
+    for trim in trims:
+        assert trim[trim.index('-i') + 1] == outputs[1]
+        assert trim[trim.index('-t') + 1] == '60'
+        assert trim[trim.index('-c') + 1] == 'copy'
+
+
+def test_failed_stream_copy_only_loses_its_own_output(tmp_path):
+    processor = make_processor(tmp_path, encode_scheduler=StubScheduler(fail_labels=("trim",)))
+    specs = [make_spec('tiktok'), make_spec('instagram')]
+
+    outputs = asyncio.run(processor.process_clips(specs, str(tmp_path / "episode.mp3")))
+
+    assert outputs == [None, str(processor.output_path_for(specs[1]))]
+
+
+def test_concurrent_audio_cuts_share_one_extraction(tmp_path):
+    scheduler = StubScheduler()
+    processor = make_processor(tmp_path, encode_scheduler=scheduler)
+    episode = str(tmp_path / "episode.mp3")
+
+    async def run():
+        return await asyncio.gather(*(processor.extract_clip_audio(episode, 10.0, 90.0) for _ in range(3)))
+
+    paths = asyncio.run(run())
+
+    assert len(set(paths)) == 1 and len(scheduler.commands) == 1
+    cmd = scheduler.commands[0]
+    # Seek on the input side, before -i, so the episode is not decoded up to the clip
+    assert cmd.index('-ss') < cmd.index('-i') and cmd[cmd.index('-ss') + 1] == '10.0'
+    assert asyncio.run(processor.extract_clip_audio(episode, 10.0, 90.0)) == paths[0]
+    assert len(scheduler.commands) == 1
+
+
+def test_failed_audio_cut_is_retried(tmp_path):
+    scheduler = StubScheduler(fail_labels=("audio",))
+    processor = make_processor(tmp_path, encode_scheduler=scheduler)
+    episode = str(tmp_path / "episode.mp3")
+
+    assert asyncio.run(processor.extract_clip_audio(episode, 10.0, 90.0)) is None
+    scheduler.fail_labels = ()
+    assert asyncio.run(processor.extract_clip_audio(episode, 10.0, 90.0)) is not None
+    assert len(scheduler.commands) == 2
+
+
+def test_over_quota_workspace_starts_no_new_writes(tmp_path):
+    scheduler = StubScheduler()
+    processor = make_processor(tmp_path, quota_mb=0.001, encode_scheduler=scheduler)
+    processor.workspace.file("leftover.bin").write_bytes(b"x" * 2048)
+
+    with pytest.raises(WorkspaceQuotaExceeded):
+        asyncio.run(processor.process_clips([make_spec('tiktok')], str(tmp_path / "episode.mp3")))
+    assert scheduler.commands == []
+    assert processor._clip_audio == {}
+
+
+def test_quota_is_checked_before_the_render(tmp_path):
+    scheduler = StubScheduler()
+    processor = make_processor(tmp_path, quota_mb=0.001, encode_scheduler=scheduler)
+    clip_audio = processor.workspace.file("clip_audio.m4a")
+    clip_audio.write_bytes(b"x" * 2048)
+    plan = processor.plan_renders([make_spec('tiktok')])[0]
+
+    with pytest.raises(WorkspaceQuotaExceeded):
+        asyncio.run(processor._render_plan(plan, str(clip_audio), 0))
+    assert scheduler.commands == []
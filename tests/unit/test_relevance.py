@@ -0,0 +1,99 @@
+"""
+Tests for the persistent vector index and embedding-based B-roll ranking
+"""
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import List
+
+import numpy as np
+import pytest
+
+from src.services.broll_matching.relevance import RelevanceEngine, VectorIndex
+
+VOCABULARY = ['ocean', 'waves', 'city', 'night', 'brain', 'scan']
+
+
+@dataclass
+class Clip:
+    id: str
+    title: str
+    url: str = ''
+    tags: List[str] = field(default_factory=list)
+    relevance_score: float = 0.0
+
+
+class StubEmbedder:
+    """Bag-of-words ``encode`` in place of the sentence-transformer"""
+
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, texts, batch_size=64, normalize_embeddings=True):
+        self.encoded.extend(texts)
+        return np.array([[float(word in text.lower()) for word in VOCABULARY] + [0.01] for text in texts])
+
+
+class StubRegistry:
+    def __init__(self, model):
+        self.model = model
+
+    @contextmanager
+    def borrow(self, name):
+        yield self.model
+
+
+def test_search_returns_top_k_by_cosine():
+    index = VectorIndex()
+    index.add(['a', 'b', 'c', 'd'], np.array([[1, 0], [0.8, 0.6], [0, 1], [-1, 0]]))
+
+    assert [item_id for item_id, _ in index.search(np.array([2.0, 0.0]), k=2)] == ['a', 'b']
+    scores = dict(index.search(np.array([1.0, 0.0]), k=10))
+    assert len(scores) == 4
+    assert scores['a'] == pytest.approx(1.0) and scores['d'] == pytest.approx(-1.0)
+    # Restricting to a subset ranks within it only
+    assert [item_id for item_id, _ in index.search(np.array([1.0, 0.0]), k=1, ids=['c', 'd', 'x'])] == ['c']
+
+
+def test_add_replaces_existing_ids_and_checks_dimensions():
+    index = VectorIndex()
+    index.add(['a', 'b'], np.array([[1.0, 0.0], [0.0, 1.0]]))
+    index.add(['a'], np.array([[0.0, 3.0]]))
+
+    assert len(index) == 2
+    np.testing.assert_allclose(index.vectors_for(['a']), [[0.0, 1.0]])
+    with pytest.raises(ValueError):
+        index.add(['c'], np.array([[1.0, 0.0, 0.0]]))
+
+
+def test_index_round_trips_through_disk(tmp_path):
+    path = tmp_path / "index.npz"
+    index = VectorIndex(path)
+    index.add(['a', 'b'], np.array([[3.0, 4.0], [0.0, 2.0]]))
+    index.save()
+
+    reloaded = VectorIndex(path)
+    assert reloaded.ids == ['a', 'b'] and 'b' in reloaded
+    np.testing.assert_allclose(reloaded.vectors_for(['a', 'b']), [[0.6, 0.8], [0.0, 1.0]], rtol=1e-6)
+    assert reloaded.search(np.array([0.0, 1.0]), k=1)[0][0] == 'b'
+
+
+def test_corrupt_index_starts_empty(tmp_path):
+    path = tmp_path / "index.npz"
+    path.write_bytes(b"not an npz")
+    assert len(VectorIndex(path)) == 0
+
+
+def test_engine_ranks_clips_and_embeds_each_once(tmp_path):
+    embedder = StubEmbedder()
+    engine = RelevanceEngine(registry=StubRegistry(embedder), index_path=str(tmp_path / "index.npz"),
+                             embedding_model='stub')
+    clips = [Clip('1', 'City at night'), Clip('2', 'Ocean waves'), Clip('3', 'Brain scan')]
+
+    ranked = engine.rank("waves on the ocean", clips)
+    assert ranked[0].id == '2'
+    assert ranked[0].relevance_score > ranked[1].relevance_score
+
+    engine.rank("a brain scan", [Clip('3', 'Brain scan'), Clip('2', 'Ocean waves')])
+    # Footage descriptions are embedded once; only the queries are new
+    assert embedder.encoded.count('Ocean waves') == 1
+    assert len(VectorIndex(tmp_path / "index.npz")) == 3
@@ -0,0 +1,57 @@
+"""
+Tests that the batch window scorer matches per-text scoring
+"""
+import numpy as np
+import pytest
+
+from src.services.clip_detection.scoring import (
+    VIRAL_PATTERNS, BatchTextScorer, score_text, token_ranges
+)
+
+SENTENCES = [
+    "The brain is INCREDIBLE and you should never try this secret method!",
+    "It's CRAZY how wrong we were about dopamine.",
+    "Really? Yes. So here's how to improve sleep without any hack.",
+    "Most people avoid the truth because it's controversial, a debate nobody wants.",
+    "We need to talk about money",
+    "This mind-blowing trick was banned, and honestly the whole thing feels like a scam!!",
+]
+
+
+def windows():
+    tokens, starts, ends = token_ranges(SENTENCES)
+    first = [i for i in range(len(SENTENCES)) for _ in range(i, len(SENTENCES))]
+    last = [j for i in range(len(SENTENCES)) for j in range(i, len(SENTENCES))]
+    return tokens, starts[first], ends[last]
+
+
+def per_text(tokens, starts, ends):
+    return [score_text(' '.join(tokens[a:b]), VIRAL_PATTERNS) for a, b in zip(starts, ends)]
+
+
+def batch(tokens, starts, ends):
+    components = BatchTextScorer(VIRAL_PATTERNS).prepare(tokens).score_windows(starts, ends)
+    return [{name: float(values[i]) for name, values in components.items()} for i in range(len(starts))]
+
+
+@pytest.mark.parametrize("component", ['pattern_matches', 'emotional_intensity', 'length_score'])
+def test_batch_components_match_score_text(component):
+    tokens, starts, ends = windows()
+    expected = [scores[component] for scores in per_text(tokens, starts, ends)]
+    actual = [scores[component] for scores in batch(tokens, starts, ends)]
+    assert actual == expected
+
+
+def test_batch_readability_matches_textstat():
+    pytest.importorskip("textstat")
+    tokens, starts, ends = windows()
+    assert batch(tokens, starts, ends) == per_text(tokens, starts, ends)
+
+
+def test_long_windows_match_too():
+    pytest.importorskip("textstat")
+    rnd = np.random.default_rng(5)
+    tokens = ' '.join(SENTENCES * 20).split()
+    starts = rnd.integers(0, len(tokens) - 150, size=25)
+    ends = starts + rnd.integers(5, 150, size=25)
+    assert batch(tokens, starts, ends) == per_text(tokens, starts, ends)
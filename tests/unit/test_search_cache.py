@@ -0,0 +1,129 @@
+"""
+Tests for the two-tier B-roll search cache
+"""
+import asyncio
+import time
+from dataclasses import dataclass
+
+from src.services.broll_matching.search_cache import RedisSharedCache, SearchResultCache
+
+
+@dataclass
+class Clip:
+    id: str
+
+
+class LoopBoundRedis:
+    """Stands in for ``redis.asyncio.Redis``: usable only on the loop that made it"""
+
+    store = {}
+
+    def __init__(self):
+        self.loop = asyncio.get_running_loop()
+        self.closed = False
+
+    def _check(self):
+        if self.closed or asyncio.get_running_loop() is not self.loop:
+            raise RuntimeError("Task got Future attached to a different loop")
+
+    async def get(self, key):
+        self._check()
+        value = self.store.get(key)
+        return value.encode('utf-8') if value is not None else None
+
+    async def set(self, key, value, ex=None):
+        self._check()
+        self.store[key] = value
+
+    async def close(self):
+        self._check()
+        self.closed = True
+
+
+def test_redis_tier_works_across_consecutive_event_loops():
+    LoopBoundRedis.store = {}
+    shared = RedisSharedCache(client_factory=LoopBoundRedis)
+    fetches = []
+
+    async def fetch():
+        fetches.append(1)
+        return [Clip(id='a')]
+
+    async def run():
+        # A fresh local tier each run, so hits must come from the shared tier
+        cache = SearchResultCache(ttl=60, stale_ttl=60, shared=shared)
+        clips = await cache.get_or_fetch('k', fetch, Clip)
+        return clips, cache.stats
+
+    first, first_stats = asyncio.run(run())
+    second, second_stats = asyncio.run(run())
+
+    assert first == second == [Clip(id='a')]
+    assert len(fetches) == 1
+    assert second_stats["shared_hits"] == 1
+    assert first_stats["shared_errors"] == second_stats["shared_errors"] == 0
+
+
+def test_no_background_refresh_after_close():
+    cache = SearchResultCache(ttl=1, stale_ttl=60, shared=None)
+    fetches = []
+
+    async def fetch():
+        fetches.append(1)
+        return [Clip(id=str(len(fetches)))]
+
+    async def run():
+        await cache.get_or_fetch('k', fetch, Clip)
+        cache._local['k'].stored_at = time.time() - 10  # stale
+        await cache.close()
+        clips = await cache.get_or_fetch('k', fetch, Clip)
+        await asyncio.sleep(0)
+        return clips
+
+    assert asyncio.run(run()) == [Clip(id='1')]
+    assert len(fetches) == 1
+    assert not cache._refreshing
+
+
+def slow_fetch(fetches: list, clip_id: str):
+    async def fetch():
+        fetches.append(clip_id)
+        await asyncio.sleep(0.1)
+        return [Clip(id=clip_id)]
+    return fetch
+
+
+def test_cancelled_waiter_leaves_the_shared_fetch_running():
+    cache = SearchResultCache(shared=None)
+    fetches = []
+
+    async def run():
+        owner = asyncio.ensure_future(cache.get_or_fetch('k', slow_fetch(fetches, 'a'), Clip))
+        await asyncio.sleep(0.01)
+        waiter = asyncio.ensure_future(cache.get_or_fetch('k', slow_fetch(fetches, 'b'), Clip))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        return await owner, waiter
+
+    clips, waiter = asyncio.run(run())
+    assert clips == [Clip(id='a')]
+    assert waiter.cancelled()
+    assert fetches == ['a']
+
+
+def test_cancelled_owner_hands_the_fetch_to_a_waiter():
+    cache = SearchResultCache(shared=None)
+    fetches = []
+
+    async def run():
+        owner = asyncio.ensure_future(cache.get_or_fetch('k', slow_fetch(fetches, 'a'), Clip))
+        await asyncio.sleep(0.01)
+        waiter = asyncio.ensure_future(cache.get_or_fetch('k', slow_fetch(fetches, 'b'), Clip))
+        await asyncio.sleep(0.01)
+        owner.cancel()
+        return owner, await waiter
+
+    owner, clips = asyncio.run(run())
+    assert owner.cancelled()
+    assert clips == [Clip(id='b')]
+    assert fetches == ['a', 'b']
@@ -0,0 +1,46 @@
+"""
+Tests for transcript cache keys and storage
+"""
+import numpy as np
+
+from src.services.clip_detection.asr import get_asr_backend
+from src.services.clip_detection.transcript_cache import TranscriptCache
+
+
+def faster_whisper_key(**options):
+    backend = get_asr_backend("faster-whisper")
+    return TranscriptCache.make_key("audiohash", "faster-whisper:base", backend.cache_options(options))
+
+
+def test_key_follows_the_configured_beam_size(monkeypatch):
+    monkeypatch.setenv("ASR_BEAM_SIZE", "5")
+    beam_5 = faster_whisper_key(word_timestamps=True)
+    monkeypatch.setenv("ASR_BEAM_SIZE", "1")
+    assert faster_whisper_key(word_timestamps=True) != beam_5
+    # An explicit beam size wins over the environment, as it does when decoding
+    assert faster_whisper_key(word_timestamps=True, beam_size=5) == beam_5
+
+
+def test_key_follows_the_configured_compute_type(monkeypatch):
+    monkeypatch.setenv("ASR_COMPUTE_TYPE", "int8")
+    int8 = faster_whisper_key(word_timestamps=True)
+    monkeypatch.setenv("ASR_COMPUTE_TYPE", "float32")
+    assert faster_whisper_key(word_timestamps=True) != int8
+
+
+def test_whisper_keys_ignore_faster_whisper_settings(monkeypatch):
+    backend = get_asr_backend("whisper")
+    key = TranscriptCache.make_key("audiohash", "whisper:base", backend.cache_options({"word_timestamps": True}))
+    monkeypatch.setenv("ASR_BEAM_SIZE", "1")
+    monkeypatch.setenv("ASR_COMPUTE_TYPE", "float32")
+    assert TranscriptCache.make_key(
+        "audiohash", "whisper:base", backend.cache_options({"word_timestamps": True})
+    ) == key
+
+
+def test_results_round_trip_with_numpy_values(tmp_path):
+    cache = TranscriptCache(cache_dir=str(tmp_path), max_size_mb=1)
+    result = {"text": " hi", "segments": [{"start": np.float32(0.5), "end": 1.0, "tokens": np.array([1, 2])}]}
+    cache.put("k", result)
+    assert cache.get("k") == {"text": " hi", "segments": [{"start": 0.5, "end": 1.0, "tokens": [1, 2]}]}
+    assert cache.get("missing") is None
@@ -0,0 +1,64 @@
+"""
+Tests for the streaming upload size limit
+"""
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from src.api.middleware.upload_limit import MULTIPART_OVERHEAD_BYTES, UploadSizeLimitMiddleware
+
+LIMIT_MB = 1 / 16  # 64 KB
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    received = []
+
+    @app.post("/upload/analyze")
+    async def analyze(request: Request):
+        async for chunk in request.stream():
+            received.append(len(chunk))
+        return {"bytes": sum(received)}
+
+    app.add_middleware(UploadSizeLimitMiddleware, max_upload_mb=LIMIT_MB)
+    client = TestClient(app)
+    client.received = received
+    return client
+
+
+def limit_bytes() -> int:
+    return int(LIMIT_MB * 1024 * 1024) + MULTIPART_OVERHEAD_BYTES
+
+
+def test_small_upload_passes(client):
+    response = client.post("/upload/analyze", content=b"x" * 1000)
+    assert response.status_code == 200
+    assert response.json() == {"bytes": 1000}
+
+
+def test_declared_oversized_upload_is_rejected_before_reading(client):
+    response = client.post("/upload/analyze", content=b"x" * (limit_bytes() + 1))
+    assert response.status_code == 413
+    assert client.received == []
+
+
+def test_chunked_upload_is_cut_off_once_over_the_limit(client):
+    chunk = b"x" * 16384
+
+    def body():
+        for _ in range(limit_bytes() // len(chunk) + 20):
+            yield chunk
+
+    response = client.post("/upload/analyze", content=body())
+    assert response.status_code == 413
+    assert sum(client.received) <= limit_bytes()
+
+
+def test_other_routes_are_not_limited(client):
+    response = client.post("/elsewhere", content=b"x" * (limit_bytes() + 1))
+    assert response.status_code == 404